@@ -0,0 +1,292 @@
+"""Inspect and maintain scenes without a DCC.
+
+Run as ``python -m geod <command> ...``; see ``--help``. Each command only
+imports what it needs, so that starting up stays quick.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import errno
+import os
+import sys
+import time
+
+
+class Progress(object):
+
+    """A running count on stderr, updated at most a few times a second.
+
+    When stderr is not a terminal (e.g. on the farm, or in CI), only the
+    final count is written.
+
+    """
+
+    def __init__(self, label, quiet=False, interval=0.25):
+        self.label = label
+        self.enabled = not quiet
+        self.live = self.enabled and sys.stderr.isatty()
+        self.interval = interval
+        self.count = 0
+        self._last = 0
+
+    def __call__(self, path=None):
+        self.count += 1
+        now = time.time()
+        if self.live and now - self._last >= self.interval:
+            self._last = now
+            sys.stderr.write('\r%s %d objects %s\033[K' % (self.label, self.count, path or ''))
+            sys.stderr.flush()
+
+    def clear(self):
+        if self.live:
+            sys.stderr.write('\r\033[K')
+
+    def done(self):
+        self.clear()
+        if self.enabled:
+            sys.stderr.write('%s %d objects\n' % (self.label, self.count))
+            sys.stderr.flush()
+
+
+def _scene(args):
+    from .archive import is_archive
+    from .scene import Scene
+    if not (os.path.isdir(args.root) or is_archive(args.root) and os.path.isfile(args.root)):
+        raise SystemExit('%s: not a directory or archive' % args.root)
+    return Scene(args.root)
+
+
+def cmd_ls(args):
+    scene = _scene(args)
+    from .filters import PathFilter
+    path_filter = PathFilter(args.include) if args.include else None
+    for meta in scene._iter_metas(not args.no_index, path_filter):
+        path = meta['_path'].replace(os.sep, '/')
+        if args.long:
+            geo = meta.get('geometry') or {}
+            if geo.get('path'):
+                print('%-8s %10s %10s  %s' % (
+                    geo.get('format', '?'),
+                    geo.get('points', '-'),
+                    geo.get('faces', '-'),
+                    path,
+                ))
+            else:
+                print('%-8s %10s %10s  %s' % ('-', '-', '-', path))
+        else:
+            print(path)
+
+
+def cmd_info(args):
+
+    scene = _scene(args)
+    from . import index
+
+    progress = Progress('reading', args.quiet)
+    formats = {}
+    objects = geometry = points = faces = 0
+    for meta in scene._iter_metas(not args.no_index):
+        progress(meta['_path'])
+        objects += 1
+        geo = meta.get('geometry') or {}
+        if geo.get('path'):
+            geometry += 1
+            format_ = geo.get('format', '?')
+            formats[format_] = formats.get(format_, 0) + 1
+            points += geo.get('points', 0)
+            faces += geo.get('faces', 0)
+    progress.done()
+
+    if scene.is_archive:
+        # Archives are packed after their index is written.
+        from .metacodec import available, get_codec
+        reader = scene._open_archive()
+        codecs = [get_codec(name) for name in available()]
+        codec = next((c for c in codecs if index.NAME + c.extension in reader), None)
+        index_state = None if codec is None else 'fresh'
+    else:
+        codec = index.find_codec(scene.path)
+        index_state = None if codec is None else ('fresh' if index.read(scene.path, codec=codec) is not None else 'stale')
+    samples = scene.samples()
+    info = {
+        'objects': objects,
+        'geometry': geometry,
+        'formats': formats,
+        'points': points,
+        'faces': faces,
+        'index': index_state,
+        'meta_codec': codec.name if codec else None,
+        'spatial_index': scene.spatial_index() is not None,
+        'samples': None if samples is None else {'objects': len(samples), 'frames': len(samples.times)},
+    }
+
+    if args.json:
+        import json
+        json.dump(info, sys.stdout, indent=4, sort_keys=True)
+        print()
+        return
+    for key in ('objects', 'geometry', 'points', 'faces', 'index', 'meta_codec', 'spatial_index'):
+        print('%-14s %s' % (key + ':', info[key]))
+    for format_, count in sorted(formats.items()):
+        print('%-14s %d' % (format_ + ':', count))
+    if samples is not None:
+        print('%-14s %d objects over %d frames' % ('samples:', len(samples), len(samples.times)))
+
+
+def cmd_validate(args):
+    from .validate import iter_problems
+    if not os.path.isdir(args.root):
+        raise SystemExit('%s: not a directory; archives must be unpacked first' % args.root)
+    progress = Progress('validating', args.quiet)
+    count = 0
+    for path, problem in iter_problems(args.root, deep=args.deep, seen=progress):
+        progress.clear()
+        print('%s: %s' % (path.replace(os.sep, '/'), problem))
+        count += 1
+    progress.done()
+    if count:
+        print('%d problem%s' % (count, '' if count == 1 else 's'), file=sys.stderr)
+        return 1
+
+
+def cmd_convert(args):
+    scene = _scene(args)
+    progress = Progress('converting', args.quiet)
+    for i, total, path, meta in scene.iter_convert(args.format, quantize=True if args.quantize else None):
+        progress(path)
+    progress.done()
+
+
+def cmd_reindex(args):
+    scene = _scene(args)
+    progress = Progress('indexing', args.quiet)
+    for i, total, path, meta in scene.iter_reindex(args.codec):
+        progress(path)
+    progress.done()
+
+
+def cmd_diff(args):
+
+    scene = _scene(args)
+    if not os.path.exists(args.other):
+        raise SystemExit('%s: does not exist' % args.other)
+    result = scene.diff(args.other, args.tolerance, use_index=not args.no_index)
+
+    if args.json:
+        import json
+        data = result.as_dict()
+        data['reimport'] = result.reimport()
+        json.dump(data, sys.stdout, indent=4, sort_keys=True)
+        print()
+    elif args.reimport:
+        for path in result.reimport():
+            print(path)
+    else:
+        for path in result.added:
+            print('A %s' % path)
+        for path in result.removed:
+            print('D %s' % path)
+        for old, new in result.moved:
+            print('M %s -> %s' % (old, new))
+        for old, new in result.renamed:
+            print('R %s -> %s' % (old, new))
+        changes = collections.OrderedDict()
+        for flag, paths in (('t', result.transforms), ('g', result.geometry), ('m', result.meta)):
+            for path in paths:
+                changes[path] = changes.get(path, '') + flag
+        for path, flags in sorted(changes.items()):
+            print('C %s %s' % (flags.ljust(3), path))
+    return 1 if result else 0
+
+
+def cmd_pack(args):
+    from . import archive, journal
+    if not os.path.isdir(args.root):
+        raise SystemExit('%s: not a directory' % args.root)
+    if journal.exists(args.root):
+        raise SystemExit('%s: an unfinished dump; resume it first' % args.root)
+    if not archive.is_archive(args.archive):
+        raise SystemExit('%s: archives must end in %s' % (args.archive, archive.EXTENSION))
+    written, kept = archive.pack(args.root, args.archive, append=args.append)
+    if not args.quiet:
+        sys.stderr.write('packed %d files (%d unchanged)\n' % (written + kept, kept))
+
+
+def cmd_unpack(args):
+    from . import archive
+    archive.unpack(args.root, args.dest)
+
+
+def cmd_repack(args):
+    from . import archive
+    with archive.Archive(args.root) as packed:
+        garbage = packed.garbage
+    archive.repack(args.root)
+    if not args.quiet:
+        sys.stderr.write('freed %d bytes\n' % garbage)
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog='python -m geod', description='Inspect and maintain geod scenes.')
+    parser.add_argument('-q', '--quiet', action='store_true', help='no progress on stderr')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    def command(name, func, help):
+        sub = commands.add_parser(name, help=help, description=help)
+        sub.add_argument('root', help='the scene directory')
+        sub.set_defaults(func=func)
+        return sub
+
+    sub = command('ls', cmd_ls, 'list the objects in a scene')
+    sub.add_argument('-l', '--long', action='store_true', help='with geometry formats and counts')
+    sub.add_argument('-i', '--include', action='append', metavar='PATTERN', help='only these subtrees (prefix or glob)')
+    sub.add_argument('--no-index', action='store_true', help='walk the sidecars, even with an index')
+
+    sub = command('info', cmd_info, 'summarize a scene')
+    sub.add_argument('--json', action='store_true', help='print JSON')
+    sub.add_argument('--no-index', action='store_true', help='walk the sidecars, even with an index')
+
+    sub = command('validate', cmd_validate, 'check hierarchy, geometry references and the index')
+    sub.add_argument('--deep', action='store_true', help='also read and check every mesh')
+
+    sub = command('convert', cmd_convert, 'rewrite all geometry in another format')
+    sub.add_argument('format', choices=('obj', 'geod'), help='the geometry format to write')
+    sub.add_argument('--quantize', action='store_true', help='quantize attributes (geod only)')
+
+    sub = command('reindex', cmd_reindex, 'rebuild the index and spatial index from the sidecars')
+    sub.add_argument('--codec', help='also rewrite every sidecar with this meta codec')
+
+    sub = command('diff', cmd_diff, 'compare two scenes, reading only metas (exits 1 if they differ)')
+    sub.add_argument('other', help='the new scene directory')
+    sub.add_argument('--tolerance', type=float, help='ignore smaller changes to local matrices')
+    sub.add_argument('--reimport', action='store_true', help='only print the roots to load again')
+    sub.add_argument('--json', action='store_true', help='print JSON')
+    sub.add_argument('--no-index', action='store_true', help='walk the sidecars, even with an index')
+
+    sub = command('pack', cmd_pack, 'pack a scene directory into a single-file archive')
+    sub.add_argument('archive', help='the archive to write')
+    sub.add_argument('--append', action='store_true', help='only append files which changed to an existing archive')
+
+    sub = command('unpack', cmd_unpack, 'extract an archive into a scene directory')
+    sub.add_argument('dest', help='the directory to extract into')
+
+    sub = command('repack', cmd_repack, 'rewrite an archive without the space left by appending')
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except ValueError as e:
+        raise SystemExit('error: %s' % e)
+    except IOError as e:
+        # e.g. piped into ``head``.
+        if e.errno != errno.EPIPE:
+            raise
+
+
+if __name__ == '__main__':
+    sys.exit(main())
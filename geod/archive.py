@@ -0,0 +1,330 @@
+"""A whole scene in one file.
+
+A scene directory (as written by :meth:`Scene.iter_dump`) can be packed
+into a single archive, so that copying, syncing or loading it over a network
+filesystem takes a handful of large reads rather than a round trip for every
+sidecar and mesh::
+
+    magic       8 bytes, "GEODPACK"
+    version     uint32
+    reserved    uint32
+    toc_offset  uint64, where the table of contents starts
+    toc_size    uint64
+    members     each aligned to ALIGNMENT bytes
+    toc         JSON: {"version": 1, "members": {name: [offset, size, crc32]}}
+
+Member names are the files' paths relative to the scene, with ``/``
+separators (including the index, spatial index and samples). The archive is
+read through a memory map, so native meshes are served straight from it.
+
+The table of contents comes last, so an archive is appended to by writing
+new members and a new table after the old one, and only then pointing the
+header at it. Until then, readers (and a crash) see the old archive as it
+was. Members which are replaced are left where they are until the archive
+is :func:`repack`-ed.
+
+A :class:`Scene` whose path ends in :data:`EXTENSION` dumps to and loads
+from an archive.
+
+"""
+
+import contextlib
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from .formats import format_from_path, read_buffer
+from .metacodec import codecs
+from .utils import replace
+
+
+MAGIC = b'GEODPACK'
+VERSION = 1
+ALIGNMENT = 64
+EXTENSION = '.geoda'
+
+CHUNK_SIZE = 1 << 20
+
+_header = struct.Struct('<8sIIQQ')
+
+
+def _align(x):
+    return (x + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def is_archive(path):
+    """Is this the path of an archive (whether it exists yet or not)?"""
+    return path.lower().endswith(EXTENSION)
+
+
+def member_name(rel_path):
+    return rel_path.replace(os.sep, '/')
+
+
+class Archive(object):
+
+    """An archive open for reading; :meth:`close` it when done, or use it in a ``with`` block.
+
+    :param path: The archive file.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fh:
+            self._buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.members, self._toc_size = _read_toc(self._buffer)
+        except Exception:
+            self._buffer.close()
+            raise
+
+    def __repr__(self):
+        return 'Archive(%r)' % self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmap the archive.
+
+        Native meshes (and arrays) read from it are views of the mapping, so
+        if any are still around it is left to go with the last of them.
+
+        """
+        buffer, self._buffer = self._buffer, None
+        if buffer is None:
+            return
+        # Python 3 refuses to close a mapping with views of it, but Python 2
+        # would pull it out from under them.
+        if sys.version_info[0] < 3 and sys.getrefcount(buffer) > 2:
+            return
+        try:
+            buffer.close()
+        except BufferError:
+            pass
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, name):
+        return name in self.members
+
+    def names(self):
+        return sorted(self.members)
+
+    def _span(self, name):
+        try:
+            offset, size, _ = self.members[name]
+        except KeyError:
+            raise ValueError('%r is not in %s' % (name, self.path))
+        return offset, size
+
+    def size(self, name):
+        return self._span(name)[1]
+
+    def read(self, name):
+        """The bytes of the named member."""
+        offset, size = self._span(name)
+        return self._buffer[offset:offset + size]
+
+    def arrays(self, name):
+        """The arrays of a native member (see :func:`geod.binary.load_arrays`), without copying."""
+        from .binary import arrays_from_buffer
+        return arrays_from_buffer(self._buffer, self._span(name)[0])
+
+    def mesh(self, name, format=None):
+        """The mesh of the named member; native meshes are not copied."""
+        offset, size = self._span(name)
+        return read_buffer(self._buffer, offset, size, format or format_from_path(name))
+
+    def meta(self, path):
+        """The meta of the object at the given path (within the scene)."""
+        path = member_name(path)
+        for codec in codecs.values():
+            name = path + codec.extension
+            if name in self.members:
+                return codec.loads(self.read(name))
+        raise ValueError('no object %r in %s' % (path, self.path))
+
+    @property
+    def garbage(self):
+        """How many bytes are not in any member (e.g. after appending)."""
+        used = sum(_align(size) for _, size, _ in self.members.values())
+        return max(0, len(self._buffer) - ALIGNMENT - used - _align(self._toc_size))
+
+    def extract(self, dir_path):
+        """Write every member into the given directory."""
+        for name in self.names():
+            path = os.path.join(dir_path, *name.split('/'))
+            parent = os.path.dirname(path)
+            if not os.path.isdir(parent):
+                os.makedirs(parent)
+            with open(path, 'wb') as fh:
+                for chunk in self._iter_chunks(name):
+                    fh.write(chunk)
+
+    def _iter_chunks(self, name):
+        offset, size = self._span(name)
+        for start in range(offset, offset + size, CHUNK_SIZE):
+            yield self._buffer[start:min(start + CHUNK_SIZE, offset + size)]
+
+
+def _read_toc(buffer):
+    if len(buffer) < _header.size:
+        raise ValueError('not a geod archive; too small')
+    magic, version, _, toc_offset, toc_size = _header.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError('not a geod archive; bad magic %r' % magic)
+    if version > VERSION:
+        raise ValueError('unsupported geod archive version %d' % version)
+    toc = json.loads(buffer[toc_offset:toc_offset + toc_size].decode('utf8'))
+    members = dict((str(name), tuple(member)) for name, member in toc['members'].items())
+    return members, toc_size
+
+
+class _Writer(object):
+
+    """Writes aligned members from ``position`` on, then a table of contents."""
+
+    def __init__(self, fh, position):
+        self.fh = fh
+        self.position = position
+        self.members = {}
+        fh.seek(position)
+
+    def _pad(self):
+        start = _align(self.position)
+        self.fh.write(b'\0' * (start - self.position))
+        self.position = start
+
+    def add(self, name, chunks):
+        self._pad()
+        offset = self.position
+        crc = 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            self.fh.write(chunk)
+            self.position += len(chunk)
+        self.members[name] = (offset, self.position - offset, crc & 0xffffffff)
+
+    def finish(self):
+        """Write the table of contents and point the header at it."""
+        self._pad()
+        toc_offset = self.position
+        encoded = json.dumps({
+            'version': VERSION,
+            'members': dict((name, list(member)) for name, member in self.members.items()),
+        }, sort_keys=True, separators=(',', ':')).encode('utf8')
+        self.fh.write(encoded)
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        self.fh.seek(0)
+        self.fh.write(_header.pack(MAGIC, VERSION, 0, toc_offset, len(encoded)))
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+
+
+def _iter_file(path):
+    with open(path, 'rb') as fh:
+        while True:
+            chunk = fh.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _crc(path):
+    crc = 0
+    for chunk in _iter_file(path):
+        crc = zlib.crc32(chunk, crc)
+    return crc & 0xffffffff
+
+
+def _iter_files(dir_path):
+    """``(name, path)`` of every file in a scene directory, except temporaries."""
+    for parent, dir_names, file_names in os.walk(dir_path):
+        dir_names.sort()
+        rel_dir = os.path.relpath(parent, dir_path)
+        for file_name in sorted(file_names):
+            if file_name.endswith('.tmp'):
+                continue
+            rel_path = file_name if rel_dir == '.' else os.path.join(rel_dir, file_name)
+            yield member_name(rel_path), os.path.join(parent, file_name)
+
+
+def pack(dir_path, path, append=False):
+    """Pack a scene directory into an archive.
+
+    With ``append`` (and an existing archive), only files which differ from
+    the archive's members are written, after the existing data; members
+    without a file are dropped from the table of contents.
+
+    Returns ``(written, kept)`` counts of members.
+
+    """
+
+    if not append or not os.path.exists(path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as fh:
+            fh.write(b'\0' * ALIGNMENT)
+            writer = _Writer(fh, ALIGNMENT)
+            for name, file_path in _iter_files(dir_path):
+                writer.add(name, _iter_file(file_path))
+            writer.finish()
+        replace(tmp_path, path)
+        return len(writer.members), 0
+
+    with open(path, 'r+b') as fh:
+        fh.seek(0, os.SEEK_END)
+        end = fh.tell()
+        with contextlib.closing(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)) as buffer:
+            old, _ = _read_toc(buffer)
+        writer = _Writer(fh, end)
+        written = kept = 0
+        for name, file_path in _iter_files(dir_path):
+            member = old.get(name)
+            if member is not None and member[1] == os.path.getsize(file_path) and member[2] == _crc(file_path):
+                writer.members[name] = member
+                kept += 1
+            else:
+                writer.add(name, _iter_file(file_path))
+                written += 1
+        if written or set(writer.members) != set(old):
+            writer.finish()
+    return written, kept
+
+
+def repack(path):
+    """Rewrite an archive without the space left behind by appending."""
+    tmp_path = path + '.tmp'
+    # Windows won't replace a file which is mapped, so it is closed first.
+    with Archive(path) as archive:
+        with open(tmp_path, 'wb') as fh:
+            fh.write(b'\0' * ALIGNMENT)
+            writer = _Writer(fh, ALIGNMENT)
+            for name in archive.names():
+                writer.add(name, archive._iter_chunks(name))
+            writer.finish()
+    replace(tmp_path, path)
+
+
+def unpack(path, dir_path):
+    """Extract an archive into a scene directory."""
+    from . import index
+    with Archive(path) as archive:
+        archive.extract(dir_path)
+    # Extracting gave every sidecar and directory a new mtime, so the index
+    # must be written again to record them.
+    codec = index.find_codec(dir_path)
+    if codec is not None:
+        with open(index.index_path(dir_path, codec), 'rb') as fh:
+            entries = index.decode(fh.read(), codec)
+        if entries is not None:
+            index.write(dir_path, entries, codec)
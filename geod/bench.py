@@ -0,0 +1,800 @@
+"""Benchmarks which run without any DCC.
+
+Run as ``python -m geod.bench [name ...]``; results are printed (or
+written with ``--output``) as JSON, along with a description of the
+environment, so that they can be compared across releases. Benchmark
+arguments may be overridden with ``-p name=value``, where the value is JSON.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+
+benchmarks = {}
+
+
+def benchmark(func):
+    benchmarks[func.__name__.replace('_', '-')] = func
+    return func
+
+
+def timed(func, *args, **kwargs):
+    start = time.time()
+    result = func(*args, **kwargs)
+    return time.time() - start, result
+
+
+def peak_rss():
+    """The peak resident memory of this process so far, in bytes (or None)."""
+    try:
+        import resource
+    except ImportError:
+        return
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def count_files(root):
+    count = size = 0
+    for dir_path, dir_names, file_names in os.walk(root):
+        for file_name in file_names:
+            count += 1
+            size += os.path.getsize(os.path.join(dir_path, file_name))
+    return count, size
+
+
+class NullWriter(object):
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += getattr(data, 'nbytes', None) or len(data)
+
+
+@contextlib.contextmanager
+def scratch_dir():
+    """A temporary directory, removed afterwards."""
+    tmp = tempfile.mkdtemp()
+    try:
+        yield tmp
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def synthetic_scene(path, size, breadth=10, mesh_size=0, duplication=0.0, finalize=True, **kwargs):
+    """A scene at ``path`` of at least ``size`` mock objects (see :class:`geod.mock.Synthetic`).
+
+    Other arguments are passed to the :class:`geod.scene.Scene`.
+
+    """
+
+    from .mock import MockObject, Synthetic
+    from .scene import Scene
+
+    scene = Scene(path, object_class=MockObject, **kwargs)
+    scene.add_object(MockObject('root', Synthetic.for_count(size, breadth, mesh_size=mesh_size, duplication=duplication)))
+    if finalize:
+        scene.finalize_graph()
+    return scene
+
+
+def dump_synthetic(path, size, breadth=10, mesh_size=0, duplication=0.0, **kwargs):
+    """Dump a :func:`synthetic_scene`, and return ``(seconds, objects)``.
+
+    The scene is let go of on the way out, as a DCC's would be, so it does
+    not count against whatever is loaded next.
+
+    """
+    scene = synthetic_scene(path, size, breadth, mesh_size, duplication, **kwargs)
+    seconds, _ = timed(scene.dump)
+    return seconds, len(scene.guid_to_object)
+
+
+@benchmark
+def houdini_obj(size=300):
+    """Houdini OBJ writers against a stub geometry of ``size**2`` quads.
+
+    Speedups are over the per-element writer, on a hou build without the
+    bulk topology accessors.
+
+    """
+
+    from .houdini import obj
+    from .mock import StubGeometry
+
+    vertices = 4 * size * size
+    results = {}
+    for name, func, kwargs in (
+        ('per_element', obj.dump_per_element, {'bulk_topology': False}),
+        ('bulk', obj.dump, {}),
+        ('bulk_attribs_only', obj.dump, {'bulk_topology': False}),
+        ('bulk_point_normals', obj.dump, {'point_normals': True}),
+    ):
+        geo = StubGeometry.grid(size, size, **kwargs)
+        out = NullWriter()
+        elapsed, _ = timed(func, geo, out)
+        results[name] = {
+            'seconds': elapsed,
+            'vertices_per_second': vertices / elapsed,
+            'bytes': out.size,
+        }
+
+    base = results['per_element']['seconds']
+    for result in results.values():
+        result['speedup'] = base / result['seconds']
+    return results
+
+
+@benchmark
+def maya_mesh(size=300):
+    """Maya mesh extraction from a stub MFnMesh with ``size**2`` quads, written as OBJ."""
+
+    from . import obj
+    from .maya.mesh import from_fn
+    from .mock import StubMFnMesh, grid_mesh
+
+    fn = StubMFnMesh(grid_mesh(size))
+    extract_seconds, mesh = timed(from_fn, fn)
+    out = NullWriter()
+    write_seconds, _ = timed(obj.dump, mesh, out)
+    return {
+        'extract_seconds': extract_seconds,
+        'write_seconds': write_seconds,
+        'vertices_per_second': mesh.vertex_count / (extract_seconds + write_seconds),
+        'bytes': out.size,
+    }
+
+
+@benchmark
+def obj_read(size=1000):
+    """Standalone OBJ reader on a synthetic file of ``size**2`` quads."""
+
+    from . import obj
+    from .houdini.obj import dump
+    from .mock import StubGeometry
+
+    with scratch_dir() as tmp:
+        path = os.path.join(tmp, 'grid.obj')
+        with open(path, 'w') as fh:
+            dump(StubGeometry.grid(size, size), fh)
+        elapsed, mesh = timed(obj.load, path)
+        return {
+            'seconds': elapsed,
+            'bytes': os.path.getsize(path),
+            'vertices': mesh.vertex_count,
+            'vertices_per_minute': 60 * mesh.vertex_count / elapsed,
+        }
+
+
+@benchmark
+def graph(sizes=(1000, 10000, 100000, 1000000), depths=(100, 1000, 10000)):
+    """Scene.finalize_graph and walk, for wide trees and deep chains."""
+
+    from .mock import MockObject, chain, tree
+    from .scene import Scene
+
+    def run(children):
+        scene = Scene(tempfile.gettempdir(), object_class=MockObject)
+        scene.add_object(MockObject('root', children))
+        build, _ = timed(scene.finalize_graph)
+        walk, count = timed(lambda: sum(1 for _ in scene.walk()))
+        return {
+            'objects': count,
+            'finalize_seconds': build,
+            'walk_seconds': walk,
+            'walk_ns_per_object': 1e9 * walk / count,
+        }
+
+    return {
+        'tree': dict((str(n), run(tree(n, 10))) for n in sizes),
+        'chain': dict((str(n), run(chain(n))) for n in depths),
+    }
+
+
+@benchmark
+def quantize(size=300):
+    """Quantized geod meshes against full-precision ones, for ``size**2`` quads."""
+
+    import numpy as np
+
+    from . import binary, obj, quantize
+    from .houdini.mesh import extract
+    from .mock import StubGeometry
+
+    mesh = extract(StubGeometry.grid(size, size))
+    # Noisy normals per face-vertex, since a flat grid shares just the one.
+    mesh.normals = np.random.RandomState(0).normal(size=(len(mesh.indices), 3)).astype(np.float32)
+    mesh.normal_indices = None
+
+    full = NullWriter()
+    binary.dump(mesh, full)
+    text = NullWriter()
+    obj.dump(mesh, text)
+
+    results = {'full_bytes': full.size, 'obj_bytes': text.size}
+    for name, options in (
+        ('attributes', {}),
+        ('fixed_uvs', {'uvs': 'fixed'}),
+        ('positions', {'positions': 16}),
+        ('8_bit', {'normals': 8, 'uvs': 'fixed', 'uv_bits': 8, 'positions': 8}),
+    ):
+        encode_seconds, encoded = timed(quantize.encode, mesh, **options)
+        out = NullWriter()
+        binary.dump(encoded, out)
+        decode_seconds, decoded = timed(encoded.decode)
+        errors = quantize.errors(mesh, decoded)
+        results[name] = {
+            'bytes': out.size,
+            'ratio': float(full.size) / out.size,
+            'encode_seconds': encode_seconds,
+            'decode_seconds': decode_seconds,
+            'errors': dict((attr, {
+                'actual': error,
+                'bound': encoded.quantization[attr]['max_error'],
+                'ok': error <= encoded.quantization[attr]['max_error'],
+            }) for attr, error in errors.items() if attr in encoded.quantization),
+        }
+    return results
+
+
+@benchmark
+def scene(sizes=(1000, 100000, 1000000), breadth=10, mesh_size=4, duplication=0.5, dump_kwargs=None, stats=False):
+    """Scene.finalize_graph, iter_dump and iter_load of synthetic scenes.
+
+    Sizes are run smallest first, since peak memory is that of the process.
+    With ``stats``, the scenes' own per-phase stats are included.
+
+    """
+
+    from .mock import MockObject
+    from .scene import Scene
+
+    def phase(func):
+        elapsed, result = timed(func)
+        return {
+            'seconds': elapsed,
+            'peak_rss_bytes': peak_rss(),
+        }, result
+
+    # The scene is let go of before loading, by returning.
+    def dump(tmp, size):
+        out = synthetic_scene(tmp, size, breadth, mesh_size, duplication, finalize=False, stats=stats)
+        finalize, _ = phase(out.finalize_graph)
+        dumped, _ = phase(lambda: out.dump(**(dump_kwargs or {})))
+        if stats:
+            dumped['stats'] = out.stats.as_dict()
+        return len(out.guid_to_object), finalize, dumped
+
+    def load(tmp):
+        in_ = Scene(tmp, object_class=MockObject, stats=stats)
+        loaded, _ = phase(in_.load)
+        if stats:
+            loaded['stats'] = in_.stats.as_dict()
+        return len(in_.guid_to_object), loaded
+
+    results = {}
+    for size in sorted(sizes):
+        with scratch_dir() as tmp:
+            count, finalize, dumped = dump(tmp, size)
+            files, bytes_ = count_files(tmp)
+            loaded_count, loaded = load(tmp)
+            for result in (finalize, dumped, loaded):
+                result['objects_per_second'] = count / result['seconds'] if result['seconds'] else None
+            results[str(size)] = {
+                'objects': count,
+                'loaded_objects': loaded_count,
+                'files': files,
+                'bytes': bytes_,
+                'finalize': finalize,
+                'dump': dumped,
+                'load': loaded,
+            }
+
+    return results
+
+
+@benchmark
+def meta(size=100000, breadth=10):
+    """Loading ``size`` sidecars with each meta codec, and the old decoder.
+
+    ``legacy`` is ``json.load`` followed by the recursive re-encoding of
+    every string which was done before there were codecs.
+
+    """
+
+    from . import metacodec
+    from .mock import MockObject
+    from .scene import Scene
+
+    def legacy(x):
+        if isinstance(x, dict):
+            return dict((legacy(k), legacy(v)) for k, v in x.items())
+        elif isinstance(x, list):
+            return [legacy(y) for y in x]
+        elif isinstance(x, type(u'')):
+            return x.encode('utf8').decode('utf8')
+        return x
+
+    results = {}
+    for name in metacodec.available():
+        with scratch_dir() as tmp:
+
+            dump_seconds, count = dump_synthetic(tmp, size, breadth, meta_codec=name)
+
+            files, bytes_ = count_files(tmp)
+            codec = metacodec.codecs[name]
+            paths = []
+            for dir_path, dir_names, file_names in os.walk(tmp):
+                paths.extend(os.path.join(dir_path, x) for x in file_names if x.endswith(codec.extension) and not x.startswith('.'))
+
+            result = results[name] = {
+                'objects': count,
+                'files': files,
+                'bytes': bytes_,
+                'dump_seconds': dump_seconds,
+                'read_seconds': timed(lambda: [metacodec.load(x) for x in paths])[0],
+            }
+            for key, kwargs in (
+                ('load_walk_seconds', {'use_index': False}),
+                ('load_index_seconds', {}),
+                ('load_trusted_index_seconds', {'verify_index': False}),
+            ):
+                result[key] = timed(Scene(tmp, object_class=MockObject).load, **kwargs)[0]
+
+            if name == 'json':
+                def read_legacy():
+                    for path in paths:
+                        with open(path) as fh:
+                            legacy(json.load(fh))
+                results['legacy'] = {'read_seconds': timed(read_legacy)[0]}
+
+    return results
+
+
+@benchmark
+def stream(size=20000, breadth=10, mesh_size=2):
+    """Time to the first object, and memory, of streaming vs. whole loads.
+
+    Loaded objects are let go of as they come, as a DCC would own them.
+    Peak memory is traced (on Python 3) in a second, slower, pass.
+
+    """
+
+    from .mock import MockObject
+    from .scene import Scene
+
+    try:
+        import tracemalloc
+    except ImportError:
+        tracemalloc = None
+
+    class Orphan(MockObject):
+        @classmethod
+        def from_meta(cls, meta, parent):
+            return cls(meta['name'])
+
+    with scratch_dir() as tmp:
+
+        dump_synthetic(tmp, size, breadth, mesh_size)
+
+        def load(**kwargs):
+            start = time.time()
+            first = None
+            count = 0
+            for _ in Scene(tmp, object_class=Orphan).iter_load(**kwargs):
+                if first is None:
+                    first = time.time() - start
+                count += 1
+            return {
+                'objects': count,
+                'first_object_seconds': first,
+                'seconds': time.time() - start,
+            }
+
+        results = {}
+        for name, kwargs in (('stream', {'stream': True}), ('whole', {})):
+            result = results[name] = load(**kwargs)
+            if tracemalloc:
+                tracemalloc.start()
+                load(**kwargs)
+                result['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+        return results
+
+
+@benchmark
+def spatial(size=100000, queries=100, extent=1000.0):
+    """Box queries of ``size`` scattered objects, with the BVH and by brute force."""
+
+    import numpy as np
+
+    from .spatial import SpatialIndex
+
+    rng = np.random.RandomState(0)
+    lo = rng.uniform(0, extent, size=(size, 3))
+    bounds = np.stack([lo, lo + rng.uniform(0.1, 5, size=(size, 3))], axis=1)
+    counts = rng.randint(4, 100000, size=size)
+    paths = ['object%d' % i for i in range(size)]
+
+    build_seconds, spatial = timed(SpatialIndex, paths, bounds, counts, counts, counts * 32)
+
+    boxes = []
+    for _ in range(queries):
+        corner = rng.uniform(0, extent, size=3)
+        boxes.append((corner, corner + extent / 20))
+
+    def bvh():
+        return [len(spatial.query_box(lo, hi)) for lo, hi in boxes]
+
+    def brute():
+        return [int(((bounds[:, 0] <= hi) & (bounds[:, 1] >= lo)).all(axis=1).sum()) for lo, hi in boxes]
+
+    # The first query unpacks the BVH into lists.
+    first_seconds, _ = timed(spatial.query_box, *boxes[0])
+    bvh_seconds, found = timed(bvh)
+    brute_seconds, expected = timed(brute)
+    largest_seconds, _ = timed(spatial.largest, 100)
+
+    return {
+        'objects': size,
+        'build_seconds': build_seconds,
+        'first_query_seconds': first_seconds,
+        'query_seconds': bvh_seconds / queries,
+        'brute_force_query_seconds': brute_seconds / queries,
+        'mean_found': sum(found) / float(queries),
+        'matches_brute_force': found == expected,
+        'largest_seconds': largest_seconds,
+    }
+
+
+@benchmark
+def samples(size=1000, frames=1000, breadth=10, mesh_size=4):
+    """Dumping ``size`` objects with and without ``frames`` of samples.
+
+    A tenth of the mock objects move, and a tenth blink, on every frame.
+
+    """
+
+    import numpy as np
+
+    with scratch_dir() as tmp:
+
+        def dump(**kwargs):
+            shutil.rmtree(tmp)
+            scene = synthetic_scene(tmp, size, breadth, mesh_size)
+            return timed(scene.dump, **kwargs)[0], scene
+
+        static_seconds, _ = dump()
+        static_files, static_bytes = count_files(tmp)
+        sampled_seconds, scene = dump(frames=range(frames), visibility=True)
+        samples = scene.samples()
+
+        times = np.linspace(0, frames - 1, 10 * frames)
+        interpolate_seconds, _ = timed(lambda: [samples.transforms_at(t) for t in times])
+
+        return {
+            'objects': len(samples),
+            'frames': frames,
+            'dump_seconds': static_seconds,
+            'sampled_dump_seconds': sampled_seconds,
+            'stored_samples': len(samples._matrices.values),
+            'samples_bytes': os.path.getsize(os.path.join(tmp, '.samples.geod')),
+            'dump_per_frame_bytes_estimate': static_bytes * frames,
+            'transforms_at_seconds': interpolate_seconds / len(times),
+        }
+
+
+@benchmark
+def cache(size=2000, breadth=10, mesh_size=20, geometry_format='obj'):
+    """Eager, deferred, and cached loads of ``size`` objects with meshes."""
+
+    from .cache import GeometryCache
+    from .mock import MockObject
+    from .scene import Scene
+
+    with scratch_dir() as tmp:
+
+        _, count = dump_synthetic(tmp, size, breadth, mesh_size, geometry_format=geometry_format)
+
+        def load(**kwargs):
+            scene = Scene(tmp, object_class=MockObject, geometry_cache=kwargs.pop('cache', None))
+            return timed(scene.load, **kwargs)[0], scene
+
+        eager_seconds, _ = load()
+        deferred_seconds, scene = load(defer_geometry=True)
+        fetch_seconds, _ = timed(scene.load_geometry)
+
+        geometry_cache = GeometryCache()
+        cold_seconds, _ = load(cache=geometry_cache)
+        warm_seconds, _ = load(cache=geometry_cache)
+
+        return {
+            'objects': count,
+            'eager_seconds': eager_seconds,
+            'deferred_seconds': deferred_seconds,
+            'deferred_fetch_all_seconds': fetch_seconds,
+            'cold_cache_seconds': cold_seconds,
+            'warm_cache_seconds': warm_seconds,
+            'cache': geometry_cache.as_dict(),
+        }
+
+
+@benchmark
+def prefetch(size=1000, breadth=10, mesh_size=30, geometry_format='obj', workers=(1, 2, 4)):
+    """Loads of ``size`` objects with meshes, decoded on the main thread and in pools.
+
+    ``main_thread_geometry_seconds`` is how long the main thread spent on
+    (or waiting for) geometry; the rest of a load creates nodes, which no
+    pool helps with.
+
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    from .mock import MockObject
+    from .scene import Scene
+
+    with scratch_dir() as tmp:
+
+        _, count = dump_synthetic(tmp, size, breadth, mesh_size, geometry_format=geometry_format)
+
+        def load(**kwargs):
+            scene = Scene(tmp, object_class=MockObject, stats=True)
+            seconds, _ = timed(scene.load, **kwargs)
+            phases = scene.stats.as_dict()['phases']
+            return {
+                'seconds': seconds,
+                'main_thread_geometry_seconds': phases.get('geometry', 0) + phases.get('wait_geometry', 0),
+            }
+
+        results = {'objects': count, 'cpus': os.cpu_count() if hasattr(os, 'cpu_count') else None}
+        results['serial'] = load()
+        for count in workers:
+            results['threads_%d' % count] = load(workers=count)
+        for count in workers:
+            with ProcessPoolExecutor(count) as executor:
+                results['processes_%d' % count] = load(executor=executor)
+        return results
+
+
+@benchmark
+def resume(size=10000, breadth=10, mesh_size=20, fraction=0.9):
+    """A full dump of ``size`` objects, against resuming one interrupted after ``fraction`` of them."""
+
+    with scratch_dir() as tmp:
+
+        full_seconds, total = dump_synthetic(tmp, size, breadth, mesh_size)
+        shutil.rmtree(tmp)
+
+        # The generator is dropped mid-way, as a cancelled export would be.
+        def interrupt():
+            dumping = synthetic_scene(tmp, size, breadth, mesh_size).iter_dump()
+            for i, _, _, _ in dumping:
+                if i >= fraction * total:
+                    break
+            dumping.close()
+        interrupted_seconds, _ = timed(interrupt)
+
+        resumed = synthetic_scene(tmp, size, breadth, mesh_size)
+        resume_seconds, _ = timed(resumed.dump, resume=True)
+
+        return {
+            'objects': total,
+            'full_seconds': full_seconds,
+            'interrupted_seconds': interrupted_seconds,
+            'resume_seconds': resume_seconds,
+            'summary': resumed.dump_summary,
+        }
+
+
+@benchmark
+def diff(size=10000, breadth=10, mesh_size=4, changes=100):
+    """Diffing two scenes of ``size`` objects, against reading all of their geometry.
+
+    The second scene is a copy of the first with a subtree moved, an object
+    renamed, and ``changes`` local transforms nudged.
+
+    """
+
+    from .metacodec import get_codec
+    from .scene import Scene
+
+    with scratch_dir() as tmp:
+
+        old = os.path.join(tmp, 'old')
+        dump_synthetic(old, size, breadth, mesh_size)
+
+        new = os.path.join(tmp, 'new')
+        shutil.copytree(old, new)
+        codec = get_codec('json')
+        root = os.path.join(new, 'root')
+        os.mkdir(os.path.join(root, 'moved'))
+        with open(os.path.join(root, 'moved.json'), 'wb') as fh:
+            fh.write(codec.dumps({'name': 'moved'}))
+        for name in ('n0', 'n0.json'):
+            os.rename(os.path.join(root, name), os.path.join(root, 'moved', name))
+        for name in ('n1', 'n1.json'):
+            os.rename(os.path.join(root, name), os.path.join(root, name.replace('n1', 'renamed')))
+        nudged = 0
+        for dir_path, dir_names, file_names in os.walk(os.path.join(root, 'n2')):
+            for file_name in sorted(file_names):
+                if nudged >= changes or not file_name.endswith('.json'):
+                    continue
+                path = os.path.join(dir_path, file_name)
+                with open(path, 'rb') as fh:
+                    meta = codec.loads(fh.read())
+                meta['transform']['local'][13] += 1.0
+                with open(path, 'wb') as fh:
+                    fh.write(codec.dumps(meta))
+                nudged += 1
+        for _ in Scene(new).iter_reindex():
+            pass
+
+        indexed_seconds, result = timed(Scene(old).diff, new)
+        walked_seconds, _ = timed(Scene(old).diff, new, use_index=False)
+
+        def read_geometry():
+            total = 0
+            for path in (old, new):
+                for dir_path, dir_names, file_names in os.walk(path):
+                    for file_name in file_names:
+                        if file_name.endswith('.obj'):
+                            with open(os.path.join(dir_path, file_name), 'rb') as fh:
+                                total += len(fh.read())
+            return total
+        geometry_seconds, geometry_bytes = timed(read_geometry)
+
+        return {
+            'objects': result.stats['old_objects'],
+            'indexed_seconds': indexed_seconds,
+            'walked_seconds': walked_seconds,
+            'read_all_geometry_seconds': geometry_seconds,
+            'geometry_bytes': geometry_bytes,
+            'diff': dict((key, len(value)) for key, value in result.as_dict().items() if key != 'stats'),
+            'stats': result.stats,
+        }
+
+
+@benchmark
+def archive(size=10000, breadth=10, mesh_size=4, geometry_format='geod'):
+    """Dumping, copying and loading ``size`` objects as a directory and as an archive."""
+
+    from .mock import MockObject
+    from .scene import Scene
+
+    with scratch_dir() as tmp:
+
+        results = {}
+        for name, path, copy in (
+            ('directory', os.path.join(tmp, 'scene'), shutil.copytree),
+            ('archive', os.path.join(tmp, 'scene.geoda'), shutil.copyfile),
+        ):
+            dump_seconds, count = dump_synthetic(path, size, breadth, mesh_size, geometry_format=geometry_format)
+
+            copy_path = os.path.join(tmp, 'copy')
+            copy_seconds, _ = timed(copy, path, copy_path)
+            if os.path.isdir(copy_path):
+                files, bytes_ = count_files(copy_path)
+                shutil.rmtree(copy_path)
+            else:
+                files, bytes_ = 1, os.path.getsize(copy_path)
+                os.unlink(copy_path)
+
+            scene = Scene(path, object_class=MockObject, stats=True)
+            load_seconds, _ = timed(scene.load)
+            results[name] = {
+                'objects': count,
+                'files': files,
+                'bytes': bytes_,
+                'dump_seconds': dump_seconds,
+                'copy_seconds': copy_seconds,
+                'load_seconds': load_seconds,
+                'files_opened_on_load': scene.stats.as_dict()['counters'].get('files_read', 0),
+            }
+
+        return results
+
+
+@benchmark
+def transforms(size=100000, breadth=10):
+    """Local matrices and decomposition of ``size`` transforms, batched and one by one."""
+
+    import numpy as np
+
+    from . import transforms
+
+    rng = np.random.RandomState(0)
+    local = transforms.compose(
+        rng.normal(size=(size, 3)),
+        rng.uniform(-180, 180, size=(size, 3)),
+        rng.uniform(0.5, 2, size=(size, 3)),
+        rng.normal(scale=0.2, size=(size, 3)),
+    )
+    parents = (np.arange(size) - 1) // breadth
+
+    world_seconds, world = timed(transforms.world_from_local, local, parents)
+    local_seconds, result = timed(transforms.local_from_world, world, parents)
+    decompose_seconds, _ = timed(transforms.decompose, result)
+
+    def one_by_one():
+        inv = np.linalg.inv
+        for i, parent in enumerate(parents.tolist()):
+            if parent >= 0:
+                world[i].dot(inv(world[parent]))
+    per_node_seconds, _ = timed(one_by_one)
+
+    return {
+        'objects': size,
+        'world_from_local_seconds': world_seconds,
+        'local_from_world_seconds': local_seconds,
+        'decompose_seconds': decompose_seconds,
+        'per_node_local_seconds': per_node_seconds,
+        'speedup': per_node_seconds / local_seconds,
+        'max_error': float(np.abs(result - local).max()),
+    }
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count() if hasattr(os, 'cpu_count') else None,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog='python -m geod.bench')
+    parser.add_argument('names', nargs='*', metavar='name', help='benchmarks to run (default: all)')
+    parser.add_argument('-l', '--list', action='store_true', help='list the benchmarks')
+    parser.add_argument('-p', '--param', action='append', default=[], metavar='name=value',
+        help='override a benchmark argument, with a JSON value')
+    parser.add_argument('-o', '--output', help='write the results to this file')
+    args = parser.parse_args(argv)
+
+    kwargs = {}
+    for param in args.param:
+        name, _, value = param.partition('=')
+        kwargs[name] = json.loads(value)
+
+    if args.list:
+        for name, func in sorted(benchmarks.items()):
+            print('%s: %s' % (name, (func.__doc__ or '').strip().split('\n')[0]))
+        return
+
+    results = {}
+    for name in args.names or sorted(benchmarks):
+        func = benchmarks[name]
+        code = func.__code__
+        own_kwargs = dict((k, v) for k, v in kwargs.items() if k in code.co_varnames[:code.co_argcount])
+        results[name] = func(**own_kwargs)
+
+    output = {
+        'environment': environment(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(output, fh, indent=4, sort_keys=True)
+    else:
+        json.dump(output, sys.stdout, indent=4, sort_keys=True)
+        print()
+
+
+if __name__ == '__main__':
+    main()
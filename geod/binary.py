@@ -0,0 +1,143 @@
+"""The native ``geod`` geometry format.
+
+A file is a small header followed by raw little-endian arrays::
+
+    magic       8 bytes, "GEODMESH"
+    version     uint32
+    size        uint32, the size of the JSON header which follows
+    header      ASCII JSON describing each array
+    arrays      each aligned to ALIGNMENT bytes
+
+The header maps each array name to its ``dtype``, ``shape`` and ``offset``
+(from the aligned end of the header), and may carry extra ``attrs``. Reading
+maps the file into memory and the arrays are served straight from that
+mapping.
+
+Version 2 files may have quantized arrays, as described by the
+``quantization`` attr (see :mod:`geod.quantize`); these are decoded on load.
+
+"""
+
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from .mesh import Mesh
+
+
+MAGIC = b'GEODMESH'
+VERSION = 2
+ALIGNMENT = 64
+
+_prefix = struct.Struct('<8sII')
+
+
+def _align(x):
+    return (x + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _little_endian(array):
+    array = np.asarray(array)
+    return np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+
+
+def dump_arrays(fh, arrays, attrs=None, version=1):
+    """Write a sequence of ``(name, array)`` pairs to the given file."""
+
+    arrays = [(name, _little_endian(array)) for name, array in arrays]
+
+    specs = {}
+    offset = 0
+    for name, array in arrays:
+        specs[name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+        }
+        offset = _align(offset + array.nbytes)
+
+    header = {'arrays': specs}
+    if attrs:
+        header['attrs'] = attrs
+    encoded = json.dumps(header, sort_keys=True).encode('ascii')
+
+    fh.write(_prefix.pack(MAGIC, version, len(encoded)))
+    fh.write(encoded)
+    position = _prefix.size + len(encoded)
+    data_start = _align(position)
+
+    for name, array in arrays:
+        offset = data_start + specs[name]['offset']
+        fh.write(b'\0' * (offset - position))
+        if array.nbytes:
+            fh.write(array.data)
+        position = offset + array.nbytes
+
+    return position
+
+
+def load_header(buffer, base=0):
+    """Return ``(header, data_start)`` for the file at ``base`` in the buffer."""
+    magic, version, size = _prefix.unpack_from(buffer, base)
+    if magic != MAGIC:
+        raise ValueError('not a geod mesh; bad magic %r' % magic)
+    if version > VERSION:
+        raise ValueError('unsupported geod mesh version %d' % version)
+    start = base + _prefix.size
+    header = json.loads(bytes(buffer[start:start + size]).decode('ascii'))
+    return header, base + _align(_prefix.size + size)
+
+
+def load_arrays(path):
+    """Map the given file into memory, returning ``(arrays, attrs)``.
+
+    The arrays are read-only views onto the mapping, so nothing is read from
+    disk until it is accessed.
+
+    """
+    with open(path, 'rb') as fh:
+        buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    return arrays_from_buffer(buffer)
+
+
+def arrays_from_buffer(buffer, base=0):
+    header, data_start = load_header(buffer, base)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(str(spec['dtype']))
+        shape = tuple(spec['shape'])
+        # np.prod is surprisingly slow for a handful of small ints.
+        count = 1
+        for n in shape:
+            count *= n
+        if count:
+            array = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + spec['offset'])
+        else:
+            array = np.empty(0, dtype=dtype)
+        arrays[str(name)] = array.reshape(shape)
+    return arrays, header.get('attrs') or {}
+
+
+def dump(mesh, fh):
+    quantization = getattr(mesh, 'quantization', None)
+    if quantization:
+        return dump_arrays(fh, mesh.arrays(), {'quantization': quantization}, version=2)
+    return dump_arrays(fh, mesh.arrays())
+
+
+def load(path):
+    return _mesh_from_arrays(*load_arrays(path))
+
+
+def load_buffer(buffer, offset=0, size=None):
+    """The mesh at ``offset`` in a buffer (e.g. in an archive), without copying it."""
+    return _mesh_from_arrays(*arrays_from_buffer(buffer, offset))
+
+
+def _mesh_from_arrays(arrays, attrs):
+    if attrs.get('quantization'):
+        from .quantize import decode
+        return decode(arrays, attrs['quantization'])
+    return Mesh(**arrays)
@@ -4,7 +4,9 @@ import itertools
 import re
 
 import bpy
+import numpy as np
 
+from ..mesh import Mesh
 from ..object import BaseObject
 
 
@@ -56,11 +58,38 @@ class BlenderObject(BaseObject):
     def set_transforms(self, transforms):
         raise NotImplementedError()
 
-    def export_geo(self, path):
+    def extract_geo(self):
 
         if not self.node.data or self.node.type != "MESH":
             return
 
+        data = self.node.data
+        data.calc_normals_split()
+
+        def get(seq, name, dtype, width=1):
+            out = np.empty(len(seq) * width, dtype=dtype)
+            seq.foreach_get(name, out)
+            return out.reshape(-1, width) if width > 1 else out
+
+        mesh = Mesh(
+            get(data.vertices, 'co', np.float32, 3),
+            get(data.polygons, 'loop_total', np.int32),
+            get(data.loops, 'vertex_index', np.int32),
+            normals=get(data.loops, 'normal', np.float32, 3),
+        )
+        if data.uv_layers.active:
+            mesh.uvs = get(data.uv_layers.active.data, 'uv', np.float32, 2)
+
+        return mesh
+
+    def export_geo(self, path, format='obj'):
+
+        if not self.node.data or self.node.type != "MESH":
+            return
+
+        if format != 'obj':
+            return super(BlenderObject, self).export_geo(path, format)
+
         selected = bpy.context.selected_objects
         for x in selected:
             x.select = False
@@ -93,7 +122,21 @@ class BlenderObject(BaseObject):
             for x in selected:
                 x.select = True
 
-        return {'path': path + '.obj'}
+        # Summarise it as geod.spatial.mesh_summary would, without pulling out
+        # the whole mesh.
+        data = self.node.data
+        geo = {
+            'path': path + '.obj',
+            'format': 'obj',
+            'points': len(data.vertices),
+            'faces': len(data.polygons),
+        }
+        if len(data.vertices):
+            positions = np.empty(len(data.vertices) * 3, dtype=np.float64)
+            data.vertices.foreach_get('co', positions)
+            positions = positions.reshape(-1, 3)
+            geo['bounds'] = [positions.min(axis=0).tolist(), positions.max(axis=0).tolist()]
+        return geo
 
 
     def import_geo(self, spec):
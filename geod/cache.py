@@ -0,0 +1,131 @@
+"""An in-process LRU cache of parsed geometry.
+
+Meshes are keyed by path, mtime and size, so a file which changes on disk is
+read again. The cache holds at most ``max_bytes`` of mesh arrays (meshes
+which are mapped from ``geod`` files count in full, even if they are not yet
+paged in), and keeps hit and miss counts.
+
+Scenes given ``geometry_cache=True`` share :func:`default_cache`, so
+repeated loads of the same assets (in one session) are only parsed once.
+
+"""
+
+import collections
+import os
+import threading
+
+from .formats import read as read_mesh
+
+
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def mesh_nbytes(mesh):
+    return sum(array.nbytes for _, array in mesh.arrays())
+
+
+class GeometryCache(object):
+
+    """A least-recently-used cache of meshes read with :func:`geod.formats.read`.
+
+    :param max_bytes: How much mesh data to hold on to.
+
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, path, format=None):
+        """Get the mesh at the given path, returning ``(mesh, hit)``."""
+
+        stat = os.stat(path)
+        key = (path, stat.st_mtime, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                # Re-inserting makes this the most recently used.
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[0], True
+            self.misses += 1
+
+        mesh = read_mesh(path, format)
+        self._add(key, mesh)
+        return mesh, False
+
+    def __contains__(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return (path, stat.st_mtime, stat.st_size) in self._entries
+
+    def add(self, path, mesh):
+        """Hold on to a mesh which was read from the path elsewhere (e.g. in a pool)."""
+        stat = os.stat(path)
+        self._add((path, stat.st_mtime, stat.st_size), mesh)
+
+    def _add(self, key, mesh):
+
+        path = key[0]
+        nbytes = mesh_nbytes(mesh)
+        with self._lock:
+            # The file has changed since we last read it.
+            old_key = self._keys.get(path)
+            if old_key is not None and old_key in self._entries:
+                self.nbytes -= self._entries.pop(old_key)[1]
+            if nbytes <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (mesh, nbytes)
+                self._keys[path] = key
+                self.nbytes += nbytes
+                self._evict()
+
+    def get(self, path, format=None):
+        """Get the mesh at the given path, from the cache if we can."""
+        return self.lookup(path, format)[0]
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self._entries:
+            key, (_, nbytes) = self._entries.popitem(last=False)
+            if self._keys.get(key[0]) == key:
+                del self._keys[key[0]]
+            self.nbytes -= nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self.nbytes = 0
+
+    def as_dict(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+_default_cache = None
+
+
+def default_cache():
+    """The cache shared by everything in this process."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = GeometryCache()
+    return _default_cache
@@ -1,8 +1,8 @@
 import datetime
 import errno
-import json
 import os
 
+from geod.metacodec import codec_for_path, load as load_meta
 from geod.utils import makedirs
 
 
@@ -13,14 +13,11 @@ class BaseLoader(BaseCommon):
         for dir_path, dir_names, file_names in os.walk(self.root):
             for file_name in file_names:
 
-                if file_name.startswith('.') or not file_name.endswith('.json'):
+                if file_name.startswith('.') or not codec_for_path(file_name):
                     continue
 
                 path = os.path.join(dir_path, file_name)
-                with open(path) as fh:
-                    obj = json.load(fh)
-
-                obj = self._encode(obj)
+                obj = load_meta(path)
 
                 obj['path'] = os.path.relpath(os.path.splitext(path)[0], self.root)
 
@@ -30,16 +27,6 @@ class BaseLoader(BaseCommon):
 
                 yield obj
 
-    def _encode(self, x):
-        if isinstance(x, dict):
-            return dict((self._encode(k), self._encode(v)) for k, v in x.iteritems())
-        elif isinstance(x, list):
-            return [self._encode(y) for y in x]
-        elif isinstance(x, unicode):
-            return x.encode('ascii')
-        else:
-            return x
-
     def load(self):
         for obj in self.iter_objects():
             self.load_object(obj)
@@ -0,0 +1,307 @@
+"""Differences between two scenes on disk, without any DCC.
+
+:func:`diff` compares the sidecars (or the indexes, when they are fresh) of
+two scenes, and never reads geometry which has a recorded fingerprint, so
+it costs about as much as listing both scenes. Objects are matched by path;
+whatever is left over is paired up as moved (the same name and content
+under another parent) or renamed (the same content under the same parent),
+and everything below a moved object moves with it.
+
+The result is a :class:`SceneDiff`, whose :meth:`~SceneDiff.reimport`
+paths may be given as ``include`` to :meth:`Scene.iter_load` or
+:meth:`Scene.load_geometry` to bring only what changed into a DCC.
+
+"""
+
+import collections
+import os
+
+import numpy as np
+
+from .fingerprint import file_fingerprint
+
+
+DEFAULT_TOLERANCE = 1e-6
+
+IDENTITY = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+
+# Meta keys which are compared on their own (or not at all).
+_SKIP_KEYS = set(('name', 'transform', 'geometry'))
+
+
+class SceneDiff(object):
+
+    """What changed from an old scene to a new one.
+
+    Paths have ``/`` separators. ``added`` are in the new scene, ``removed``
+    in the old one, and ``moved`` and ``renamed`` are ``(old, new)`` pairs
+    of the objects which were moved themselves (not their descendants).
+    ``transforms``, ``geometry`` and ``meta`` are the new paths of matched
+    objects whose local transform, geometry, or other meta changed.
+
+    """
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.moved = []
+        self.renamed = []
+        self.transforms = []
+        self.geometry = []
+        self.meta = []
+        #: Every matched object's old path to its new path.
+        self.paths = collections.OrderedDict()
+        self.stats = {}
+
+    def __bool__(self):
+        return bool(
+            self.added or self.removed or self.moved or self.renamed or
+            self.transforms or self.geometry or self.meta
+        )
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return '<SceneDiff %s>' % ' '.join('%s=%d' % (key, len(getattr(self, key))) for key in (
+            'added', 'removed', 'moved', 'renamed', 'transforms', 'geometry', 'meta'
+        ))
+
+    def reimport(self, transforms=True):
+        """New paths of everything which must be loaded again to catch up.
+
+        That is everything added, moved or renamed, or with new geometry or
+        meta; without ``transforms``, objects which only moved locally are
+        left out (e.g. if they will be updated in place).
+
+        """
+        paths = set(self.added)
+        paths.update(new for _, new in self.moved)
+        paths.update(new for _, new in self.renamed)
+        paths.update(self.geometry)
+        paths.update(self.meta)
+        if transforms:
+            paths.update(self.transforms)
+        return _roots(paths)
+
+    def as_dict(self):
+        return {
+            'added': self.added,
+            'removed': self.removed,
+            'moved': [list(pair) for pair in self.moved],
+            'renamed': [list(pair) for pair in self.renamed],
+            'transforms': self.transforms,
+            'geometry': self.geometry,
+            'meta': self.meta,
+            'stats': self.stats,
+        }
+
+
+def _roots(paths):
+    """The given paths, without any which are below another of them."""
+    roots = []
+    for path in sorted(paths):
+        if not roots or not path.startswith(roots[-1] + '/'):
+            roots.append(path)
+    return roots
+
+
+def _metas(scene, use_index):
+    metas = collections.OrderedDict()
+    for meta in scene._iter_metas(use_index):
+        metas[meta['_path'].replace(os.sep, '/')] = meta
+    return metas
+
+
+def _split(path):
+    parent, _, name = path.rpartition('/')
+    return parent, name
+
+
+def _children(paths):
+    children = collections.defaultdict(list)
+    for path in paths:
+        parent, name = _split(path)
+        children[parent].append(name)
+    return children
+
+
+def _identity(meta, children):
+    """What an object is, regardless of where it is; None if we can't tell."""
+    geo = meta.get('geometry') or {}
+    if geo.get('fingerprint'):
+        return 'geometry', geo['fingerprint']
+    if children:
+        return 'children', tuple(sorted(children))
+
+
+def _unique(keyed):
+    """Only the keys with exactly one value."""
+    return dict((key, values[0]) for key, values in keyed.items() if len(values) == 1)
+
+
+def _match(old_metas, new_metas, removed, added):
+    """Pair up removed and added objects; returns ``{old: (new, kind)}``.
+
+    ``kind`` is ``'moved'``, ``'renamed'``, or None for the descendants of
+    those which moved along with them.
+
+    """
+
+    old_children = _children(old_metas)
+    new_children = _children(new_metas)
+    added = set(added)
+
+    by_name = collections.defaultdict(list)
+    by_parent = collections.defaultdict(list)
+    for path in added:
+        parent, name = _split(path)
+        identity = _identity(new_metas[path], new_children.get(path))
+        by_name[name, identity].append(path)
+        if identity is not None:
+            by_parent[parent, identity].append(path)
+    old_by_name = collections.defaultdict(list)
+    old_by_parent = collections.defaultdict(list)
+    identities = {}
+    for path in removed:
+        parent, name = _split(path)
+        identity = identities[path] = _identity(old_metas[path], old_children.get(path))
+        old_by_name[name, identity].append(path)
+        if identity is not None:
+            old_by_parent[parent, identity].append(path)
+
+    # Only pair objects which can't be mistaken for another.
+    by_name = _unique(by_name)
+    by_parent = _unique(by_parent)
+    old_by_name = _unique(old_by_name)
+    old_by_parent = _unique(old_by_parent)
+
+    matched = {}
+    # Parents first, so that their children can follow them.
+    for path in sorted(removed, key=lambda p: p.count('/')):
+
+        parent, name = _split(path)
+        new_parent = matched[parent][0] if parent in matched else parent
+        identity = identities[path]
+
+        if parent in matched:
+            new = (new_parent + '/' if new_parent else '') + name
+            if new in added:
+                added.discard(new)
+                matched[path] = new, None
+                continue
+
+        new = by_name.get((name, identity))
+        if new in added and old_by_name.get((name, identity)) == path:
+            added.discard(new)
+            matched[path] = new, 'moved'
+            continue
+
+        if identity is None:
+            continue
+        new = by_parent.get((new_parent, identity))
+        if new in added and old_by_parent.get((parent, identity)) == path:
+            added.discard(new)
+            matched[path] = new, 'renamed'
+
+    return matched
+
+
+def _local(meta):
+    return (meta.get('transform') or {}).get('local') or IDENTITY
+
+
+def _other(meta):
+    return dict((k, v) for k, v in meta.items() if k not in _SKIP_KEYS and not k.startswith('_'))
+
+
+class _Fingerprints(object):
+
+    """Geometry fingerprints, only reading files which have none recorded."""
+
+    def __init__(self):
+        self.files_read = 0
+        self._cache = {}
+
+    def __call__(self, meta):
+        geo = meta.get('geometry') or {}
+        if not geo.get('path'):
+            return
+        if geo.get('fingerprint'):
+            return geo['fingerprint']
+        path = os.path.normpath(os.path.join(os.path.dirname(meta['_filepath']), geo['path']))
+        fingerprint = self._cache.get(path)
+        if fingerprint is None:
+            try:
+                fingerprint = file_fingerprint(path)
+            except (IOError, OSError):
+                # Missing geometry never matches anything.
+                fingerprint = 'missing:' + path
+            self._cache[path] = fingerprint
+            self.files_read += 1
+        return fingerprint
+
+
+def diff(old, new, tolerance=DEFAULT_TOLERANCE, use_index=True):
+    """Compare two :class:`Scene` objects (or directories) on disk.
+
+    :param tolerance: The largest absolute difference in any element of an
+        object's local matrix which is not a change.
+    :param use_index: Read each scene's index, when it is fresh.
+    :returns: A :class:`SceneDiff`.
+
+    """
+
+    from .scene import Scene
+    if not isinstance(old, Scene):
+        old = Scene(old)
+    if not isinstance(new, Scene):
+        new = Scene(new)
+
+    old_metas = _metas(old, use_index)
+    new_metas = _metas(new, use_index)
+
+    result = SceneDiff()
+    removed = [path for path in old_metas if path not in new_metas]
+    added = [path for path in new_metas if path not in old_metas]
+    matched = _match(old_metas, new_metas, removed, added)
+
+    pairs = result.paths
+    for path in old_metas:
+        if path in new_metas:
+            pairs[path] = path
+        elif path in matched:
+            new_path, kind = matched[path]
+            pairs[path] = new_path
+            if kind == 'moved':
+                result.moved.append((path, new_path))
+            elif kind == 'renamed':
+                result.renamed.append((path, new_path))
+    paired = set(pairs.values())
+    result.removed = [path for path in removed if path not in matched]
+    result.added = [path for path in added if path not in paired]
+
+    # Compare every pair's local matrices at once.
+    old_paths = list(pairs)
+    new_paths = list(pairs.values())
+    if pairs:
+        a = np.array([_local(old_metas[path]) for path in old_paths], dtype=np.float64)
+        b = np.array([_local(new_metas[path]) for path in new_paths], dtype=np.float64)
+        moved = np.abs(a - b).max(axis=1) > tolerance
+        result.transforms = [new_paths[i] for i in np.flatnonzero(moved)]
+
+    fingerprint = _Fingerprints()
+    for old_path, new_path in zip(old_paths, new_paths):
+        old_meta = old_metas[old_path]
+        new_meta = new_metas[new_path]
+        if fingerprint(old_meta) != fingerprint(new_meta):
+            result.geometry.append(new_path)
+        if _other(old_meta) != _other(new_meta):
+            result.meta.append(new_path)
+
+    result.stats = {
+        'old_objects': len(old_metas),
+        'new_objects': len(new_metas),
+        'matched': len(pairs),
+        'geometry_files_read': fingerprint.files_read,
+    }
+    return result
@@ -0,0 +1,54 @@
+import sys
+from fnmatch import fnmatchcase
+
+if sys.version_info[0] > 2:
+    string_types = (str, )
+else:
+    string_types = (basestring, )
+
+
+class PathFilter(object):
+
+    """Selects subtrees of a scene by path prefixes or glob patterns.
+
+    Patterns are matched component by component (so ``*`` never crosses a
+    ``/``), and a pattern selects everything below whatever it matches; e.g.
+    ``set/props/table`` and ``set/*/table*`` both select the table and all of
+    its children.
+
+    """
+
+    def __init__(self, patterns):
+        if isinstance(patterns, string_types):
+            patterns = [patterns]
+        self.patterns = [tuple(p.strip('/').split('/')) for p in patterns]
+
+    def __repr__(self):
+        return 'PathFilter(%r)' % ['/'.join(p) for p in self.patterns]
+
+    def _prefix_matches(self, parts, pattern):
+        for part, pat in zip(parts, pattern):
+            if not fnmatchcase(part, pat):
+                return False
+        return True
+
+    def selects(self, path):
+        """Is the object at this path (or one of its ancestors) selected?"""
+        parts = path.strip('/').split('/')
+        for pattern in self.patterns:
+            if len(parts) >= len(pattern) and self._prefix_matches(parts, pattern):
+                return True
+        return False
+
+    def wants(self, path):
+        """Should the object at this path be loaded?
+
+        This is true if it is selected, or is an ancestor of something which
+        could be selected (so that transforms still compose correctly).
+
+        """
+        parts = path.strip('/').split('/')
+        for pattern in self.patterns:
+            if self._prefix_matches(parts, pattern):
+                return True
+        return False
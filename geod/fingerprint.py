@@ -0,0 +1,32 @@
+"""Content fingerprints for metas and geometry."""
+
+import hashlib
+import json
+
+
+def meta_fingerprint(meta):
+    encoded = json.dumps(meta, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(encoded.encode('utf8')).hexdigest()
+
+
+def mesh_fingerprint(mesh, format):
+    hash_ = hashlib.sha1(format.encode('ascii'))
+    # Quantized arrays are only the same mesh with the same offsets and scales.
+    quantization = getattr(mesh, 'quantization', None)
+    if quantization:
+        hash_.update(json.dumps(quantization, sort_keys=True).encode('utf8'))
+    for name, array in mesh.arrays():
+        hash_.update(('%s:%s:%r;' % (name, array.dtype.str, array.shape)).encode('ascii'))
+        hash_.update(array.tobytes() if not array.flags.c_contiguous else array.data)
+    return hash_.hexdigest()
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    hash_ = hashlib.sha1()
+    with open(path, 'rb') as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            hash_.update(chunk)
+    return hash_.hexdigest()
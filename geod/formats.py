@@ -0,0 +1,60 @@
+"""Registry of on-disk geometry formats.
+
+Format modules are only imported when they are used, and must provide
+``dump(mesh, fh)`` (to a binary file), ``load(path)``, and
+``load_buffer(buffer, offset, size)`` for files within a larger buffer.
+
+"""
+
+import importlib
+import os
+
+
+# Known on-disk geometry formats, by name.
+format_modules = {
+    'geod': 'geod.binary',
+    'obj': 'geod.obj',
+}
+format_extensions = {
+    'geod': '.mesh',
+    'obj': '.obj',
+}
+
+
+def format_from_path(path):
+    ext = os.path.splitext(path)[1].lower()
+    for name, format_ext in format_extensions.items():
+        if ext == format_ext:
+            return name
+    raise ValueError('unknown geometry format for %r' % path)
+
+
+def get_format_module(format):
+    try:
+        name = format_modules[format]
+    except KeyError:
+        raise ValueError('unsupported geometry format %r' % format)
+    return importlib.import_module(name)
+
+
+def read(path, format=None):
+    format = format or format_from_path(path)
+    return get_format_module(format).load(path)
+
+
+def read_buffer(buffer, offset=0, size=None, format='obj'):
+    """Read a mesh from ``size`` bytes at ``offset`` in a buffer (e.g. an ``mmap``)."""
+    return get_format_module(format).load_buffer(buffer, offset, size)
+
+
+def write(mesh, base, format):
+    """Write the mesh to ``base`` plus the format's extension.
+
+    Returns the final path.
+
+    """
+    module = get_format_module(format)
+    path = base + format_extensions[format]
+    with open(path, 'wb') as fh:
+        module.dump(mesh, fh)
+    return path
@@ -0,0 +1,71 @@
+import numpy as np
+
+from ..mesh import Mesh
+from .obj import indexed_values, topology
+
+
+def extract(geo):
+
+    positions = np.array(geo.pointFloatAttribValues('P'), dtype=np.float32).reshape(-1, 3)
+    counts, points, linear = topology(geo)
+    mesh = Mesh(positions, counts.astype(np.int32), points.astype(np.int32))
+
+    # Houdini winds its faces the other way around.
+    order = _reverse_order(mesh.face_counts)
+    mesh.indices = mesh.indices[order]
+
+    # Each distinct value is stored once, and indexed just as the OBJ
+    # writer would; point attributes by point number, like the positions.
+    for name, values_name, indices_name in (
+        ('N', 'normals', 'normal_indices'),
+        ('uv', 'uvs', 'uv_indices'),
+    ):
+        values, indices = indexed_values(geo, geo.findVertexAttrib(name), geo.findPointAttrib(name), points, linear)
+        if values is not None:
+            setattr(mesh, values_name, values.astype(np.float32))
+            setattr(mesh, indices_name, indices[order].astype(np.int32))
+
+    return mesh
+
+
+def _per_vertex(values, indices):
+    return values if indices is None else values[indices]
+
+
+def _reverse_order(face_counts):
+    # Reverses each face's run within a per face-vertex array.
+    ends = np.cumsum(face_counts)
+    starts = ends - face_counts
+    return np.repeat(ends + starts - 1, face_counts) - np.arange(ends[-1] if len(ends) else 0)
+
+
+def build(mesh, geo):
+    """Fill the given (empty) ``hou.Geometry`` with the mesh."""
+
+    import hou
+
+    points = geo.createPoints(mesh.positions.tolist())
+
+    order = _reverse_order(mesh.face_counts)
+    indices = mesh.indices[order]
+    ends = np.cumsum(mesh.face_counts).tolist()
+    starts = [0] + ends[:-1]
+    flat = indices.tolist()
+    geo.createPolygons([flat[a:b] for a, b in zip(starts, ends)])
+
+    # We always give back vertex attributes, since that is what the OBJ
+    # path does as well.
+    if mesh.normals is not None:
+        normals = _per_vertex(mesh.normals, mesh.normal_indices)[order]
+        geo.addAttrib(hou.attribType.Vertex, 'N', (0.0, 0.0, 0.0))
+        geo.setVertexFloatAttribValues('N', normals.astype(np.float64).ravel().tolist())
+
+    if mesh.uvs is not None:
+        uvs = _per_vertex(mesh.uvs, mesh.uv_indices)[order]
+        if uvs.shape[1] == 2:
+            uvs = np.hstack([uvs, np.zeros((len(uvs), 1), dtype=uvs.dtype)])
+        geo.addAttrib(hou.attribType.Vertex, 'uv', (0.0, 0.0, 0.0))
+        geo.setVertexFloatAttribValues('uv', uvs.astype(np.float64).ravel().tolist())
+
+    return points
+
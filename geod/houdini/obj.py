@@ -1,5 +1,168 @@
+import numpy as np
 
-def dump(geo, fh):
+from ..obj import format_rows
+
+
+# Roughly how many vertices to format before each write.
+CHUNK_SIZE = 65536
+
+
+def topology(geo):
+    """Get ``(counts, point_numbers, linear_numbers)`` for every prim vertex.
+
+    Vertices are in prim order, and the linear numbers index into the arrays
+    returned by ``vertexFloatAttribValues``.
+
+    """
+
+    # Bulk topology access is not universal in hou, but when it is there
+    # (including on geod.mock.StubGeometry) it saves a pass over every vertex.
+    try:
+        counts = geo.primVertexCounts()
+        points = geo.primVertexPointNumbers()
+    except AttributeError:
+        pass
+    else:
+        counts = np.asarray(counts, dtype=np.int64)
+        return counts, np.asarray(points, dtype=np.int64), np.arange(counts.sum())
+
+    counts = []
+    points = []
+    linear = []
+    for prim in geo.prims():
+        verts = prim.vertices()
+        counts.append(len(verts))
+        points.extend([v.point().number() for v in verts])
+        linear.extend([v.linearNumber() for v in verts])
+    return (
+        np.array(counts, dtype=np.int64),
+        np.array(points, dtype=np.int64),
+        np.array(linear, dtype=np.int64),
+    )
+
+
+def vertex_values(geo, vattr, pattr, points, linear):
+    """Get an attribute per prim vertex, preferring the vertex attribute."""
+    if vattr:
+        values = np.array(geo.vertexFloatAttribValues(vattr.name()), dtype=np.float64)
+        return values.reshape(-1, vattr.size())[linear]
+    if pattr:
+        values = np.array(geo.pointFloatAttribValues(pattr.name()), dtype=np.float64)
+        return values.reshape(-1, pattr.size())[points]
+
+
+def indexed_values(geo, vattr, pattr, points, linear):
+    """Get ``(values, indices)`` of an attribute, with an index per prim vertex.
+
+    Point attributes are indexed by point number, as positions are. Vertex
+    attributes are indexed into their distinct values (as they will be
+    written), in the order they first appear.
+
+    """
+    if vattr:
+        return unique_rows(vertex_values(geo, vattr, None, points, linear))
+    if pattr:
+        values = np.array(geo.pointFloatAttribValues(pattr.name()), dtype=np.float64)
+        return values.reshape(-1, pattr.size()), points
+    return None, None
+
+
+def unique_rows(values, decimals=6):
+    """Get ``(unique, inverse)`` of the rows which differ once rounded to ``decimals``."""
+
+    if not len(values):
+        return values, np.empty(0, dtype=np.int64)
+
+    # Compare the rows as opaque bytes; adding zero turns -0.0 into 0.0.
+    rounded = np.ascontiguousarray(np.round(values, decimals) + 0.0)
+    rows = rounded.view(np.dtype((np.void, rounded.dtype.itemsize * rounded.shape[1]))).ravel()
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+
+    # Renumber them by first appearance, so the output reads in vertex order.
+    order = np.argsort(first, kind='mergesort')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return values[first[order]], rank[inverse.ravel()]
+
+
+def dump(geo, fh, chunk_size=CHUNK_SIZE):
+
+    N_vattr = geo.findVertexAttrib('N')
+    N_pattr = geo.findPointAttrib('N')
+
+    uv_vattr = geo.findVertexAttrib('uv')
+    uv_pattr = geo.findPointAttrib('uv')
+
+    positions = np.array(geo.pointFloatAttribValues('P'), dtype=np.float64).reshape(-1, 3)
+    for text in format_rows('v %f %f %f\n', positions, chunk_size):
+        fh.write(text)
+
+    counts, points, linear = topology(geo)
+
+    # Each normal and UV is written once, and faces refer to it by index;
+    # point attributes by point number, and vertex attributes by their
+    # distinct values.
+    N, N_indices = indexed_values(geo, N_vattr, N_pattr, points, linear)
+    uv, uv_indices = indexed_values(geo, uv_vattr, uv_pattr, points, linear)
+
+    columns = [points]
+    if uv is not None:
+        for text in format_rows('vt' + ' %f' * uv.shape[1] + '\n', uv, chunk_size):
+            fh.write(text)
+        columns.append(uv_indices)
+    if N is not None:
+        for text in format_rows('vn %f %f %f\n', N, chunk_size):
+            fh.write(text)
+        columns.append(N_indices)
+
+    # We can't emit "%d//", or we will crash Maya. Silly.
+    if uv is not None:
+        token = '%d/%d/%d' if N is not None else '%d/%d'
+    else:
+        token = '%d//%d' if N is not None else '%d'
+
+    tokens = np.column_stack(columns).astype(np.int64) + 1
+    width = tokens.shape[1]
+
+    templates = {}
+    def template(count):
+        try:
+            return templates[count]
+        except KeyError:
+            value = templates[count] = 'f ' + ' '.join([token] * count) + '\n'
+            return value
+
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    prim = 0
+    while prim < len(counts):
+
+        # Take whole prims until we have enough vertices.
+        stop = int(np.searchsorted(ends, starts[prim] + chunk_size, side='right'))
+        stop = max(stop, prim + 1)
+
+        chunk_counts = counts[prim:stop]
+        first = starts[prim]
+        last = ends[stop - 1]
+
+        # Each prim's vertices go in reverse, since Houdini winds the other
+        # way around.
+        prim_counts = np.repeat(chunk_counts, chunk_counts)
+        prim_starts = np.repeat(starts[prim:stop] - first, chunk_counts)
+        local = np.arange(last - first) - prim_starts
+
+        out = np.empty((last - first, width), dtype=np.int64)
+        out[prim_starts + prim_counts - 1 - local] = tokens[first:last]
+
+        fh.write(''.join([template(c) for c in chunk_counts.tolist()]) % tuple(out.ravel().tolist()))
+
+        prim = stop
+
+
+
+def dump_per_element(geo, fh):
+    """The original (and much slower) writer, kept as a reference."""
 
     N_vattr = geo.findVertexAttrib('N')
     N_pattr = geo.findPointAttrib('N')
@@ -13,14 +176,12 @@ def dump(geo, fh):
     N_count = 0
     uv_count = 0
 
-    faces = []
-
     for prim in geo.prims():
 
         face_parts = []
 
         for vert in prim.vertices():
-            
+
             if N_vattr:
                 N = vert.floatListAttribValue(N_vattr)
             elif N_pattr:
@@ -53,5 +214,4 @@ def dump(geo, fh):
                 vert_parts.pop(-1)
             face_parts.append('/'.join(vert_parts))
 
-
-        fh.write('f %s\n' % ' '.join(reversed(face_parts)))
\ No newline at end of file
+        fh.write('f %s\n' % ' '.join(reversed(face_parts)))
@@ -3,7 +3,10 @@ import re
 
 import hou
 
+from ..formats import read as read_mesh
 from ..object import BaseObject
+from ..transforms import as_lists, local_from_world
+from .mesh import build as build_mesh, extract as extract_mesh
 from .obj import dump as dump_obj
 
 
@@ -93,8 +96,55 @@ class HoudiniObject(BaseObject):
             'local': local.asTuple(),
         }
 
+    @classmethod
+    def get_transforms_batch(cls, objects):
+
+        # As above, but with every parent inverted in one go.
+        nodes = [obj.node for obj in objects]
+        index = dict((node.path(), i) for i, node in enumerate(nodes))
+        world = [node.worldTransform().asTuple() for node in nodes]
+        parents = []
+        for node in nodes:
+            parent = node.parent()
+            if not isinstance(parent, hou.ObjNode):
+                parents.append(-1)
+                continue
+            i = index.get(parent.path())
+            if i is None:
+                i = index[parent.path()] = len(world)
+                world.append(parent.worldTransform().asTuple())
+            parents.append(i)
+        parents.extend([-1] * (len(world) - len(nodes)))
+
+        local = as_lists(local_from_world(world, parents)[:len(nodes)])
+        return [{'world': w, 'local': l} for w, l in zip(world, local)]
+
+    @classmethod
+    def get_frame(cls):
+        return hou.frame()
+
+    @classmethod
+    def set_frame(cls, frame):
+        hou.setFrame(frame)
+
+    def get_visibility(self):
+        return self.node.isDisplayFlagSet()
+
     def set_transforms(self, transforms):
-        if 'local' in transforms:
+        components = transforms.get('_components')
+        if components:
+            # Already decomposed (in bulk) to match our srt/xyz parms.
+            self.node.setPreTransform(hou.hmath.identityTransform())
+            self.node.parm('xOrd').set('srt')
+            self.node.parm('rOrd').set('xyz')
+            for name, parm in (
+                ('translate', 't'),
+                ('rotate', 'r'),
+                ('scale', 's'),
+                ('shear', 'shear'),
+            ):
+                self.node.parmTuple(parm).set(components[name])
+        elif 'local' in transforms:
             m = hou.Matrix4(transforms['local'])
             self.node.setParmTransform(m)
             parm = self.node.parmTransform()
@@ -106,17 +156,67 @@ class HoudiniObject(BaseObject):
         else:
             raise ValueError('no acceptable matrix in transforms')
 
-    def export_geo(self, path):
+    def extract_geo(self):
         if self.node.type().name() == 'geo':
-            geo = self.node.displayNode().geometry()
-            path = path + '.obj'
-            with open(path, 'w') as fh:
-                dump_obj(geo, fh)
-            return {'path': path}
+            return extract_mesh(self.node.displayNode().geometry())
+
+    def export_geo(self, path, format='obj'):
+        if self.node.type().name() != 'geo':
+            return
+        if format != 'obj':
+            return super(HoudiniObject, self).export_geo(path, format)
+        geo = self.node.displayNode().geometry()
+        path = path + '.obj'
+        with open(path, 'w') as fh:
+            dump_obj(geo, fh)
+        bbox = geo.boundingBox()
+        return {
+            'path': path,
+            'format': 'obj',
+            'bounds': [list(bbox.minvec()), list(bbox.maxvec())],
+            'points': geo.intrinsicValue('pointcount'),
+            'faces': geo.intrinsicValue('primitivecount'),
+        }
+
+    def import_placeholder(self, spec):
+        # The file SOP can show just the bounding box of an OBJ, without
+        # loading it.
+        file_ = self.node.node('file1')
+        if file_ and spec.get('path') and spec.get('format', 'obj') == 'obj':
+            file_.parm('file').set(spec['path'])
+            file_.parm('loadtype').set('infobbox')
 
     def import_geo(self, spec):
+
         file_ = self.node.node('file1')
-        file_.parm('file').set(spec['path'])
-        file_.setHardLocked(True)
+
+        # Someone else already loaded this geometry, so just pull it over.
+        source = spec.get('_source')
+        if source is not None:
+            if file_:
+                file_.destroy()
+            merge = self.node.createNode('object_merge', 'geod1')
+            merge.parm('objpath1').set(source.node.displayNode().path())
+            merge.setDisplayFlag(True)
+            merge.setRenderFlag(True)
+            return
+
+        mesh = spec.get('_mesh')
+        if mesh is None and spec.get('format', 'obj') == 'obj':
+            file_.parm('file').set(spec['path'])
+            file_.parm('loadtype').set('full')
+            file_.setHardLocked(True)
+            return
+
+        # Nothing in Houdini can read our own format (and we may have the
+        # mesh already), so we build the geometry ourselves and stash it.
+        geo = hou.Geometry()
+        build_mesh(read_mesh(spec['path'], spec['format']) if mesh is None else mesh, geo)
+        if file_:
+            file_.destroy()
+        stash = self.node.createNode('stash', 'geod1')
+        stash.parm('stash').set(geo)
+        stash.setDisplayFlag(True)
+        stash.setRenderFlag(True)
 
 
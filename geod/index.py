@@ -0,0 +1,159 @@
+"""A single-file index of every object in a scene.
+
+The index is written by :meth:`Scene.iter_dump` once the whole scene has been
+written, and holds the meta (i.e. name, transform, geometry reference, etc.)
+of every object, so that loading does not need to walk the tree or open each
+sidecar.
+
+The index is written with the same meta codec as the sidecars (see
+:mod:`geod.metacodec`), and its extension says which one that is.
+
+The index records the size and mtime of every sidecar, and the mtime of
+every directory holding them, so that a change anywhere in the scene (an
+edited sidecar, or an object added or removed below the root) makes it
+stale. Checking that is one ``stat`` per object and directory, which is
+still far cheaper than opening every sidecar, but is a round trip each on a
+network filesystem. Readers which know the scene was only ever written by a
+dump (e.g. a published, read-only one) can skip it, and check only the root;
+an edit to an existing sidecar, or anything added or removed in a directory
+below the root, then goes unnoticed.
+
+"""
+
+import os
+
+from .metacodec import available as available_codecs, codecs, get_codec
+from .utils import replace
+
+
+NAME = '.index'
+VERSION = 1
+
+
+def index_path(root, codec=None):
+    return os.path.join(root, NAME + (codec or codecs['json']).extension)
+
+
+def find_codec(root):
+    """The codec of the existing index, or None if there isn't one."""
+    for name in available_codecs():
+        codec = get_codec(name)
+        if os.path.exists(index_path(root, codec)):
+            return codec
+
+
+def remove(root):
+    for codec in codecs.values():
+        try:
+            os.unlink(index_path(root, codec))
+        except OSError:
+            pass
+
+
+def write(root, entries, codec=None):
+    """Write the index for the given entries.
+
+    Each entry is a dict with the object's ``path`` (relative to the root,
+    without extension), ``parent`` path (or None), ``meta``, and the ``size``
+    of its sidecar. The sidecars must all be written already, as their
+    ``mtime`` is added to the entries.
+
+    """
+
+    codec = codec or codecs['json']
+    dirs = {}
+    for entry in entries:
+        entry['mtime'] = os.stat(os.path.join(root, entry['path'] + codec.extension)).st_mtime
+        parent = os.path.dirname(entry['path'])
+        if parent and parent not in dirs:
+            dirs[parent] = os.stat(os.path.join(root, parent)).st_mtime
+
+    path = index_path(root, codec)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as fh:
+        fh.write(codec.dumps({
+            'version': VERSION,
+            'dirs': dirs,
+            'objects': entries,
+        }))
+    replace(tmp_path, path)
+
+    # The rename touched the root; make sure we are at least as new so that
+    # we are not immediately considered stale.
+    os.utime(path, None)
+
+
+def fresh_stat(root, codec):
+    """The ``os.stat`` of the index, or None if it is missing or older than the root.
+
+    This only looks at the root; see :func:`read` for the full check.
+
+    """
+    try:
+        stat = os.stat(index_path(root, codec))
+        root_stat = os.stat(root)
+    except OSError:
+        return
+    if root_stat.st_mtime <= stat.st_mtime:
+        return stat
+
+
+def _decode(data, codec):
+    try:
+        index = codec.loads(data)
+    except ValueError:
+        return
+    if index.get('version') != VERSION:
+        return
+    return index
+
+
+def decode(data, codec):
+    """The entries of an encoded index, or None if it can't be used."""
+    index = _decode(data, codec)
+    return None if index is None else index['objects']
+
+
+def _unchanged(root, index, codec):
+    """Is every directory and sidecar as it was when the index was written?"""
+
+    # Indexes from before we recorded this can't be checked.
+    dirs = index.get('dirs')
+    if dirs is None:
+        return False
+
+    try:
+        for rel_dir, mtime in dirs.items():
+            if os.stat(os.path.join(root, rel_dir)).st_mtime != mtime:
+                return False
+        for entry in index['objects']:
+            stat = os.stat(os.path.join(root, entry['path'] + codec.extension))
+            if stat.st_size != entry['size'] or stat.st_mtime != entry.get('mtime'):
+                return False
+    except OSError:
+        return False
+    return True
+
+
+def read(root, verify=True, codec=None):
+    """Read the index, or return None if it is missing or stale.
+
+    An index is stale if the root directory has been modified since it was
+    written or, with ``verify``, if any sidecar or directory below it has
+    (which is one ``stat`` per object and directory, but still no walk).
+    Without ``verify``, only the root is checked.
+
+    """
+
+    codec = codec or find_codec(root)
+    if codec is None or fresh_stat(root, codec) is None:
+        return
+    path = index_path(root, codec)
+
+    with open(path, 'rb') as fh:
+        index = _decode(fh.read(), codec)
+    if index is None:
+        return
+    if verify and not _unchanged(root, index, codec):
+        return
+    return index['objects']
@@ -0,0 +1,93 @@
+"""A journal of the objects which an unfinished dump has written.
+
+:meth:`Scene.iter_dump` keeps the journal while it runs, and removes it just
+before writing the index. While it is there, the scene is incomplete (and
+:meth:`Scene.iter_load` refuses to read it); ``iter_dump(resume=True)``
+picks up where the journal leaves off.
+
+The journal is one line of JSON per record. The first is a header, with the
+options of the dump (which a resumed dump must match) and the entries of the
+index it replaces (for cleaning up afterwards). Every following line is the
+index entry of an object whose files are all in place. A final line cut
+short by a crash is ignored, and trimmed off when resuming.
+
+"""
+
+import os
+
+from .metacodec import get_codec
+
+
+NAME = '.journal'
+VERSION = 1
+
+_codec = get_codec('json')
+
+
+def journal_path(root):
+    return os.path.join(root, NAME)
+
+
+def exists(root):
+    return os.path.exists(journal_path(root))
+
+
+def remove(root):
+    try:
+        os.unlink(journal_path(root))
+    except OSError:
+        pass
+
+
+def read(root):
+    """Read the journal, or return None if there isn't a usable one.
+
+    Returns ``(header, entries, size)``, where ``size`` is how many bytes of
+    the file are whole records.
+
+    """
+
+    try:
+        with open(journal_path(root), 'rb') as fh:
+            data = fh.read()
+    except (IOError, OSError):
+        return
+
+    records = []
+    size = 0
+    for line in data.splitlines(True):
+        if not line.endswith(b'\n'):
+            break
+        try:
+            records.append(_codec.loads(line))
+        except ValueError:
+            break
+        size += len(line)
+
+    if not records or records[0].get('version') != VERSION:
+        return
+    return records[0], records[1:], size
+
+
+class Writer(object):
+
+    """Appends to a journal, starting one with ``header`` or continuing one of ``size`` bytes."""
+
+    def __init__(self, root, header=None, size=None):
+        path = journal_path(root)
+        if header is not None:
+            self._fh = open(path, 'wb')
+            self.add(dict(header, version=VERSION))
+        else:
+            self._fh = open(path, 'r+b')
+            self._fh.truncate(size)
+            self._fh.seek(size)
+
+    def add(self, record):
+        # Flushed but not synced; a crash of the DCC loses nothing, and a
+        # crash of the machine loses at most a few objects.
+        self._fh.write(_codec.dumps(record) + b'\n')
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
@@ -11,6 +11,23 @@ def dump():
     if not path:
         return
 
+    scene = Scene(path, object_class=Object, stats=True)
+
+    # A cancelled (or crashed) export can pick up where it left off.
+    resume = False
+    if scene.resumable:
+        answer = mc.confirmDialog(
+            title='Geo.D Export',
+            message='An earlier export to this directory did not finish.',
+            button=['Resume', 'Start Over', 'Cancel'],
+            defaultButton='Resume',
+            cancelButton='Cancel',
+            dismissString='Cancel',
+        )
+        if answer == 'Cancel':
+            return
+        resume = answer == 'Resume'
+
     mc.progressWindow(
         title='Geo.D Export',
         status='Initializing...',
@@ -18,8 +35,6 @@ def dump():
         isInterruptable=True,
     )
 
-    scene = Scene(path, object_class=Object)
-
     selection = mc.ls(selection=True, long=True) or []
     transforms = mc.listRelatives(selection, allDescendents=True, fullPath=True, type='transform') or []
     transforms.extend(x for x in selection if mc.nodeType(x) == 'transform')
@@ -28,12 +43,17 @@ def dump():
         scene.add_object(Object(transform))
     scene.finalize_graph()
     
-    for i, total, path, obj in scene.iter_dump():
-        mc.progressWindow(e=True, progress=int(100 * i / total), status=obj.transform.split('|')[-1])
+    for i, total, path, obj in scene.iter_dump(resume=resume):
+        mc.progressWindow(e=True, progress=int(100 * i / total), status=_status(obj, scene.stats, 'bytes_written'))
         if mc.progressWindow(q=True, isCancelled=True):
             break
 
     mc.progressWindow(endProgress=True)
+    print(scene.stats.format())
+
+
+def _status(obj, stats, counter):
+    return '%s (%.1f MB)' % (obj.transform.split('|')[-1], stats.counters.get(counter, 0) / 1e6)
 
 
 def load():
@@ -50,11 +70,12 @@ def load():
         isInterruptable=True,
     )
 
-    scene = Scene(path, object_class=Object)
+    scene = Scene(path, object_class=Object, stats=True)
     
     for i, total, path, obj in scene.iter_load():
-        mc.progressWindow(e=True, progress=int(100 * i / total), status=obj.transform.split('|')[-1])
+        mc.progressWindow(e=True, progress=int(100 * i / total), status=_status(obj, scene.stats, 'bytes_read'))
         if mc.progressWindow(q=True, isCancelled=True):
             break
 
     mc.progressWindow(endProgress=True)
+    print(scene.stats.format())
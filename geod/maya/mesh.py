@@ -0,0 +1,110 @@
+"""Convert between Maya meshes and :class:`geod.mesh.Mesh`.
+
+Everything is read through ``MFnMesh``'s array accessors in object space,
+so nothing in the scene (transforms, selection, undo queue) is touched.
+The API is only imported when talking to a real shape, so :func:`from_fn`
+can be exercised against a stand-in (see :class:`geod.mock.StubMFnMesh`).
+
+"""
+
+import numpy as np
+
+from ..mesh import Mesh
+
+
+def _fn_mesh(shape):
+    import maya.api.OpenMaya as om
+    selection = om.MSelectionList()
+    selection.add(shape)
+    return om.MFnMesh(selection.getDagPath(0))
+
+
+def _array(values, dtype, stride=None, width=None):
+    """Copy an API array into NumPy.
+
+    Compound arrays (e.g. ``MPointArray``) have ``stride`` values per item,
+    of which the first ``width`` are kept.
+
+    """
+    if stride is None:
+        return np.fromiter(values, dtype=dtype, count=len(values))
+    array = np.array(values, dtype=dtype).reshape(-1, stride)
+    return np.ascontiguousarray(array[:, :width]) if width and width < stride else array
+
+
+def extract(shape):
+    return from_fn(_fn_mesh(shape))
+
+
+def from_fn(fn):
+    """Build a mesh from an ``MFnMesh`` (or anything like one).
+
+    Meshes only have UVs on every face or on none, so if some faces are not
+    mapped in the current UV set, the UVs are left off entirely.
+
+    """
+
+    face_counts, indices = fn.getVertices()
+    mesh = Mesh(
+        _array(fn.getPoints(), np.float32, 4, 3),
+        _array(face_counts, np.int32),
+        _array(indices, np.int32),
+    )
+
+    normals = fn.getNormals()
+    if len(normals):
+        mesh.normals = _array(normals, np.float32, 3)
+        mesh.normal_indices = _array(fn.getNormalIds()[1], np.int32)
+
+    uv_set = fn.currentUVSetName()
+    if uv_set and fn.numUVs(uv_set):
+        # Only mapped faces have UV ids, so there are fewer of them than
+        # face-vertices if any face is unmapped.
+        uv_ids = fn.getAssignedUVs(uv_set)[1]
+        if len(uv_ids) == mesh.vertex_count:
+            us, vs = fn.getUVs(uv_set)
+            mesh.uvs = np.column_stack([_array(us, np.float32), _array(vs, np.float32)])
+            mesh.uv_indices = _array(uv_ids, np.int32)
+
+    return mesh
+
+
+def _per_vertex(values, indices):
+    return values if indices is None else values[indices]
+
+
+def build(mesh, transform):
+    """Create a mesh shape under the given transform; returns its name."""
+
+    import maya.api.OpenMaya as om
+
+    parent = om.MSelectionList()
+    parent.add(transform)
+    parent = parent.getDependNode(0)
+
+    fn = om.MFnMesh()
+    fn.create(
+        [om.MPoint(*p) for p in mesh.positions.tolist()],
+        mesh.face_counts.tolist(),
+        mesh.indices.tolist(),
+        parent=parent,
+    )
+
+    if mesh.uvs is not None:
+        uvs = mesh.uvs.astype(np.float64)
+        uv_indices = mesh.uv_indices
+        if uv_indices is None:
+            uv_indices = np.arange(len(uvs), dtype=np.int32)
+        fn.setUVs(uvs[:, 0].tolist(), uvs[:, 1].tolist())
+        fn.assignUVs(mesh.face_counts.tolist(), uv_indices.tolist())
+
+    if mesh.normals is not None:
+        normals = _per_vertex(mesh.normals, mesh.normal_indices)
+        faces = np.repeat(np.arange(len(mesh.face_counts)), mesh.face_counts)
+        fn.setFaceVertexNormals(
+            [om.MVector(*n) for n in normals.tolist()],
+            faces.tolist(),
+            mesh.indices.tolist(),
+        )
+
+    return fn.fullPathName()
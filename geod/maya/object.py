@@ -3,9 +3,9 @@ import re
 
 import maya.cmds as mc
 
-import mayatools.context
-
+from ..formats import read as read_mesh
 from ..object import BaseObject
+from .mesh import build as build_mesh, extract as extract_mesh
 
 
 class MayaObject(BaseObject):
@@ -55,6 +55,17 @@ class MayaObject(BaseObject):
             'world': mc.xform(self.transform, q=True, objectSpace=False, matrix=True),
         }
 
+    @classmethod
+    def get_frame(cls):
+        return mc.currentTime(q=True)
+
+    @classmethod
+    def set_frame(cls, frame):
+        mc.currentTime(frame, update=True)
+
+    def get_visibility(self):
+        return bool(mc.getAttr(self.transform + '.visibility'))
+
     def set_transforms(self, transforms):
         if 'local' in transforms:
             mc.xform(self.transform, objectSpace=True, matrix=transforms['local'])
@@ -63,48 +74,35 @@ class MayaObject(BaseObject):
         else:
             raise ValueError('no acceptable matrix in transforms')
 
-    def export_geo(self, path):
-
-        if not self.shape:
-            return
-
-        path = path + '.obj'
-
-        # We need to do the export in world space. Unfortunately, Maya won't
-        # just do that for us.
-        xform = mc.xform(self.transform, q=True, worldSpace=True, matrix=True)
-        mc.xform(self.transform, worldSpace=True, matrix=[
-            1, 0, 0, 0,
-            0, 1, 0, 0,
-            0, 0, 1, 0,
-            0, 0, 0, 1,
-        ])
-        try:
-            with mayatools.context.selection([self.shape], replace=True):
-                mc.file(path,
-                    force=True,
-                    exportSelected=True,
-                    type="OBJexport",
-                    options='materials=0',
-                )
-        finally:
-            mc.xform(self.transform, worldSpace=True, matrix=xform)
-
-        return {'path': path}
+    def extract_geo(self):
+        if self.shape and mc.nodeType(self.shape) == 'mesh':
+            return extract_mesh(self.shape)
 
     def import_geo(self, spec):
 
-        old_objs = set(mc.ls(assemblies=True))
-        old_sets = set(mc.listSets(allSets=True))
+        # Someone else already loaded this geometry, so instance their shape.
+        source = spec.get('_source')
+        if source is not None and source.shape:
+            self.shape = mc.parent(source.shape, self.transform, shape=True, addObject=True)[0]
+            return
 
-        # mo=0 signals to import into a single object.
-        x = mc.file(spec['path'], i=True, type="OBJ", options='mo=0')
+        mesh = spec.get('_mesh')
+        if mesh is not None or spec.get('format', 'obj') != 'obj':
+            if mesh is None:
+                mesh = read_mesh(spec['path'], spec['format'])
+            shape = build_mesh(mesh, self.transform)
+            self.shape = mc.rename(shape, self.name + 'Shape')
+            return
 
-        new_objs = list(set(mc.ls(assemblies=True)).difference(old_objs))
+        # mo=0 signals to import into a single object. Only looking at what
+        # the import created keeps this from slowing down as the scene grows.
+        new_nodes = mc.file(spec['path'], i=True, type="OBJ", options='mo=0', returnNewNodes=True) or []
+        new_objs = [x for x in mc.ls(new_nodes, type='transform', long=True) if x.count('|') == 1]
 
         # Lots of extra sets get created that we don't want.
-        new_sets = list(set(mc.listSets(allSets=True)).difference(old_sets))
-        mc.delete(new_sets)
+        new_sets = mc.ls(new_nodes, type='objectSet')
+        if new_sets:
+            mc.delete(new_sets)
 
         if not new_objs:
             print 'No geometry in', spec['path']
@@ -112,8 +110,8 @@ class MayaObject(BaseObject):
         assert len(new_objs) == 1
 
         shape = mc.listRelatives(new_objs, fullPath=True, shapes=True)[0]
-        shape = mc.parent(shape, self.transform, shape=True, relative=True)
-        self.shape = mc.rename(self.shape, self.name + 'Shape')
+        shape = mc.parent(shape, self.transform, shape=True, relative=True)[0]
+        self.shape = mc.rename(shape, self.name + 'Shape')
         mc.delete(new_objs)
 
 
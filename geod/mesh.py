@@ -0,0 +1,93 @@
+import numpy as np
+
+
+class Mesh(object):
+
+    """Polygonal geometry held as flat, typed arrays.
+
+    Faces are described as in OBJ files: ``face_counts`` is the number of
+    vertices in each face, and ``indices`` is the point number of each of
+    those face-vertices. Normals and UVs have their own values, and optional
+    per face-vertex index arrays; when there are no indices the values are
+    assumed to be per face-vertex.
+
+    """
+
+    array_names = (
+        'positions',
+        'face_counts',
+        'indices',
+        'normals',
+        'normal_indices',
+        'uvs',
+        'uv_indices',
+    )
+
+    def __init__(self, positions, face_counts, indices,
+        normals=None, normal_indices=None,
+        uvs=None, uv_indices=None,
+    ):
+        self.positions = positions
+        self.face_counts = face_counts
+        self.indices = indices
+        self.normals = normals
+        self.normal_indices = normal_indices
+        self.uvs = uvs
+        self.uv_indices = uv_indices
+
+    def __repr__(self):
+        return '<geod.Mesh %d points, %d faces at 0x%x>' % (
+            self.point_count,
+            self.face_count,
+            id(self),
+        )
+
+    @classmethod
+    def from_lists(cls, positions, face_counts, indices,
+        normals=None, normal_indices=None,
+        uvs=None, uv_indices=None,
+    ):
+        """Build a mesh from (nested) Python sequences."""
+        def as_array(x, dtype, width=None):
+            if x is None:
+                return None
+            x = np.asarray(x, dtype=dtype)
+            return x.reshape(-1, width) if width else x.reshape(-1)
+        uvs = as_array(uvs, np.float32)
+        if uvs is not None and uvs.ndim == 1:
+            uvs = uvs.reshape(-1, 2)
+        return cls(
+            as_array(positions, np.float32, 3),
+            as_array(face_counts, np.int32),
+            as_array(indices, np.int32),
+            as_array(normals, np.float32, 3),
+            as_array(normal_indices, np.int32),
+            uvs,
+            as_array(uv_indices, np.int32),
+        )
+
+    @property
+    def point_count(self):
+        return len(self.positions)
+
+    @property
+    def face_count(self):
+        return len(self.face_counts)
+
+    @property
+    def vertex_count(self):
+        return len(self.indices)
+
+    def arrays(self):
+        """Iterate over ``(name, array)`` for all present arrays."""
+        for name in self.array_names:
+            value = getattr(self, name)
+            if value is not None:
+                yield name, value
+
+    def bounds(self):
+        """``(min, max)`` of the positions, or None if there are none."""
+        if not len(self.positions):
+            return None
+        positions = np.asarray(self.positions).reshape(-1, 3)
+        return positions.min(axis=0), positions.max(axis=0)
@@ -0,0 +1,112 @@
+"""Codecs for object metadata, i.e. sidecars and the index.
+
+Metas decode straight to native strings on both Python 2 and 3, so nothing
+needs a second pass over them, and files written by either can be read by
+the other.
+
+- ``json`` is the default, and uses the standard library;
+- ``msgpack`` is more compact and faster, and needs the ``msgpack`` package.
+
+"""
+
+import json
+import os
+import sys
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+PY2 = sys.version_info[0] < 3
+
+
+if PY2:
+
+    def _native(x):
+        if isinstance(x, unicode):
+            return x.encode('utf8')
+        if isinstance(x, list):
+            return [_native(y) for y in x]
+        return x
+
+    def _native_pairs(pairs):
+        # Nested dicts have already been through here, so only strings and
+        # lists need converting.
+        return dict((_native(k), _native(v)) for k, v in pairs)
+
+    _json_hooks = {'object_pairs_hook': _native_pairs}
+
+else:
+    _json_hooks = {}
+
+
+class JSONCodec(object):
+
+    name = 'json'
+    extension = '.json'
+
+    def dumps(self, meta, pretty=False):
+        if pretty:
+            encoded = json.dumps(meta, indent=4, sort_keys=True)
+        else:
+            encoded = json.dumps(meta, sort_keys=True, separators=(',', ':'))
+        return encoded if PY2 else encoded.encode('utf8')
+
+    def loads(self, data):
+        if not PY2 and isinstance(data, bytes):
+            data = data.decode('utf8')
+        return json.loads(data, **_json_hooks)
+
+
+class MsgpackCodec(object):
+
+    name = 'msgpack'
+    extension = '.msgpack'
+
+    def dumps(self, meta, pretty=False):
+        # Python 2 strings are written (and read) as raw, which Python 3
+        # reads as UTF-8 (and vice versa).
+        return msgpack.packb(meta, use_bin_type=not PY2)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=PY2)
+
+
+codecs = {
+    'json': JSONCodec(),
+    'msgpack': MsgpackCodec(),
+}
+
+
+def available():
+    """The names of the codecs which can be used here."""
+    return [name for name in sorted(codecs) if name != 'msgpack' or msgpack is not None]
+
+
+def get_codec(name):
+    try:
+        codec = codecs[name]
+    except KeyError:
+        raise ValueError('unknown meta codec %r' % name)
+    if name not in available():
+        raise ValueError('the %r meta codec needs the %r package' % (name, name))
+    return codec
+
+
+def codec_for_path(path):
+    """The codec for the given sidecar, or None if it isn't one."""
+    ext = os.path.splitext(path)[1]
+    for name, codec in codecs.items():
+        if ext == codec.extension:
+            return get_codec(name)
+
+
+def load(path):
+    """Read the given sidecar."""
+    codec = codec_for_path(path)
+    if codec is None:
+        raise ValueError('unknown meta codec for %r' % path)
+    with open(path, 'rb') as fh:
+        return codec.loads(fh.read())
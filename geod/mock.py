@@ -0,0 +1,373 @@
+"""Stand-ins for DCC objects, so geod can be exercised without a license."""
+
+import numpy as np
+
+from .formats import read as read_mesh
+from .mesh import Mesh
+from .object import BaseObject
+
+
+class MockObject(BaseObject):
+
+    """An object with no DCC behind it.
+
+    Children are given as an iterable of ``(name, children, mesh)``, where
+    ``mesh`` is None or the ``(size, seed)`` of a :func:`grid_mesh`. Objects
+    which are loaded attach themselves to their parent, as they would in a
+    DCC.
+
+    The timeline is shared by every object. Those whose names end in ``0``
+    move up by a unit per frame, and those whose names end in ``1`` are
+    hidden on odd frames; everything else is still.
+
+    """
+
+    frame = 0
+
+    @classmethod
+    def from_meta(cls, meta, parent):
+        obj = cls(meta['name'])
+        if parent is not None:
+            if parent.children is None:
+                parent.children = []
+            parent.children.append(obj)
+        return obj
+
+    def __init__(self, name, children=(), mesh=None):
+        super(MockObject, self).__init__(name)
+        self._child_specs = children
+        self.mesh_spec = mesh
+        self.mesh = None
+        self.placeholder = None
+        self.transforms = None
+
+    def _iter_child_args(self):
+        return self._child_specs
+
+    def get_basic_meta(self):
+        meta = super(MockObject, self).get_basic_meta()
+        meta['application'] = 'geod.mock'
+        return meta
+
+    def get_transforms(self):
+        offset = float(len(self.name))
+        height = float(self.frame) if self.name.endswith('0') else 0.0
+        return {
+            'local': [
+                1, 0, 0, 0,
+                0, 1, 0, 0,
+                0, 0, 1, 0,
+                offset, height, 0, 1,
+            ],
+        }
+
+    @classmethod
+    def get_frame(cls):
+        return MockObject.frame
+
+    @classmethod
+    def set_frame(cls, frame):
+        MockObject.frame = frame
+
+    def get_visibility(self):
+        return not (self.name.endswith('1') and int(self.frame) % 2)
+
+    def set_transforms(self, transforms):
+        self.transforms = transforms
+
+    def extract_geo(self):
+        if self.mesh_spec is not None:
+            return grid_mesh(*self.mesh_spec)
+
+    def import_placeholder(self, spec):
+        self.placeholder = spec.get('bounds')
+
+    def import_geo(self, spec):
+        source = spec.get('_source')
+        if source is not None:
+            self.mesh = source.mesh
+        elif spec.get('_mesh') is not None:
+            self.mesh = spec['_mesh']
+        elif spec.get('path'):
+            self.mesh = read_mesh(spec['path'], spec.get('format'))
+
+
+def grid_mesh(size, seed=0):
+    """A flat grid of ``size**2`` quads, with normals and UVs.
+
+    Grids with different seeds have different positions.
+
+    """
+
+    ys, xs = np.mgrid[0:size + 1, 0:size + 1]
+    uvs = np.column_stack([xs.ravel(), ys.ravel()]).astype(np.float32) / max(size, 1)
+    positions = np.column_stack([uvs, np.full(len(uvs), seed, dtype=np.float32)])
+
+    corners = (np.arange(size)[:, None] * (size + 1) + np.arange(size)).ravel()
+    indices = np.column_stack([corners, corners + 1, corners + size + 2, corners + size + 1]).ravel()
+
+    return Mesh(
+        positions,
+        np.full(size * size, 4, dtype=np.int32),
+        indices.astype(np.int32),
+        normals=np.array([[0, 0, 1]], dtype=np.float32),
+        normal_indices=np.zeros(len(indices), dtype=np.int32),
+        uvs=uvs,
+        uv_indices=indices.astype(np.int32),
+    )
+
+
+def _depth_for(count, breadth):
+    depth = 1
+    total = 1
+    while total < count:
+        total += breadth ** depth
+        depth += 1
+    return depth
+
+
+class Synthetic(object):
+
+    """Lazily generated children for a synthetic hierarchy.
+
+    Every object below the root has ``breadth`` children, down to ``depth``
+    levels in total. With a ``mesh_size``, every object has a mesh, and
+    ``duplication`` is the fraction of them which share the same one.
+
+    Objects are numbered as in a heap, so that the hierarchy never has to
+    be held in memory to be generated.
+
+    """
+
+    def __init__(self, breadth, depth, mesh_size=0, duplication=0.0, index=0):
+        self.breadth = breadth
+        self.depth = depth
+        self.mesh_size = mesh_size
+        self.duplication = duplication
+        self.index = index
+
+    @classmethod
+    def for_count(cls, count, breadth=10, **kwargs):
+        """Children for a root, so that there are at least ``count`` objects."""
+        return cls(breadth, _depth_for(count, breadth), **kwargs)
+
+    @property
+    def count(self):
+        """The number of objects, including the root."""
+        return sum(self.breadth ** i for i in range(self.depth))
+
+    def mesh_spec(self, index):
+        if not self.mesh_size:
+            return
+        # A cheap, deterministic hash into [0, 1).
+        if (index * 2654435761 % (1 << 32)) / float(1 << 32) < self.duplication:
+            return self.mesh_size, 0
+        return self.mesh_size, index
+
+    def __iter__(self):
+        if self.depth <= 1:
+            return
+        for i in range(self.breadth):
+            index = self.index * self.breadth + i + 1
+            children = Synthetic(self.breadth, self.depth - 1, self.mesh_size, self.duplication, index)
+            yield 'n%d' % i, children, self.mesh_spec(index)
+
+
+def chain(depth):
+    """Children for a single chain of the given depth."""
+    spec = ()
+    for i in range(depth - 1, 0, -1):
+        spec = (('n%d' % i, spec, None), )
+    return spec
+
+
+def tree(count, fanout):
+    """Children for a balanced tree of at least ``count`` objects."""
+
+    depth = _depth_for(count, fanout)
+
+    # Build bottom-up, so we never recurse. Siblings share their (immutable)
+    # spec, but still become distinct objects.
+    spec = ()
+    for _ in range(depth - 1):
+        spec = tuple(('n%d' % i, spec, None) for i in range(fanout))
+    return spec
+
+
+class StubAttrib(object):
+
+    def __init__(self, name, size):
+        self._name = name
+        self._size = size
+
+    def name(self):
+        return self._name
+
+    def size(self):
+        return self._size
+
+
+class StubPoint(object):
+
+    def __init__(self, geo, number):
+        self._geo = geo
+        self._number = number
+
+    def number(self):
+        return self._number
+
+    def position(self):
+        return tuple(self._geo._positions[self._number].tolist())
+
+    def floatListAttribValue(self, attrib):
+        return tuple(self._geo._point_attribs[attrib.name()][self._number].tolist())
+
+
+class StubVertex(object):
+
+    def __init__(self, geo, linear):
+        self._geo = geo
+        self._linear = linear
+
+    def linearNumber(self):
+        return self._linear
+
+    def point(self):
+        return StubPoint(self._geo, int(self._geo._indices[self._linear]))
+
+    def floatListAttribValue(self, attrib):
+        return tuple(self._geo._vertex_attribs[attrib.name()][self._linear].tolist())
+
+
+class StubPrim(object):
+
+    def __init__(self, geo, start, count):
+        self._geo = geo
+        self._start = start
+        self._count = count
+
+    def vertices(self):
+        return tuple(StubVertex(self._geo, i) for i in range(self._start, self._start + self._count))
+
+
+class StubGeometry(object):
+
+    """A read-only ``hou.Geometry`` look-alike.
+
+    Serves both the per-element API (``points()``, ``prims()``, etc.) and
+    the bulk attribute accessors. The bulk topology accessors are only
+    present with ``bulk_topology=True``, since not every build of hou has
+    them.
+
+    """
+
+    def __init__(self, positions, face_counts, indices,
+        point_attribs=None, vertex_attribs=None, bulk_topology=True,
+    ):
+        self._positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        self._face_counts = np.asarray(face_counts, dtype=np.int64)
+        self._indices = np.asarray(indices, dtype=np.int64)
+        self._point_attribs = dict((k, np.asarray(v, dtype=np.float32)) for k, v in (point_attribs or {}).items())
+        self._vertex_attribs = dict((k, np.asarray(v, dtype=np.float32)) for k, v in (vertex_attribs or {}).items())
+        if bulk_topology:
+            self.primVertexCounts = self._prim_vertex_counts
+            self.primVertexPointNumbers = self._prim_vertex_point_numbers
+
+    @classmethod
+    def grid(cls, rows, columns, point_normals=False, vertex_normals=True, vertex_uvs=True, **kwargs):
+        """A flat grid of quads, with the usual attributes."""
+
+        ys, xs = np.mgrid[0:rows + 1, 0:columns + 1]
+        positions = np.column_stack([xs.ravel(), ys.ravel(), np.zeros(xs.size)]) / float(max(rows, columns))
+
+        corners = (np.arange(rows)[:, None] * (columns + 1) + np.arange(columns)).ravel()
+        indices = np.column_stack([corners, corners + 1, corners + columns + 2, corners + columns + 1]).ravel()
+        face_counts = np.full(rows * columns, 4)
+
+        point_attribs = {}
+        vertex_attribs = {}
+        if point_normals:
+            point_attribs['N'] = np.tile([0.0, 0.0, 1.0], (len(positions), 1))
+        elif vertex_normals:
+            vertex_attribs['N'] = np.tile([0.0, 0.0, 1.0], (len(indices), 1))
+        if vertex_uvs:
+            vertex_attribs['uv'] = positions[indices]
+
+        return cls(positions, face_counts, indices, point_attribs, vertex_attribs, **kwargs)
+
+    def findPointAttrib(self, name):
+        if name == 'P':
+            return StubAttrib('P', 3)
+        if name in self._point_attribs:
+            return StubAttrib(name, self._point_attribs[name].shape[1])
+
+    def findVertexAttrib(self, name):
+        if name in self._vertex_attribs:
+            return StubAttrib(name, self._vertex_attribs[name].shape[1])
+
+    def points(self):
+        return tuple(StubPoint(self, i) for i in range(len(self._positions)))
+
+    def prims(self):
+        starts = np.cumsum(self._face_counts) - self._face_counts
+        return tuple(StubPrim(self, int(s), int(c)) for s, c in zip(starts, self._face_counts))
+
+    def pointFloatAttribValues(self, name):
+        values = self._positions if name == 'P' else self._point_attribs[name]
+        return tuple(values.ravel().tolist())
+
+    def vertexFloatAttribValues(self, name):
+        return tuple(self._vertex_attribs[name].ravel().tolist())
+
+    def _prim_vertex_counts(self):
+        return tuple(self._face_counts.tolist())
+
+    def _prim_vertex_point_numbers(self):
+        return tuple(self._indices.tolist())
+
+
+class StubMFnMesh(object):
+
+    """A read-only ``maya.api.OpenMaya.MFnMesh`` look-alike around a mesh.
+
+    Arrays come back as lists of Python values, as the API's do. Faces not
+    in ``mapped`` (a boolean per face) have no UVs assigned.
+
+    """
+
+    def __init__(self, mesh, uv_set='map1', mapped=None):
+        self._mesh = mesh
+        self._uv_set = uv_set
+        self._mapped = None if mapped is None else np.asarray(mapped, dtype=bool)
+
+    def getPoints(self, space=None):
+        points = np.column_stack([self._mesh.positions, np.ones(len(self._mesh.positions))])
+        return [tuple(p) for p in points.tolist()]
+
+    def getVertices(self):
+        return self._mesh.face_counts.tolist(), self._mesh.indices.tolist()
+
+    def getNormals(self, space=None):
+        if self._mesh.normals is None:
+            return []
+        return [tuple(n) for n in self._mesh.normals.tolist()]
+
+    def getNormalIds(self):
+        return self._mesh.face_counts.tolist(), self._mesh.normal_indices.tolist()
+
+    def currentUVSetName(self):
+        return self._uv_set if self._mesh.uvs is not None else ''
+
+    def numUVs(self, uv_set=None):
+        return len(self._mesh.uvs)
+
+    def getUVs(self, uv_set=None):
+        return self._mesh.uvs[:, 0].tolist(), self._mesh.uvs[:, 1].tolist()
+
+    def getAssignedUVs(self, uv_set=None):
+        counts = self._mesh.face_counts
+        ids = self._mesh.uv_indices
+        if self._mapped is not None:
+            ids = ids[np.repeat(self._mapped, counts)]
+            counts = np.where(self._mapped, counts, 0)
+        return counts.tolist(), ids.tolist()
@@ -0,0 +1,325 @@
+"""A standalone OBJ reader, which needs no DCC.
+
+The file is read in large blocks of whole lines, and each block is parsed
+with a handful of vectorized passes, so memory is bounded by the block size
+plus the arrays being produced.
+
+All of the face-vertex forms are handled (``p``, ``p/t``, ``p//n`` and
+``p/t/n``), as are negative (relative) indices. Anything other than
+vertices, normals, UVs and faces is ignored.
+
+"""
+
+import io
+
+import numpy as np
+
+from .mesh import Mesh
+
+
+# How many bytes to parse at a time.
+CHUNK_SIZE = 1 << 24
+
+
+class Chunk(object):
+
+    """The arrays parsed from one block of an OBJ file.
+
+    Face indices are absolute and zero-based, and are -1 when missing.
+
+    """
+
+    def __init__(self, positions, normals, uvs, face_counts, indices, uv_indices, normal_indices):
+        self.positions = positions
+        self.normals = normals
+        self.uvs = uvs
+        self.face_counts = face_counts
+        self.indices = indices
+        self.uv_indices = uv_indices
+        self.normal_indices = normal_indices
+
+
+NEWLINE, SPACE, SLASH = ord('\n'), ord(' '), ord('/')
+POSITION, NORMAL, UV, FACE = 1, 2, 3, 4
+
+# Lookup table for whitespace bytes.
+_whitespace = np.zeros(256, dtype=bool)
+_whitespace[[ord(c) for c in ' \t\r\n']] = True
+
+
+def _parse_floats(text, count, width):
+
+    if not count:
+        return np.empty((0, width), dtype=np.float32)
+
+    values = np.fromstring(text, dtype=np.float64, sep=' ')
+    if len(values) == width * count:
+        return values.astype(np.float32).reshape(-1, width)
+
+    # Some lines have extra (or missing) components, e.g. vertex colours.
+    out = np.zeros((count, width), dtype=np.float32)
+    for i, line in enumerate(text.splitlines()):
+        parts = line.split()[:width]
+        out[i, :len(parts)] = [float(x) for x in parts]
+    return out
+
+
+def _parse_refs(text):
+    # The slow path, for files which mix face-vertex forms.
+    tokens = text.split()
+    refs = np.zeros((len(tokens), 3), dtype=np.int64)
+    for i, token in enumerate(tokens):
+        for j, part in enumerate(token.split(b'/')[:3]):
+            if part:
+                refs[i, j] = int(part)
+    return refs
+
+
+def _parse_faces(chars):
+
+    # Count the tokens on each line.
+    space = _whitespace[chars]
+    starts = ~space
+    starts[1:] &= space[:-1]
+    totals = np.cumsum(starts)[chars == NEWLINE]
+    face_counts = np.diff(np.concatenate([[0], totals]))
+    total = int(totals[-1]) if len(totals) else 0
+
+    slash = chars == SLASH
+    slashes = int(slash.sum())
+    doubles = int((slash[:-1] & slash[1:]).sum())
+
+    if not slashes:
+        columns = (0, )
+    elif doubles == total and slashes == 2 * total:
+        columns = (0, 2)
+    elif not doubles and slashes == total:
+        columns = (0, 1)
+    elif not doubles and slashes == 2 * total:
+        columns = (0, 1, 2)
+    else:
+        columns = None
+
+    if columns:
+        values = np.where(slash, SPACE, chars).astype(np.uint8)
+        values = np.fromstring(values.tobytes(), dtype=np.int64, sep=' ')
+        if len(values) == total * len(columns):
+            refs = np.zeros((total, 3), dtype=np.int64)
+            refs[:, columns] = values.reshape(total, len(columns))
+            return face_counts, refs
+
+    return face_counts, _parse_refs(chars.tobytes())
+
+
+def _resolve(refs, column, kinds, face_lines, face_counts, kind, base):
+    """Turn one column of 1-based (or negative) references absolute and zero-based."""
+
+    raw = refs[:, column]
+    out = raw - 1
+    out[raw == 0] = -1
+
+    negative = raw < 0
+    if negative.any():
+        # Relative references count back from the element most recently
+        # defined before their face, so we need the running counts.
+        before = base + np.cumsum(kinds == kind)[face_lines]
+        before = np.repeat(before, face_counts)
+        out[negative] = before[negative] + raw[negative]
+
+    return out
+
+
+def _parse_block(data, bases):
+    """Parse a block of whole lines (ending with a newline)."""
+
+    # Classify lines by their first few characters (which we pad to avoid
+    # running off the end).
+    padded = np.frombuffer(data + b'\0\0', dtype=np.uint8)
+    chars = padded[:-2]
+    ends = np.flatnonzero(chars == NEWLINE)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    first = padded[starts]
+    second = padded[starts + 1]
+    sep2 = _whitespace[second]
+    sep3 = _whitespace[padded[starts + 2]]
+    kinds = np.zeros(len(starts), dtype=np.uint8)
+    kinds[(first == ord('v')) & sep2] = POSITION
+    kinds[(first == ord('v')) & (second == ord('n')) & sep3] = NORMAL
+    kinds[(first == ord('v')) & (second == ord('t')) & sep3] = UV
+    kinds[(first == ord('f')) & sep2] = FACE
+
+    # Blank out the keywords, so that each kind of line can be handed to
+    # the number parsers as one big string.
+    work = chars.copy()
+    work[starts[kinds != 0]] = SPACE
+    work[starts[(kinds == NORMAL) | (kinds == UV)] + 1] = SPACE
+    lengths = ends - starts + 1
+
+    def select(kind):
+        return work[np.repeat(kinds == kind, lengths)]
+
+    counts = np.bincount(kinds, minlength=5)
+    positions = _parse_floats(select(POSITION).tobytes(), counts[POSITION], 3)
+    normals = _parse_floats(select(NORMAL).tobytes(), counts[NORMAL], 3)
+
+    uv_width = 2
+    if counts[UV]:
+        line = data[starts[kinds == UV][0]:ends[kinds == UV][0]]
+        uv_width = min(3, max(2, len(line.split()) - 1))
+    uvs = _parse_floats(select(UV).tobytes(), counts[UV], uv_width)
+
+    if counts[FACE]:
+        face_counts, refs = _parse_faces(select(FACE))
+        face_lines = np.flatnonzero(kinds == FACE)
+        indices = _resolve(refs, 0, kinds, face_lines, face_counts, POSITION, bases[0])
+        uv_indices = _resolve(refs, 1, kinds, face_lines, face_counts, UV, bases[1])
+        normal_indices = _resolve(refs, 2, kinds, face_lines, face_counts, NORMAL, bases[2])
+    else:
+        face_counts = indices = uv_indices = normal_indices = np.empty(0, dtype=np.int64)
+
+    return Chunk(
+        positions, normals, uvs,
+        face_counts.astype(np.int32),
+        indices.astype(np.int32),
+        uv_indices.astype(np.int32),
+        normal_indices.astype(np.int32),
+    )
+
+
+def iter_chunks(fh, chunk_size=CHUNK_SIZE):
+    """Parse an open (binary) OBJ file, yielding a :class:`Chunk` per block."""
+
+    bases = [0, 0, 0]
+    remainder = b''
+    while True:
+
+        data = fh.read(chunk_size)
+        if not data:
+            data, remainder = remainder, b''
+            if data and not data.endswith(b'\n'):
+                data += b'\n'
+        else:
+            data = remainder + data
+            end = data.rfind(b'\n') + 1
+            if not end:
+                remainder = data
+                continue
+            data, remainder = data[:end], data[end:]
+
+        if not data:
+            return
+
+        chunk = _parse_block(data, bases)
+        bases[0] += len(chunk.positions)
+        bases[1] += len(chunk.uvs)
+        bases[2] += len(chunk.normals)
+        yield chunk
+
+
+def _concatenate(chunks, name, empty):
+    arrays = [getattr(c, name) for c in chunks]
+    return np.concatenate(arrays) if arrays else empty
+
+
+def _optional(values, indices):
+    # Only keep attributes which faces actually refer to.
+    if not len(indices) or (indices < 0).all():
+        return None, None
+    return values, indices
+
+
+def load(path, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb') as fh:
+        return load_file(fh, chunk_size)
+
+
+def load_buffer(buffer, offset=0, size=None, chunk_size=CHUNK_SIZE):
+    """Parse the OBJ file at ``offset`` in a buffer (e.g. in an archive)."""
+    end = len(buffer) if size is None else offset + size
+    return load_file(io.BytesIO(buffer[offset:end]), chunk_size)
+
+
+def load_file(fh, chunk_size=CHUNK_SIZE):
+
+    chunks = list(iter_chunks(fh, chunk_size))
+
+    uv_width = max([c.uvs.shape[1] for c in chunks if len(c.uvs)] or [2])
+    for c in chunks:
+        if c.uvs.shape[1] != uv_width:
+            c.uvs = np.hstack([c.uvs, np.zeros((len(c.uvs), uv_width - c.uvs.shape[1]), dtype=np.float32)])
+
+    int_empty = np.empty(0, dtype=np.int32)
+    indices = _concatenate(chunks, 'indices', int_empty)
+    normals, normal_indices = _optional(
+        _concatenate(chunks, 'normals', np.empty((0, 3), dtype=np.float32)),
+        _concatenate(chunks, 'normal_indices', int_empty),
+    )
+    uvs, uv_indices = _optional(
+        _concatenate(chunks, 'uvs', np.empty((0, uv_width), dtype=np.float32)),
+        _concatenate(chunks, 'uv_indices', int_empty),
+    )
+
+    return Mesh(
+        _concatenate(chunks, 'positions', np.empty((0, 3), dtype=np.float32)),
+        _concatenate(chunks, 'face_counts', int_empty),
+        indices,
+        normals=normals,
+        normal_indices=normal_indices,
+        uvs=uvs,
+        uv_indices=uv_indices,
+    )
+
+
+# Roughly how many rows to format before each write.
+WRITE_CHUNK_SIZE = 65536
+
+
+def format_rows(line, values, chunk_size=WRITE_CHUNK_SIZE):
+    """Yield ``line`` formatted with each row of ``values``, a chunk at a time."""
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size].astype(np.float64)
+        yield (line * len(chunk)) % tuple(chunk.ravel().tolist())
+
+
+def _write_rows(fh, line, values, chunk_size):
+    for text in format_rows(line, values, chunk_size):
+        fh.write(text.encode('ascii'))
+
+
+def dump(mesh, fh, chunk_size=WRITE_CHUNK_SIZE):
+    """Write the mesh to an open (binary) file as OBJ."""
+
+    _write_rows(fh, 'v %f %f %f\n', mesh.positions, chunk_size)
+
+    columns = [mesh.indices]
+    if mesh.uvs is not None:
+        _write_rows(fh, 'vt' + ' %f' * mesh.uvs.shape[1] + '\n', mesh.uvs, chunk_size)
+        columns.append(mesh.uv_indices if mesh.uv_indices is not None else np.arange(mesh.vertex_count))
+    if mesh.normals is not None:
+        _write_rows(fh, 'vn %f %f %f\n', mesh.normals, chunk_size)
+        columns.append(mesh.normal_indices if mesh.normal_indices is not None else np.arange(mesh.vertex_count))
+
+    # We can't emit "%d//", or we will crash Maya.
+    if mesh.uvs is not None:
+        token = '%d/%d/%d' if mesh.normals is not None else '%d/%d'
+    else:
+        token = '%d//%d' if mesh.normals is not None else '%d'
+
+    refs = np.column_stack(columns).astype(np.int64) + 1
+
+    templates = {}
+    def template(count):
+        try:
+            return templates[count]
+        except KeyError:
+            value = templates[count] = 'f ' + ' '.join([token] * count) + '\n'
+            return value
+
+    ends = np.cumsum(mesh.face_counts)
+    starts = ends - mesh.face_counts
+    face = 0
+    while face < mesh.face_count:
+        stop = max(face + 1, int(np.searchsorted(ends, starts[face] + chunk_size, side='right')))
+        text = ''.join([template(c) for c in mesh.face_counts[face:stop].tolist()])
+        fh.write((text % tuple(refs[starts[face]:ends[stop - 1]].ravel().tolist())).encode('ascii'))
+        face = stop
@@ -1,3 +1,5 @@
+from .formats import write as write_mesh
+
 
 class BaseObject(object):
 
@@ -29,12 +31,13 @@ class BaseObject(object):
         if self.children is not None:
             return
 
+        # The scene takes care of initializing the children (so that we
+        # don't recurse through deep hierarchies).
         self.children = []
         for args in self._iter_child_args():
             child = self.__class__(*args)
             child = scene.add_object(child)
             self.children.append(child)
-            child._init_graph(scene)
 
     def get_basic_meta(self):
         return {
@@ -44,7 +47,50 @@ class BaseObject(object):
     def get_transforms(self):
         raise NotImplementedError()
 
-    def export_geo(self, base):
+    @classmethod
+    def get_transforms_batch(cls, objects):
+        """Get the transforms of many objects at once, or None to get them one at a time.
+
+        Returns a list in the same order as the objects. See
+        :mod:`geod.transforms` for doing the math in bulk.
+
+        """
+        return None
+
+    @classmethod
+    def get_frame(cls):
+        """The current frame of the DCC's timeline."""
+        raise NotImplementedError()
+
+    @classmethod
+    def set_frame(cls, frame):
+        """Move the DCC's timeline to the given frame, for sampling transforms."""
         raise NotImplementedError()
 
+    def get_visibility(self):
+        """Is this object visible on the current frame?"""
+        raise NotImplementedError()
+
+    def import_placeholder(self, spec):
+        """Stand in for geometry which is not being loaded yet.
+
+        The spec is as for ``import_geo``, and may have ``bounds``, ``points``
+        and ``faces``. This does nothing by default.
+
+        """
+        pass
+
+    def extract_geo(self):
+        """Get this object's geometry as a :class:`geod.mesh.Mesh`, or None."""
+        raise NotImplementedError()
+
+    def export_geo(self, path, format='obj'):
+        mesh = self.extract_geo()
+        if mesh is not None:
+            from .spatial import mesh_summary
+            geo = mesh_summary(mesh)
+            geo['path'] = write_mesh(mesh, path, format)
+            geo['format'] = format
+            return geo
+
 
@@ -0,0 +1,264 @@
+"""Decoding geometry ahead of the load, in a pool of workers.
+
+:meth:`Scene.iter_load` (given ``workers`` or an ``executor``) hands the
+geometry of upcoming objects, in walk order, to a :class:`Prefetcher`, so
+that reading and parsing it overlaps with creating nodes on the main
+thread. Given ``workers``, the pool is of threads. With a process pool
+(which can only be passed in as the ``executor``), workers write the
+decoded arrays into a block of shared memory rather than pickling them
+back, and the main thread only copies them out of it.
+
+At most ``depth`` meshes, and roughly ``max_bytes`` of them (going by the
+sizes of their files), are in flight or waiting at once; one is always
+allowed, however large it is.
+
+Native meshes in an archive are mapped rather than read, so there is
+little to gain by prefetching them.
+
+"""
+
+import collections
+import os
+
+import numpy as np
+
+from .formats import read as read_mesh
+from .mesh import Mesh
+
+
+DEFAULT_MAX_BYTES = 1 << 28
+
+# How many meshes (or bytes of them) to send to a worker at once.
+BATCH_SIZE = 32
+BATCH_BYTES = 1 << 22
+
+# Alignment of arrays within a shared block.
+ALIGNMENT = 64
+
+# Open archives, per worker process; threads are given the main thread's.
+_archives = {}
+
+
+def _align(x):
+    return (x + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _read(source, format):
+    """Read a mesh from a path, or an ``(archive or its path, member)`` pair."""
+    if isinstance(source, tuple):
+        from .archive import Archive
+        archive, member = source
+        if not isinstance(archive, Archive):
+            archive_path = archive
+            archive = _archives.get(archive_path)
+            if archive is None:
+                archive = _archives[archive_path] = Archive(archive_path)
+        return archive.mesh(member, format)
+    return read_mesh(source, format)
+
+
+def decode(items, shared=False):
+    """Read and decode a batch of ``(source, format)`` meshes; the work done by the pool.
+
+    With ``shared``, the arrays of all of them are copied into one new block
+    of shared memory, and ``(name, specs)`` is returned for :func:`attach`.
+
+    """
+
+    meshes = [_read(source, format) for source, format in items]
+    if not shared:
+        return meshes
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    specs = []
+    arrays = []
+    size = 0
+    for mesh in meshes:
+        mesh_specs = []
+        for name, array in mesh.arrays():
+            array = np.ascontiguousarray(array)
+            mesh_specs.append((name, array.dtype.str, array.shape, size))
+            arrays.append((array, size))
+            size = _align(size + array.nbytes)
+        specs.append(mesh_specs)
+
+    block = SharedMemory(create=True, size=max(size, 1))
+    try:
+        _untrack(block)
+        for array, offset in arrays:
+            if array.nbytes:
+                np.ndarray(array.shape, array.dtype, buffer=block.buf, offset=offset)[...] = array
+    finally:
+        block.close()
+    return block.name, specs
+
+
+def _untrack(block):
+    # The main process unlinks the block (and tracks it while attached), so
+    # we must not; a worker's own tracker would otherwise "clean it up".
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(block._name, 'shared_memory')
+    except (ImportError, AttributeError):
+        pass
+
+
+def attach(name, specs):
+    """Copy the meshes out of a shared block from :func:`decode`, and free the block."""
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    block = SharedMemory(name=name)
+    try:
+        meshes = []
+        for mesh_specs in specs:
+            arrays = {}
+            for array_name, dtype, shape, offset in mesh_specs:
+                dtype = np.dtype(dtype)
+                count = 1
+                for n in shape:
+                    count *= n
+                if count:
+                    view = np.ndarray(shape, dtype, buffer=block.buf, offset=offset)
+                    arrays[array_name] = view.copy()
+                    del view
+                else:
+                    arrays[array_name] = np.empty(shape, dtype)
+            meshes.append(Mesh(**arrays))
+    finally:
+        block.close()
+        block.unlink()
+    return meshes
+
+
+def shared_memory_available():
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        return False
+    return True
+
+
+class _Batch(object):
+
+    def __init__(self, future, keys):
+        self.future = future
+        self.keys = keys
+
+
+class Prefetcher(object):
+
+    """Decodes meshes in an executor, ahead of when they are asked for.
+
+    Small meshes are sent to the executor in batches of up to
+    :data:`BATCH_SIZE` (or :data:`BATCH_BYTES`), so that the cost of each
+    task is spread out.
+
+    :param executor: A ``concurrent.futures`` executor.
+    :param sources: ``(key, source, format, size)`` of every mesh which will
+        be asked for, in order; ``source`` is a path or an ``(archive,
+        member)`` pair (with the archive's path for a process pool), and
+        ``size`` (for the budget) is the size of its file if None.
+    :param depth: How many meshes may be in flight (or waiting) at once.
+    :param max_bytes: Roughly how many bytes of them.
+    :param shared: If results come back through shared memory (i.e. the
+        executor is a process pool).
+
+    """
+
+    def __init__(self, executor, sources, depth, max_bytes=DEFAULT_MAX_BYTES, shared=False):
+        self.executor = executor
+        self.depth = max(1, depth)
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self._todo = collections.deque(sources)
+        self._batches = {}
+        self._ready = {}
+        self._sizes = {}
+        self._bytes = 0
+        self._fill()
+
+    def __contains__(self, key):
+        return key in self._sizes
+
+    def _fill(self):
+
+        # Wait until there is room for a decent batch, unless we are idle.
+        if self._sizes and self.depth - len(self._sizes) < min(BATCH_SIZE, self.depth // 4):
+            return
+
+        while self._todo and len(self._sizes) < self.depth:
+
+            keys = []
+            items = []
+            batch_bytes = 0
+            while (
+                self._todo and len(self._sizes) < self.depth and
+                len(keys) < BATCH_SIZE and batch_bytes < BATCH_BYTES
+            ):
+                key, source, format, size = self._todo[0]
+                if size is None:
+                    size = _file_size(source)
+                    self._todo[0] = (key, source, format, size)
+                # One mesh is always allowed, however large.
+                if self._sizes and self._bytes + size > self.max_bytes:
+                    break
+                self._todo.popleft()
+                if key in self._sizes:
+                    continue
+                keys.append(key)
+                items.append((source, format))
+                self._sizes[key] = size
+                self._bytes += size
+                batch_bytes += size
+
+            if not keys:
+                return
+            batch = _Batch(self.executor.submit(decode, items, self.shared), keys)
+            for key in keys:
+                self._batches[key] = batch
+
+    def get(self, key):
+        """The mesh for the given key, waiting for it if it isn't done yet."""
+
+        if key not in self._ready:
+            batch = self._batches[key]
+            for batch_key in batch.keys:
+                del self._batches[batch_key]
+            try:
+                result = batch.future.result()
+            except Exception:
+                for batch_key in batch.keys:
+                    self._bytes -= self._sizes.pop(batch_key)
+                raise
+            meshes = attach(*result) if self.shared else result
+            self._ready.update(zip(batch.keys, meshes))
+
+        mesh = self._ready.pop(key)
+        self._bytes -= self._sizes.pop(key)
+        self._fill()
+        return mesh
+
+    def close(self):
+        """Cancel what hasn't started, and free what has finished."""
+        self._todo.clear()
+        batches = dict((id(batch), batch) for batch in self._batches.values())
+        for batch in batches.values():
+            if batch.future.cancel() or not self.shared:
+                continue
+            try:
+                attach(*batch.future.result())
+            except Exception:
+                pass
+        self._batches.clear()
+        self._ready.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
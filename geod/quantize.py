@@ -0,0 +1,225 @@
+"""Lossy, quantized encodings of mesh attributes.
+
+Each attribute may be encoded on its own:
+
+- normals are packed onto an octahedron, with ``bits`` per component (so the
+  default of 16 stores each normal in 32 bits);
+- UVs are stored as half-floats, or as ``bits`` fixed-point values across
+  their bounding box;
+- positions are stored as ``bits`` fixed-point values across the bounding
+  box of the object.
+
+Every encoding records an upper bound on its error (``max_error``); for
+normals this is the angle in radians, and otherwise it is the largest
+absolute difference in any component. Topology is never quantized.
+
+"""
+
+import math
+
+import numpy as np
+
+from .mesh import Mesh
+
+
+# Rounding from float64 to float32 while decoding.
+_FLOAT32_EPSILON = float(np.finfo(np.float32).eps)
+
+
+class QuantizedMesh(Mesh):
+
+    """A mesh whose arrays are (partly) encoded, as described by ``quantization``.
+
+    This is only good for writing to disk, or :meth:`decode`-ing.
+
+    """
+
+    def __init__(self, quantization, *args, **kwargs):
+        super(QuantizedMesh, self).__init__(*args, **kwargs)
+        self.quantization = quantization
+
+    def decode(self):
+        return decode(dict(self.arrays()), self.quantization)
+
+
+def _unsigned_dtype(bits):
+    if not 1 <= bits <= 16:
+        raise ValueError('can only quantize to 1 to 16 bits; got %r' % bits)
+    return np.uint8 if bits <= 8 else np.uint16
+
+
+def encode_fixed(values, bits=16):
+    """Encode to fixed-point across the bounding box of the values.
+
+    Returns ``(encoded, spec)``.
+
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    if len(values):
+        lo = values.min(axis=0)
+        hi = values.max(axis=0)
+    else:
+        lo = hi = np.zeros(values.shape[1:])
+
+    steps = (1 << bits) - 1
+    scale = (hi - lo) / steps
+    safe_scale = np.where(scale > 0, scale, 1)
+    encoded = np.rint((values - lo) / safe_scale).astype(_unsigned_dtype(bits))
+
+    magnitude = float(np.abs(np.concatenate([lo, hi])).max()) if lo.size else 0.0
+    return encoded, {
+        'encoding': 'fixed',
+        'bits': bits,
+        'offset': lo.tolist(),
+        'scale': scale.tolist(),
+        'max_error': float(scale.max()) / 2 + magnitude * _FLOAT32_EPSILON if scale.size else 0.0,
+    }
+
+
+def decode_fixed(encoded, spec):
+    offset = np.asarray(spec['offset'], dtype=np.float64)
+    scale = np.asarray(spec['scale'], dtype=np.float64)
+    return (encoded * scale + offset).astype(np.float32)
+
+
+def encode_half(values):
+    """Encode as half-floats; returns ``(encoded, spec)``."""
+
+    values = np.asarray(values, dtype=np.float32)
+    magnitude = float(np.abs(values).max()) if values.size else 0.0
+    if magnitude > float(np.finfo(np.float16).max):
+        raise ValueError('values are too large for half-floats; max is %r' % magnitude)
+
+    # Half-floats have 11 significant bits, and are subnormal below 2**-14.
+    return values.astype(np.float16), {
+        'encoding': 'half',
+        'max_error': magnitude * 2.0 ** -11 + 2.0 ** -25,
+    }
+
+
+def decode_half(encoded, spec):
+    return encoded.astype(np.float32)
+
+
+def encode_octahedral(normals, bits=16):
+    """Encode (not necessarily unit) normals onto an octahedron.
+
+    Zero-length normals come back as +Z. Returns ``(encoded, spec)``.
+
+    """
+
+    normals = np.asarray(normals, dtype=np.float64)
+    l1 = np.abs(normals).sum(axis=1)
+    l1[l1 == 0] = 1
+    x = normals[:, 0] / l1
+    y = normals[:, 1] / l1
+
+    # Fold the lower hemisphere over the upper one.
+    lower = normals[:, 2] < 0
+    fx = (1 - np.abs(y[lower])) * np.where(x[lower] >= 0, 1.0, -1.0)
+    fy = (1 - np.abs(x[lower])) * np.where(y[lower] >= 0, 1.0, -1.0)
+    x[lower] = fx
+    y[lower] = fy
+
+    steps = (1 << bits) - 1
+    encoded = np.rint((np.column_stack([x, y]) + 1) * (steps / 2.0)).astype(_unsigned_dtype(bits))
+
+    # Rounding moves each component by at most half a step, which moves the
+    # unnormalized vector by sqrt(1.5) steps; it is at least 1/sqrt(3) long.
+    reach = min(1.0, 3 / math.sqrt(2) * 2.0 / steps)
+    return encoded, {
+        'encoding': 'octahedral',
+        'bits': bits,
+        'max_error': math.asin(reach) + 4 * _FLOAT32_EPSILON,
+    }
+
+
+def decode_octahedral(encoded, spec):
+
+    steps = (1 << spec['bits']) - 1
+    xy = encoded.astype(np.float64) * (2.0 / steps) - 1
+    x = xy[:, 0]
+    y = xy[:, 1]
+    z = 1 - np.abs(x) - np.abs(y)
+
+    # Unfold the lower hemisphere.
+    lower = z < 0
+    ux = (1 - np.abs(y[lower])) * np.where(x[lower] >= 0, 1.0, -1.0)
+    uy = (1 - np.abs(x[lower])) * np.where(y[lower] >= 0, 1.0, -1.0)
+    x[lower] = ux
+    y[lower] = uy
+
+    normals = np.column_stack([x, y, z])
+    normals /= np.sqrt((normals * normals).sum(axis=1))[:, None]
+    return normals.astype(np.float32)
+
+
+_decoders = {
+    'fixed': decode_fixed,
+    'half': decode_half,
+    'octahedral': decode_octahedral,
+}
+
+
+def encode(mesh, normals=16, uvs='half', uv_bits=16, positions=None):
+    """Quantize a :class:`geod.mesh.Mesh`.
+
+    :param normals: Bits per octahedral component, or None to leave them be.
+    :param uvs: ``"half"``, ``"fixed"`` (with ``uv_bits``), or None.
+    :param positions: Bits per component, or None to leave them be.
+    :return: A :class:`QuantizedMesh`.
+
+    """
+
+    arrays = dict(mesh.arrays())
+    quantization = {}
+
+    if normals and mesh.normals is not None:
+        arrays['normals'], quantization['normals'] = encode_octahedral(mesh.normals, normals)
+
+    if uvs and mesh.uvs is not None:
+        if uvs == 'half':
+            arrays['uvs'], quantization['uvs'] = encode_half(mesh.uvs)
+        elif uvs == 'fixed':
+            arrays['uvs'], quantization['uvs'] = encode_fixed(mesh.uvs, uv_bits)
+        else:
+            raise ValueError('unknown UV encoding %r' % uvs)
+
+    if positions:
+        arrays['positions'], quantization['positions'] = encode_fixed(mesh.positions, positions)
+
+    return QuantizedMesh(quantization, **arrays)
+
+
+def decode(arrays, quantization):
+    """Build a :class:`geod.mesh.Mesh` from encoded arrays."""
+
+    arrays = dict(arrays)
+    for name, spec in quantization.items():
+        try:
+            decoder = _decoders[spec['encoding']]
+        except KeyError:
+            raise ValueError('unknown encoding %r for %r' % (spec['encoding'], name))
+        arrays[name] = decoder(arrays[name], spec)
+    return Mesh(**arrays)
+
+
+def errors(original, decoded):
+    """The actual error of each quantized attribute, as bounded by ``max_error``."""
+
+    result = {}
+    if original.normals is not None:
+        a = np.asarray(original.normals, dtype=np.float64)
+        b = np.asarray(decoded.normals, dtype=np.float64)
+        keep = (a != 0).any(axis=1)
+        # atan2 stays accurate for tiny angles, where acos does not.
+        sin = np.sqrt((np.cross(a[keep], b[keep]) ** 2).sum(axis=1))
+        cos = (a[keep] * b[keep]).sum(axis=1)
+        result['normals'] = float(np.arctan2(sin, cos).max()) if keep.any() else 0.0
+    for name in ('uvs', 'positions'):
+        a = getattr(original, name)
+        if a is not None:
+            diff = np.abs(np.asarray(a, dtype=np.float64) - getattr(decoded, name))
+            result[name] = float(diff.max()) if diff.size else 0.0
+    return result
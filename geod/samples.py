@@ -0,0 +1,214 @@
+"""Time-sampled transforms (and visibility) for a whole scene, in one file.
+
+:meth:`Scene.iter_dump` (given ``frames``) steps through the timeline once,
+getting every object's local matrix at each frame, and writes them to
+``.samples.geod`` in the native format (see :mod:`geod.binary`)::
+
+    times               (T, ) the sampled frames
+    offsets             (N + 1, ) where each object's samples start
+    frames              (K, ) the index into ``times`` of each sample
+    matrices            (K, 16) the local matrix of each sample
+    visibility_offsets  as above, for visibility (if it was sampled)
+    visibility_frames
+    visibility          (K, ) uint8
+
+Object paths (in the same order) are in the ``paths`` attr. A sample is
+only stored when it differs from the one on the previous frame, so an
+object which does not move has exactly one.
+
+"""
+
+import os
+
+import numpy as np
+
+from .binary import dump_arrays, load_arrays
+from .transforms import interpolate
+from .utils import replace
+
+
+NAME = '.samples.geod'
+
+
+def samples_path(root):
+    return os.path.join(root, NAME)
+
+
+def remove(root):
+    try:
+        os.unlink(samples_path(root))
+    except OSError:
+        pass
+
+
+class Packer(object):
+
+    """Accumulates per-frame values of N objects, keeping only the changes.
+
+    :param count: The number of objects.
+
+    """
+
+    def __init__(self, count):
+        self.count = count
+        self._last = None
+        self._chunks = []
+
+    def add(self, frame, values):
+        """Add the ``(N, ...)`` values of every object at the given frame index."""
+        values = np.array(values)
+        if self._last is None:
+            changed = np.arange(self.count)
+        else:
+            changed = np.flatnonzero((values != self._last).reshape(self.count, -1).any(axis=1))
+        if len(changed):
+            self._chunks.append((frame, changed, values[changed]))
+        self._last = values
+
+    def pack(self):
+        """Return ``(offsets, frames, values)``, grouped by object."""
+        if not self._chunks:
+            return np.zeros(self.count + 1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0)
+        ids = np.concatenate([chunk[1] for chunk in self._chunks])
+        frames = np.concatenate([np.full(len(chunk[1]), chunk[0], dtype=np.int32) for chunk in self._chunks])
+        values = np.concatenate([chunk[2] for chunk in self._chunks])
+        order = np.lexsort((frames, ids))
+        offsets = np.searchsorted(ids[order], np.arange(self.count + 1))
+        return offsets.astype(np.int64), frames[order], values[order]
+
+
+class Samples(object):
+
+    """Sampled transforms (and maybe visibility), evaluated at any time.
+
+    Evaluation is vectorized over every object (and any number of times).
+    Matrices are interpolated between neighbouring frames by their components
+    (see :func:`geod.transforms.interpolate`), and are exact on the frames
+    themselves; visibility holds the previous frame's.
+    Times outside of the sampled range are clamped to it.
+
+    """
+
+    def __init__(self, paths, times, offsets, frames, matrices, visibility=None):
+        self.paths = list(paths)
+        self.times = np.asarray(times, dtype=np.float64)
+        self._matrices = _Track(len(self.times), offsets, frames, np.asarray(matrices).reshape(-1, 16))
+        self._visibility = _Track(len(self.times), *visibility) if visibility else None
+        self._positions = None
+
+    @classmethod
+    def read(cls, root):
+        """Read the scene's samples, or return None if there are none."""
+        path = samples_path(root)
+        if not os.path.exists(path):
+            return
+        return cls.from_arrays(*load_arrays(path))
+
+    @classmethod
+    def from_arrays(cls, arrays, attrs):
+        """Samples from the arrays and attrs of a samples file."""
+        visibility = None
+        if 'visibility' in arrays:
+            visibility = (arrays['visibility_offsets'], arrays['visibility_frames'], arrays['visibility'])
+        return cls(attrs['paths'], arrays['times'], arrays['offsets'], arrays['frames'], arrays['matrices'], visibility)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def index(self, path):
+        """The position of the given object path in :attr:`paths`."""
+        if self._positions is None:
+            self._positions = dict((p, i) for i, p in enumerate(self.paths))
+        return self._positions[path.replace(os.sep, '/')]
+
+    @property
+    def has_visibility(self):
+        return self._visibility is not None
+
+    def _frames_at(self, times):
+        """The frame indices either side of the times, and how far between."""
+        times = np.asarray(times, dtype=np.float64)
+        last = len(self.times) - 1
+        before = np.clip(np.searchsorted(self.times, times, side='right') - 1, 0, last)
+        after = np.minimum(before + 1, last)
+        span = self.times[after] - self.times[before]
+        weight = np.where(span > 0, (times - self.times[before]) / np.where(span > 0, span, 1), 0)
+        return before, after, np.clip(weight, 0, 1)
+
+    def transforms_at(self, time):
+        """Local matrices of every object at a time, as ``(N, 4, 4)``.
+
+        Given ``M`` times, they are ``(M, N, 4, 4)``.
+
+        """
+        before, after, weight = self._frames_at(time)
+        a = self._matrices.at(before)
+        b = self._matrices.at(after)
+        weight = np.broadcast_to(np.asarray(weight)[..., None], a.shape[:-1])
+
+        # Most objects are still (or exactly on a frame), so only decompose
+        # those which are really between two samples.
+        result = np.where((weight >= 1)[..., None], b, a).astype(np.float64)
+        between = (weight > 0) & (weight < 1) & (a != b).any(axis=-1)
+        if between.any():
+            result[between] = interpolate(a[between], b[between], weight[between]).reshape(-1, 16)
+        return result.reshape(result.shape[:-1] + (4, 4))
+
+    def visibility_at(self, time):
+        """Visibility of every object, as ``(N, )`` bools (or ``(M, N)``)."""
+        if self._visibility is None:
+            raise ValueError('visibility was not sampled')
+        before, _, _ = self._frames_at(time)
+        return self._visibility.at(before).astype(bool)
+
+    def keys(self, path):
+        """The ``(times, matrices)`` stored for one object, e.g. for keyframes."""
+        track = self._matrices
+        i = self.index(path)
+        start, stop = track.offsets[i], track.offsets[i + 1]
+        return self.times[track.frames[start:stop]], track.values[start:stop].reshape(-1, 4, 4)
+
+
+class _Track(object):
+
+    def __init__(self, frame_count, offsets, frames, values):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.frames = np.asarray(frames, dtype=np.int64)
+        self.values = np.asarray(values)
+        # Every (object, frame) sample as one sorted key, so that all of the
+        # lookups happen in one searchsorted.
+        self._frame_count = frame_count
+        self._objects = np.arange(len(self.offsets) - 1)
+        owners = np.repeat(self._objects, np.diff(self.offsets))
+        self._keys = owners * frame_count + self.frames
+
+    def at(self, frames):
+        """The values of every object at frame indices, held from the last sample."""
+        frames = np.asarray(frames)
+        wanted = self._objects * self._frame_count + frames[..., None]
+        return self.values[np.searchsorted(self._keys, wanted, side='right') - 1]
+
+
+def write(root, paths, times, transforms, visibility=None):
+    """Write packed samples, as from :meth:`Packer.pack`."""
+
+    offsets, frames, matrices = transforms
+    arrays = [
+        ('times', np.asarray(times, dtype=np.float64)),
+        ('offsets', offsets),
+        ('frames', frames),
+        ('matrices', np.asarray(matrices, dtype=np.float64).reshape(-1, 16)),
+    ]
+    if visibility is not None:
+        offsets, frames, values = visibility
+        arrays.extend([
+            ('visibility_offsets', offsets),
+            ('visibility_frames', frames),
+            ('visibility', np.asarray(values, dtype=np.uint8)),
+        ])
+
+    path = samples_path(root)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as fh:
+        dump_arrays(fh, arrays, {'paths': [p.replace(os.sep, '/') for p in paths]})
+    replace(tmp_path, path)
@@ -1,13 +1,19 @@
 from __future__ import print_function
 
-import copy
-import json
+import collections
 import os
-import pprint
 import sys
+import time
 
-from .utils import makedirs
+from . import index
+from .archive import is_archive, member_name
+from .filters import PathFilter
+from .fingerprint import file_fingerprint, mesh_fingerprint, meta_fingerprint
+from .formats import format_extensions, format_from_path, write as write_mesh
+from .metacodec import codec_for_path, codecs as meta_codecs, get_codec
 from .object import BaseObject
+from .stats import Stats, null_stats
+from .utils import makedirs, replace
 
 if sys.version_info[0] > 2:
     dict_itervalues = lambda x: x.values()
@@ -17,13 +23,118 @@ else:
     dict_values = lambda x: x.values()
 
 
+# Where shared geometry lives when deduplicating.
+BLOB_DIR = '.blobs'
+
+IDENTITY = [
+    1, 0, 0, 0,
+    0, 1, 0, 0,
+    0, 0, 1, 0,
+    0, 0, 0, 1,
+]
+
+
+class DumpError(Exception):
+
+    def __init__(self, path, error):
+        super(DumpError, self).__init__('error while dumping %r: %s' % (path, error))
+        self.path = path
+        self.error = error
+
+
+def write_object(path, meta, mesh=None, geometry_format=None, mesh_base=None, stats=null_stats, codec=meta_codecs['json']):
+    """Write an object's geometry (if given) and sidecar.
+
+    Each file is written to the side and then renamed into place, geometry
+    first, so an interrupted dump never leaves a partial file behind.
+
+    Returns the size of the sidecar. This does not touch the DCC, so is safe
+    to run in a worker thread (or process, without ``stats``).
+
+    """
+
+    if mesh is not None:
+        with stats.timer('write_geometry'):
+            base = mesh_base or path
+            tmp_path = write_mesh(mesh, base + '.tmp', geometry_format)
+            mesh_path = base + format_extensions[geometry_format]
+            replace(tmp_path, mesh_path)
+        if stats.enabled:
+            stats.count('files_written')
+            stats.count('bytes_written', os.path.getsize(mesh_path))
+
+    with stats.timer('write_meta'):
+        encoded = codec.dumps(meta, pretty=True)
+        meta_path = path + codec.extension
+        with open(meta_path + '.tmp', 'wb') as fh:
+            fh.write(encoded)
+        replace(meta_path + '.tmp', meta_path)
+    stats.count('files_written')
+    stats.count('bytes_written', len(encoded))
+
+    return len(encoded)
+
+
+def _existing_fingerprint(path):
+    # For geometry written without a recorded fingerprint.
+    try:
+        return file_fingerprint(path)
+    except (IOError, OSError):
+        return
+
+
 class Scene(object):
 
-    def __init__(self, path, object_class=BaseObject):
+    def __init__(self, path, object_class=BaseObject, geometry_format='obj', quantize=None, stats=None, meta_codec='json', geometry_cache=None):
+        """A scene stored in the directory at ``path``.
+
+        If ``path`` ends in ``.geoda``, the scene is stored in a single file
+        instead (see :mod:`geod.archive`); it is dumped into a local staging
+        directory and then packed, and loaded straight from the archive.
+
+        ``quantize`` may be True or a dict of options for
+        :func:`geod.quantize.encode`, to store geometry (in the ``geod``
+        format) with lossy, smaller attributes.
+
+        ``stats`` may be True or a :class:`geod.stats.Stats` to gather
+        timings and counters while building the graph, dumping and loading.
+
+        ``meta_codec`` is how sidecars and the index are written (see
+        :mod:`geod.metacodec`); scenes are read with whichever they use.
+
+        ``geometry_cache`` may be a :class:`geod.cache.GeometryCache`, or
+        True for the one shared by the process, to read geometry through
+        when loading; objects are then given the mesh to import (as
+        ``_mesh`` in the geometry spec).
+
+        """
+
+        if quantize is True:
+            quantize = {}
+        elif quantize is False:
+            quantize = None
+        if quantize is not None and geometry_format != 'geod':
+            raise ValueError('can only quantize the geod geometry format; got %r' % geometry_format)
         self.path = os.path.abspath(path)
         self.guid_to_object = {}
         self.root_objects = None
         self.object_class = object_class
+        self.geometry_format = geometry_format
+        self.quantize = quantize
+        self.stats = Stats() if stats is True else (stats or null_stats)
+        self.meta_codec = get_codec(meta_codec)
+        if geometry_cache is True:
+            from .cache import default_cache
+            geometry_cache = default_cache()
+        elif geometry_cache is False:
+            geometry_cache = None
+        self.geometry_cache = geometry_cache
+        self.dump_summary = None
+        self.is_archive = is_archive(self.path)
+        self._archive = None
+        self._deferred = collections.OrderedDict()
+        self._geometry_sources = {}
+        self._prefetcher = None
 
     def _abspath(self, path):
         return os.path.join(self.path, os.path.normpath(path).lstrip('/'))
@@ -32,166 +143,1275 @@ class Scene(object):
         return self.guid_to_object.setdefault(obj.guid, obj)
 
     def finalize_graph(self):
-        for obj in dict_values(self.guid_to_object):
-            obj._init_graph(self)
-        root_guids = set(self.guid_to_object)
-        for obj in dict_itervalues(self.guid_to_object):
-            for child in obj.children:
-                try:
-                    root_guids.remove(child.guid)
-                except KeyError:
-                    pass
-        self.root_objects = [self.guid_to_object[guid] for guid in sorted(root_guids)]
+
+        with self.stats.timer('graph'):
+
+            to_init = dict_values(self.guid_to_object)
+            while to_init:
+                obj = to_init.pop()
+                if obj.children is None:
+                    obj._init_graph(self)
+                    to_init.extend(obj.children)
+
+            child_guids = set(child.guid for obj in dict_itervalues(self.guid_to_object) for child in obj.children)
+            self.root_objects = [self.guid_to_object[guid] for guid in sorted(set(self.guid_to_object) - child_guids)]
+
+    def _child_path(self, path, obj):
+        return os.path.join(path, os.path.normpath(obj.name).replace('/', ''))
 
     def walk(self):
-        count = 0
+        """Iterate depth-first over ``(path, obj)`` for the whole graph.
+
+        Objects reachable via more than one parent are visited once per
+        path; a cycle raises a ValueError naming the path which closes it.
+
+        """
+
+        visited = set()
+
         for root in self.root_objects:
-            for x in self._walk(root, ''):
-                
-                if count >= len(self.guid_to_object):
-                    print('The graph has cycles!')
-                    return
 
-                yield x
-                count += 1
+            path = self._child_path('', root)
+            yield path, root
+            visited.add(root.guid)
+
+            on_path = set([root.guid])
+            stack = [(path, root, iter(root.children))]
+            while stack:
+
+                path, obj, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    on_path.discard(obj.guid)
+                    continue
+
+                child_path = self._child_path(path, child)
+                if child.guid in on_path:
+                    raise ValueError('graph has a cycle at %r' % child_path)
+
+                yield child_path, child
+                visited.add(child.guid)
+
+                on_path.add(child.guid)
+                stack.append((child_path, child, iter(child.children)))
+
+        if len(visited) < len(self.guid_to_object):
+            guid = next(guid for guid in self.guid_to_object if guid not in visited)
+            raise ValueError('graph has a cycle; %r is not reachable from any root' % self.guid_to_object[guid])
+
+    def dump(self, **kwargs):
+        for _ in self.iter_dump(**kwargs):
+            pass
+        return self.dump_summary
+
+    def _blob_base(self, fingerprint):
+        return os.path.join(self.path, BLOB_DIR, fingerprint[:2], fingerprint)
+
+    def _export_geometry(self, obj, path, previous=None, blobs=None):
+        """Get the geometry meta for an object, and a mesh to write (if any).
+
+        We try to get the raw mesh so that it can be written later (or not
+        at all), and fingerprint its arrays; whatever the dump's options, so
+        that the fingerprint of the same geometry is always the same. Objects
+        which can't give us one export their own geometry to the side, and it
+        is moved into place once it is complete. Either way, if we have the
+        ``previous`` geometry meta, the file is only written if it has
+        changed.
+
+        Exported files are fingerprinted by their bytes, which means reading
+        them back, so only if it is needed (i.e. with ``previous`` or
+        ``blobs``); :func:`geod.diff.diff` hashes those it needs itself.
+
+        With ``blobs`` (the set of blob paths used so far), geometry is stored
+        once per fingerprint in the shared blob directory.
+
+        Extracted geometry is quantized if the scene asks for it, and the
+        error bounds are recorded in the meta. Objects which export their
+        own geometry are not quantized.
+
+        Returns ``(geo, mesh, base)``, where the mesh (if any) still needs to
+        be written to ``base``.
+
+        """
+
+        try:
+            mesh = obj.extract_geo()
+        except NotImplementedError:
+            pass
+        else:
+            if mesh is None:
+                return None, None, None
+            from .spatial import mesh_summary
+            summary = mesh_summary(mesh)
+            if self.quantize is not None:
+                from .quantize import encode as quantize_mesh
+                mesh = quantize_mesh(mesh, **self.quantize)
+            format_ = self.geometry_format
+            fingerprint = mesh_fingerprint(mesh, format_)
+            base = path if blobs is None else self._blob_base(fingerprint)
+            geo = {
+                'path': base + format_extensions[format_],
+                'format': format_,
+                'fingerprint': fingerprint,
+            }
+            geo.update(summary)
+            if self.quantize is not None:
+                geo['quantization'] = dict(
+                    (name, {'encoding': spec['encoding'], 'max_error': spec['max_error']})
+                    for name, spec in mesh.quantization.items()
+                )
+            if blobs is not None:
+                if geo['path'] in blobs or os.path.exists(geo['path']):
+                    mesh = None
+                else:
+                    makedirs(os.path.dirname(base))
+                blobs.add(geo['path'])
+            elif previous and fingerprint == previous.get('fingerprint') and os.path.exists(geo['path']):
+                # Only the sidecar changed.
+                mesh = None
+            return geo, mesh, base
+
+        geo = obj.export_geo(path + '.tmp', format=self.geometry_format)
+        if not geo or 'path' not in geo:
+            return geo, None, None
+        if self.stats.enabled:
+            self.stats.count('files_written')
+            self.stats.count('bytes_written', os.path.getsize(geo['path']))
+
+        tmp_path = geo['path']
+        ext = os.path.splitext(tmp_path)[1]
+        if previous is None and blobs is None:
+            geo['path'] = path + ext
+            replace(tmp_path, geo['path'])
+            return geo, None, None
+
+        fingerprint = geo['fingerprint'] = file_fingerprint(tmp_path)
+        if blobs is None:
+            geo['path'] = path + ext
+            unchanged = fingerprint == (previous.get('fingerprint') or _existing_fingerprint(geo['path']))
+        else:
+            geo['path'] = self._blob_base(fingerprint) + ext
+            makedirs(os.path.dirname(geo['path']))
+            blobs.add(geo['path'])
+            unchanged = True
+        if unchanged and os.path.exists(geo['path']):
+            os.unlink(tmp_path)
+        else:
+            replace(tmp_path, geo['path'])
+        return geo, None, None
+
+    def iter_dump(self, workers=0, executor=None, max_pending=None, incremental=False, dedup=False, frames=None, visibility=False, resume=False):
+        """Dump the scene, yielding ``(i, total, path, obj)`` as we go.
+
+        With ``workers`` (or a ``concurrent.futures`` ``executor``), only the
+        work which must touch the DCC (meta, transforms, and extracting
+        geometry) happens on this thread; formatting and writing files
+        happens in the pool. At most ``max_pending`` objects are in flight
+        at once, and any error is raised as a :class:`DumpError` once we get
+        to the object which caused it. The index and journal are in walk
+        order either way.
+
+        With ``incremental``, objects whose meta and geometry fingerprints
+        match those in the existing index are not rewritten, and objects
+        which are no longer in the scene (and unused blobs) are removed.
 
-    def _walk(self, obj, path):
-        path = os.path.join(path, os.path.normpath(obj.name).replace('/', ''))
-        yield path, obj
-        for child in obj.children:
-            for x in self._walk(child, path):
+        With ``dedup``, geometry is content-addressed, and each unique mesh
+        is written once into a shared blob directory.
+
+        With ``frames``, the local transforms (and, with ``visibility``, the
+        visibility) of every object are also sampled on each of them, in one
+        pass over the timeline once everything else has been written. See
+        :mod:`geod.samples`.
+
+        Every object is written to the side and renamed into place, and a
+        journal of the finished ones is kept until the dump is done (see
+        :mod:`geod.journal`). With ``resume``, a dump which was cancelled or
+        crashed carries on from there; objects in the journal are not looked
+        at again (so changes to them since are not picked up), and the rest
+        are dumped with the options of the original dump. Without a journal,
+        ``resume`` does nothing.
+
+        Counts of objects written, skipped, resumed and removed are left in
+        ``dump_summary``. If the scene has :attr:`stats`, the time spent on
+        writing files in an ``executor`` we are given is not included (as it
+        may be in another process).
+
+        """
+
+        if self.is_archive:
+            for x in self._iter_dump_archive(dict(
+                workers=workers, executor=executor, max_pending=max_pending, incremental=incremental,
+                dedup=dedup, frames=frames, visibility=visibility, resume=resume,
+            )):
                 yield x
+            return
+
+        stats = self.stats
+        timer = stats.timer
+
+        if frames is not None:
+            frames = [float(x) for x in frames]
+            if not frames or any(b <= a for a, b in zip(frames, frames[1:])):
+                raise ValueError('frames must be a non-empty, increasing sequence')
+
+        owns_executor = False
+        if workers and executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(workers)
+            owns_executor = True
+        write_stats = stats if executor is None or owns_executor else null_stats
+        if executor is not None and not max_pending:
+            max_pending = 2 * (workers or 4)
+
+        from . import journal, samples, spatial
+
+        options = {
+            'geometry_format': self.geometry_format,
+            'quantize': self.quantize,
+            'meta_codec': self.meta_codec.name,
+            'dedup': bool(dedup),
+        }
+        journaled = journal.read(self.path) if resume else None
+        if journaled is not None and journaled[0]['options'] != options:
+            raise ValueError('cannot resume a dump with different options; it had %r' % (journaled[0]['options'], ))
+
+        previous = {}
+        previous_codec = None
+        done = {}
+        if journaled is not None:
+            header, journal_entries, journal_size = journaled
+            previous_codec = get_codec(header['previous_codec']) if header['previous_codec'] else None
+            for entry in header['previous']:
+                previous[entry['path']] = entry
+            for entry in journal_entries:
+                done[entry['path']] = entry
+        elif incremental:
+            with timer('index'):
+                previous_codec = index.find_codec(self.path)
+                for entry in index.read(self.path, codec=previous_codec) or ():
+                    previous[entry['path']] = entry
+
+        # Any existing index will be wrong until we are completely done.
+        index.remove(self.path)
+        spatial.remove(self.path)
+        samples.remove(self.path)
+        entries = []
+        pending = collections.deque()
+        summary = self.dump_summary = {'written': 0, 'skipped': 0, 'resumed': 0, 'removed': 0}
+        blobs = set() if dedup else None
+
+        makedirs(self.path)
+        if journaled is not None:
+            journal_writer = journal.Writer(self.path, size=journal_size)
+        else:
+            journal_writer = journal.Writer(self.path, {
+                'options': options,
+                'previous_codec': previous_codec.name if previous_codec else None,
+                'previous': [previous[path] for path in sorted(previous)],
+            })
+
+        # Entries are collected in walk order, so the index and journal come
+        # out the same with or without a pool. Those which were skipped or
+        # resumed (which have no result to wait for) queue up behind any
+        # writes still ahead of them, and go with the last of those.
+        def collect():
+            while True:
+                entry, result, journal_entry = pending.popleft()
+                if result is not None:
+                    try:
+                        entry['size'] = result.result() if executor else result
+                    except Exception as e:
+                        raise DumpError(entry['path'], e)
+                entries.append(entry)
+                if journal_entry:
+                    journal_writer.add(entry)
+                if not pending or pending[0][1] is not None:
+                    break
+
+        def collect_done(entry, journal_entry):
+            pending.append((entry, None, journal_entry))
+            if len(pending) == 1:
+                collect()
+
+        try:
+
+            # Objects may be able to get all of their transforms at once.
+            walked = list(self.walk())
+            with timer('transforms'):
+                batch_transforms = self._get_transforms_batch(obj for _, obj in walked)
+
+            for i, (rel_path, obj) in enumerate(walked):
+
+                yield i, len(self.guid_to_object), rel_path, obj
+                start = time.time()
+                stats.count('objects')
+
+                rel_path = os.path.normpath(rel_path)
+                path = self._abspath(rel_path)
+
+                # Finished before we were interrupted.
+                entry = done.get(rel_path)
+                if entry is not None and self._entry_files_exist(entry):
+                    collect_done(entry, False)
+                    summary['resumed'] += 1
+                    stats.object_done(rel_path, obj, time.time() - start)
+                    continue
+
+                with timer('makedirs'):
+                    makedirs(os.path.dirname(path))
+
+                with timer('meta'):
+                    meta = obj.get_basic_meta()
+                with timer('transforms'):
+                    if batch_transforms is None:
+                        meta['transform'] = obj.get_transforms()
+                    else:
+                        meta['transform'] = batch_transforms[obj.guid]
+
+                prev_entry = previous.get(rel_path)
+                # New objects have no previous geometry, but in an incremental
+                # dump it should still be fingerprinted for the next one.
+                if prev_entry:
+                    prev_geo = prev_entry['meta'].get('geometry') or {}
+                else:
+                    prev_geo = {} if incremental else None
+
+                # If we can get at the raw geometry then it can be written in
+                # the pool (or skipped), otherwise the object must export it
+                # itself.
+                with timer('geometry'):
+                    geo, mesh, mesh_base = self._export_geometry(obj, path, prev_geo, blobs)
+                if geo:
+                    if 'path' in geo:
+                        geo.setdefault('format', format_from_path(geo['path']))
+                        geo['path'] = os.path.relpath(geo['path'], os.path.dirname(path))
+                    meta['geometry'] = geo
+
+                with timer('fingerprint'):
+                    entry = {
+                        'path': rel_path,
+                        'parent': os.path.dirname(rel_path) or None,
+                        'meta': meta,
+                        'fingerprint': meta_fingerprint(meta),
+                    }
+
+                if (
+                    prev_entry and
+                    prev_entry.get('fingerprint') == entry['fingerprint'] and
+                    self._entry_files_exist(entry)
+                ):
+                    entry['size'] = prev_entry['size']
+                    collect_done(entry, True)
+                    summary['skipped'] += 1
+                    stats.object_done(rel_path, obj, time.time() - start)
+                    continue
+
+                summary['written'] += 1
+                if prev_entry and previous_codec is not self.meta_codec:
+                    try:
+                        os.unlink(path + previous_codec.extension)
+                    except OSError:
+                        pass
+                if executor:
+                    while len(pending) >= max_pending:
+                        collect()
+                    future = executor.submit(write_object, path, meta, mesh, self.geometry_format, mesh_base, write_stats, self.meta_codec)
+                    pending.append((entry, future, True))
+                else:
+                    pending.append((entry, write_object(path, meta, mesh, self.geometry_format, mesh_base, write_stats, self.meta_codec), True))
+                    collect()
+                stats.object_done(rel_path, obj, time.time() - start)
+
+            with timer('wait'):
+                while pending:
+                    collect()
+
+        finally:
+            if owns_executor:
+                executor.shutdown(wait=True)
+            journal_writer.close()
+
+        if frames is not None:
+            with timer('samples'):
+                self._dump_samples(walked, frames, visibility)
+
+        with timer('cleanup'):
+            seen = set(entry['path'] for entry in entries)
+            for rel_path, entry in sorted(previous.items()):
+                if rel_path not in seen:
+                    self._remove_object(entry)
+                    summary['removed'] += 1
+            if incremental or previous:
+                self._remove_unused_blobs(entries)
+
+        # Removing the journal touches the root, so it must go before the
+        # index does.
+        journal.remove(self.path)
+
+        # The spatial index is only trusted if it is older than the index.
+        with timer('bounds'):
+            spatial.write(self.path, self._build_spatial_index(entries), self.meta_codec)
+        with timer('index'):
+            index.write(self.path, entries, self.meta_codec)
+
+    def _iter_dump_archive(self, kwargs):
+        """Dump into a local staging directory, and then pack that into our archive.
+
+        With ``incremental``, the archive is extracted to start with, and only
+        the files which changed are appended to it.
+
+        The staging directory is only removed once the archive is packed, so
+        that a dump which doesn't finish can be resumed.
+
+        """
+
+        import copy
+        import shutil
+        from . import archive, journal
+
+        timer = self.stats.timer
+        staging = self._staging_path()
+        incremental = bool(kwargs.get('incremental')) and os.path.exists(self.path)
+
+        if not (kwargs.get('resume') and journal.exists(staging)):
+            shutil.rmtree(staging, ignore_errors=True)
+            os.makedirs(staging)
+            if incremental:
+                with timer('unpack'):
+                    archive.unpack(self.path, staging)
+
+        # The staged scene shares our graph (and stats).
+        staged = copy.copy(self)
+        staged.path = staging
+        staged.is_archive = False
+        for x in staged.iter_dump(**kwargs):
+            yield x
+        self.dump_summary = staged.dump_summary
+
+        with timer('pack'):
+            self.close()
+            archive.pack(staging, self.path, append=incremental)
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def _staging_path(self):
+        """Where an archive is dumped to before it is packed; the same every time."""
+        import hashlib
+        import tempfile
+        path = self.path if isinstance(self.path, bytes) else self.path.encode('utf8')
+        digest = hashlib.sha1(path).hexdigest()[:16]
+        return os.path.join(tempfile.gettempdir(), 'geod-%s-%s' % (os.path.basename(self.path), digest))
+
+    @property
+    def resumable(self):
+        """If a dump was interrupted, and ``iter_dump(resume=True)`` can finish it."""
+        from . import journal
+        return journal.exists(self._staging_path() if self.is_archive else self.path)
+
+    def _open_archive(self):
+        if self._archive is None:
+            from .archive import Archive
+            self._archive = Archive(self.path)
+            self.stats.count('files_read')
+        return self._archive
+
+    def close(self):
+        """Let go of our archive, if we have it open; it is opened again when needed.
+
+        Loads do this once they are done (and deferred geometry is loaded).
+
+        """
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def _require_directory(self, action):
+        if self.is_archive:
+            raise ValueError('cannot %s an archive; unpack it first' % action)
+
+    def _require_finished(self):
+        from . import journal
+        if journal.exists(self.path):
+            raise ValueError('%s is an unfinished dump; finish it with iter_dump(resume=True)' % self.path)
+
+    def _build_spatial_index(self, entries):
+        """A :class:`geod.spatial.SpatialIndex` of the entries with geometry bounds."""
+
+        from .spatial import SpatialIndex, world_bounds
+        from .transforms import world_from_local
+
+        positions = dict((entry['path'], i) for i, entry in enumerate(entries))
+        parents = [positions.get(entry['parent'], -1) for entry in entries]
+        local = [(entry['meta'].get('transform') or {}).get('local') or IDENTITY for entry in entries]
+        world = world_from_local(local, parents)
+
+        paths = []
+        bounds = []
+        matrices = []
+        points = []
+        faces = []
+        sizes = []
+        blob_sizes = {}
+        for i, entry in enumerate(entries):
+            geo = entry['meta'].get('geometry') or {}
+            if not geo.get('bounds'):
+                continue
+            paths.append(entry['path'].replace(os.sep, '/'))
+            bounds.append(geo['bounds'])
+            matrices.append(world[i])
+            points.append(geo.get('points', 0))
+            faces.append(geo.get('faces', 0))
+            geo_path = self._geometry_path(entry)
+            if geo_path not in blob_sizes:
+                try:
+                    blob_sizes[geo_path] = os.path.getsize(geo_path)
+                except (OSError, TypeError):
+                    blob_sizes[geo_path] = 0
+            sizes.append(blob_sizes[geo_path])
+
+        return SpatialIndex(paths, world_bounds(bounds, matrices), points, faces, sizes)
+
+    def spatial_index(self):
+        """The scene's :class:`geod.spatial.SpatialIndex`, or None if it is missing or stale."""
+        from . import spatial
+        if self.is_archive:
+            return spatial.read_archive(self._open_archive())
+        return spatial.read(self.path)
+
+    def _require_spatial_index(self):
+        spatial_index = self.spatial_index()
+        if spatial_index is None:
+            raise ValueError('%r has no (fresh) spatial index; dump it again' % self.path)
+        return spatial_index
 
-    def dump(self):
-        for _ in self.iter_dump():
+    def query_box(self, lo, hi):
+        """Paths of objects whose world bounds intersect the given box.
+
+        These may be given as ``include`` to :meth:`iter_load`.
+
+        """
+        return self._require_spatial_index().query_box(lo, hi)
+
+    def query_frustum(self, planes):
+        """Paths of objects whose world bounds may be inside the given planes.
+
+        See :meth:`geod.spatial.SpatialIndex.query_frustum`.
+
+        """
+        return self._require_spatial_index().query_frustum(planes)
+
+    def largest(self, count, key='bytes'):
+        """Paths of the ``count`` largest meshes by ``bytes``, ``points`` or ``faces``."""
+        return self._require_spatial_index().largest(count, key)
+
+    def _dump_samples(self, walked, frames, visibility=False):
+        """Sample every object's local transform over the frames, one frame at a time."""
+
+        from .samples import Packer, write
+        from .transforms import as_matrices
+
+        unique = collections.OrderedDict((obj.guid, obj) for _, obj in walked)
+        objects = list(unique.values())
+        positions = dict((guid, i) for i, guid in enumerate(unique))
+        which = [positions[obj.guid] for _, obj in walked]
+
+        matrices = Packer(len(walked))
+        visible = Packer(len(walked)) if visibility else None
+        object_class = self.object_class
+        original = object_class.get_frame()
+        try:
+            for i, frame in enumerate(frames):
+                object_class.set_frame(frame)
+                transforms = object_class.get_transforms_batch(objects)
+                if transforms is None:
+                    transforms = [obj.get_transforms() for obj in objects]
+                local = as_matrices([(x or {}).get('local') or IDENTITY for x in transforms])
+                matrices.add(i, local.reshape(-1, 16)[which])
+                if visible:
+                    flags = [obj.get_visibility() for obj in objects]
+                    visible.add(i, [flags[j] for j in which])
+        finally:
+            object_class.set_frame(original)
+
+        write(self.path, [path for path, _ in walked], frames, matrices.pack(), visible.pack() if visible else None)
+
+    def samples(self):
+        """The scene's :class:`geod.samples.Samples`, or None if it has none."""
+        from .samples import NAME, Samples
+        if self.is_archive:
+            reader = self._open_archive()
+            return Samples.from_arrays(*reader.arrays(NAME)) if NAME in reader else None
+        return Samples.read(self.path)
+
+    def diff(self, other, tolerance=None, use_index=True):
+        """What changed from this scene to ``other`` (a scene or directory).
+
+        Only metas are read (from the indexes, if they are fresh), along
+        with any geometry which has no recorded fingerprint. See
+        :func:`geod.diff.diff` and :class:`geod.diff.SceneDiff`.
+
+        """
+        from .diff import DEFAULT_TOLERANCE, diff
+        return diff(self, other, DEFAULT_TOLERANCE if tolerance is None else tolerance, use_index)
+
+    def iter_reindex(self, meta_codec=None):
+        """Rebuild the index (and spatial index) from the sidecars.
+
+        Yields ``(i, None, path, meta)`` as we go, as the tree is walked
+        rather than counted first. With ``meta_codec``, every sidecar is
+        rewritten with that codec.
+
+        """
+
+        from . import spatial
+
+        self._require_directory('reindex')
+        codec = get_codec(meta_codec) if meta_codec else None
+        index.remove(self.path)
+        spatial.remove(self.path)
+
+        entries = []
+        for i, meta in enumerate(self._iter_metas(use_index=False)):
+            yield i, None, meta['_path'], meta
+            file_path = meta.pop('_filepath')
+            rel_path = os.path.normpath(meta.pop('_path'))
+            old_codec = codec_for_path(file_path)
+            if codec is not None and codec is not old_codec:
+                size = write_object(self._abspath(rel_path), meta, codec=codec)
+                os.unlink(file_path)
+            else:
+                codec = codec or old_codec
+                size = os.path.getsize(file_path)
+            entries.append({
+                'path': rel_path,
+                'parent': os.path.dirname(rel_path) or None,
+                'meta': meta,
+                'fingerprint': meta_fingerprint(meta),
+                'size': size,
+            })
+
+        codec = codec or self.meta_codec
+        spatial.write(self.path, self._build_spatial_index(entries), codec)
+        index.write(self.path, entries, codec)
+
+    def iter_convert(self, geometry_format, quantize=None):
+        """Rewrite every object's geometry in another format (or quantization).
+
+        Sidecars are updated in place, and the index is rebuilt afterwards.
+        Yields ``(i, None, path, meta)`` as we go, as :meth:`iter_reindex`.
+
+        """
+
+        from .formats import get_format_module, read as read_mesh
+        from .spatial import mesh_summary
+
+        self._require_directory('convert')
+        if quantize is True:
+            quantize = {}
+        if quantize is not None and geometry_format != 'geod':
+            raise ValueError('can only quantize the geod geometry format; got %r' % geometry_format)
+        get_format_module(geometry_format)
+
+        # The index is wrong until we are done.
+        index.remove(self.path)
+
+        blob_root = os.path.join(self.path, BLOB_DIR) + os.sep
+        converted_blobs = {}
+        for i, meta in enumerate(self._iter_metas(use_index=False)):
+
+            yield i, None, meta['_path'], meta
+
+            geo = meta.get('geometry') or {}
+            if not geo.get('path'):
+                continue
+            file_path = meta['_filepath']
+            src = os.path.normpath(os.path.join(os.path.dirname(file_path), geo['path']))
+            is_blob = src.startswith(blob_root)
+
+            converted = converted_blobs.get(src)
+            if converted is None:
+
+                if geo.get('format', format_from_path(src)) == geometry_format and quantize is None and not geo.get('quantization'):
+                    continue
+
+                mesh = read_mesh(src, geo.get('format'))
+                new_geo = mesh_summary(mesh)
+                if quantize is not None:
+                    from .quantize import encode as quantize_mesh
+                    mesh = quantize_mesh(mesh, **quantize)
+                    new_geo['quantization'] = dict(
+                        (name, {'encoding': spec['encoding'], 'max_error': spec['max_error']})
+                        for name, spec in mesh.quantization.items()
+                    )
+                new_geo['format'] = geometry_format
+                new_geo['fingerprint'] = mesh_fingerprint(mesh, geometry_format)
+
+                # Written to the side, since the source may be mapped (or
+                # be where the result goes).
+                base = self._blob_base(new_geo['fingerprint']) if is_blob else os.path.splitext(src)[0]
+                makedirs(os.path.dirname(base))
+                tmp_path = write_mesh(mesh, base + '.tmp', geometry_format)
+                dst = base + format_extensions[geometry_format]
+                replace(tmp_path, dst)
+                if dst != src and not is_blob:
+                    os.unlink(src)
+
+                converted = dst, new_geo
+                if is_blob:
+                    converted_blobs[src] = converted
+
+            dst, new_geo = converted
+            geo = dict((k, v) for k, v in geo.items() if k != 'quantization')
+            geo.update(new_geo)
+            geo['path'] = os.path.relpath(dst, os.path.dirname(file_path))
+            meta['geometry'] = geo
+            write_object(os.path.splitext(file_path)[0], dict(
+                (k, v) for k, v in meta.items() if not k.startswith('_')
+            ), codec=codec_for_path(file_path))
+
+        for src, (dst, _) in converted_blobs.items():
+            if src != dst:
+                os.unlink(src)
+
+        for _ in self.iter_reindex():
             pass
 
-    def iter_dump(self):
+    def _get_transforms_batch(self, objects):
+        """Get ``{guid: transforms}`` from the object class, or None."""
+        unique = collections.OrderedDict((obj.guid, obj) for obj in objects)
+        batch = self.object_class.get_transforms_batch(list(unique.values()))
+        if batch is not None:
+            return dict(zip(unique, batch))
+
+    def _add_transform_components(self, objects):
+        """Decompose every local transform at once, for ``set_transforms`` to use."""
+        metas = [obj._meta.get('transform') for obj in objects]
+        if any(metas):
+            from .transforms import add_components
+            add_components(metas)
 
-        # First pass: setup all the basic information.
-        for i, (path, obj) in enumerate(self.walk()):
+    def _remove_object(self, entry):
 
-            yield i, len(self.guid_to_object), path, obj
+        path = self._abspath(entry['path'])
+        to_remove = [path + codec.extension for codec in meta_codecs.values()]
+        geo_path = self._geometry_path(entry)
+        if geo_path and not geo_path.startswith(os.path.join(self.path, BLOB_DIR) + os.sep):
+            to_remove.append(geo_path)
+        for file_path in to_remove:
+            try:
+                os.unlink(file_path)
+            except OSError:
+                pass
 
-            path = self._abspath(path)
-            makedirs(os.path.dirname(path))
+        # Clean up any directories which are now empty.
+        dir_path = os.path.dirname(path)
+        while dir_path.startswith(self.path + os.sep):
+            try:
+                os.rmdir(dir_path)
+            except OSError:
+                break
+            dir_path = os.path.dirname(dir_path)
 
-            meta = obj.get_basic_meta()
-            meta['transform'] = obj.get_transforms()
+    def _entry_files_exist(self, entry):
+        if not os.path.exists(self._abspath(entry['path']) + self.meta_codec.extension):
+            return False
+        geo_path = self._geometry_path(entry)
+        return geo_path is None or os.path.exists(geo_path)
 
-            geo = obj.export_geo(path)
-            if geo:
-                if 'path' in geo:
-                    geo['path'] = os.path.relpath(geo['path'], os.path.dirname(path))
-                meta['geometry'] = geo
+    def _geometry_path(self, entry):
+        geo = entry['meta'].get('geometry') or {}
+        if geo.get('path'):
+            return os.path.normpath(os.path.join(os.path.dirname(self._abspath(entry['path'])), geo['path']))
 
-            with open(path + '.json', 'w') as fh:
-                json.dump(meta, fh, indent=4, sort_keys=True)
+    def _remove_unused_blobs(self, entries):
+        used = set(self._geometry_path(entry) for entry in entries)
+        for dir_path, dir_names, file_names in os.walk(os.path.join(self.path, BLOB_DIR), topdown=False):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                if path not in used:
+                    os.unlink(path)
+            try:
+                os.rmdir(dir_path)
+            except OSError:
+                pass
 
-    def load(self):
-        for _ in self.iter_load():
+    def load(self, **kwargs):
+        for _ in self.iter_load(**kwargs):
             pass
 
-    def iter_load(self):
+    def _iter_metas(self, use_index=True, path_filter=None, verify_index=True):
+
+        if self.is_archive:
+            for meta in self._iter_archive_metas(use_index, path_filter):
+                yield meta
+            return
+
+        self._require_finished()
+        stats = self.stats
+        codec = index.find_codec(self.path) if use_index else None
+        entries = index.read(self.path, verify_index, codec) if codec else None
+        if entries is not None:
+            stats.count('files_read')
+            if stats.enabled:
+                stats.count('bytes_read', os.path.getsize(index.index_path(self.path, codec)))
+            for meta in self._iter_index_metas(entries, codec, path_filter):
+                yield meta
+            return
 
-        # Load all of the objects, and establish relationships.
-        path_to_meta = {}
         for dir_path, dir_names, file_names in os.walk(self.path):
+
+            rel_dir = os.path.relpath(dir_path, self.path)
+            rel_dir = '' if rel_dir == '.' else rel_dir.replace(os.sep, '/') + '/'
+
+            # Don't descend into anything we don't want (or ours).
+            dir_names[:] = [x for x in dir_names if not x.startswith('.') and (
+                not path_filter or path_filter.wants(rel_dir + x)
+            )]
+
             for file_name in file_names:
-                if not file_name.endswith('.json'):
+                if file_name.startswith('.'):
+                    continue
+                codec = codec_for_path(file_name)
+                if codec is None:
+                    continue
+                if path_filter and not path_filter.wants(rel_dir + file_name[:-len(codec.extension)]):
                     continue
 
-                path = os.path.join(dir_path, file_name)
-                with open(path) as fh:
-                    meta = json.load(fh)
-                meta = self._deep_encode(meta)
+                yield self._read_meta(os.path.join(dir_path, file_name), codec)
 
-                meta['_filepath'] = path
-                meta['_path'] = os.path.relpath(os.path.splitext(path)[0], self.path)
-                path_to_meta[meta['_path']] = meta
+    def _iter_index_metas(self, entries, codec, path_filter=None):
+        for entry in entries:
+            if path_filter and not path_filter.wants(entry['path'].replace(os.sep, '/')):
+                continue
+            meta = entry['meta']
+            meta['_path'] = str(entry['path'])
+            meta['_filepath'] = self._abspath(meta['_path']) + codec.extension
+            yield meta
+
+    def _iter_archive_metas(self, use_index=True, path_filter=None):
+        """Metas from the index in our archive, or else from each sidecar in it."""
+
+        from .metacodec import available
+
+        stats = self.stats
+        reader = self._open_archive()
+
+        for name in available() if use_index else ():
+            codec = get_codec(name)
+            member = index.NAME + codec.extension
+            entries = index.decode(reader.read(member), codec) if member in reader else None
+            if entries is not None:
+                stats.count('bytes_read', reader.size(member))
+                for meta in self._iter_index_metas(entries, codec, path_filter):
+                    yield meta
+                return
+
+        for member in reader.names():
+            codec = codec_for_path(member)
+            if codec is None or member.startswith('.') or '/.' in member:
+                continue
+            path = member[:-len(codec.extension)]
+            if path_filter and not path_filter.wants(path):
+                continue
+            data = reader.read(member)
+            stats.count('bytes_read', len(data))
+            meta = codec.loads(data)
+            meta['_path'] = os.path.normpath(path)
+            meta['_filepath'] = self._abspath(path) + codec.extension
+            yield meta
+
+    def _read_meta(self, path, codec):
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        self.stats.count('files_read')
+        self.stats.count('bytes_read', len(data))
+        meta = codec.loads(data)
+        meta['_filepath'] = path
+        meta['_path'] = os.path.relpath(os.path.splitext(path)[0], self.path)
+        return meta
 
+    def iter_load(self, use_index=True, include=None, stream=False, defer_geometry=False, workers=0, executor=None, prefetch=None, prefetch_bytes=None, verify_index=True):
+        """Load the scene, yielding ``(i, total, path, obj)`` as we go.
+
+        Without ``verify_index``, the index is trusted unless the root itself
+        has changed, which saves a ``stat`` of every sidecar and directory
+        (a lot of round trips on a network filesystem), but misses edits made
+        below the root since the dump. See :func:`geod.index.read`.
+
+        ``include`` may be a path prefix or glob (or a list of them) to only
+        load the matching subtrees, and their ancestors. See
+        :class:`geod.filters.PathFilter`.
+
+        With ``stream``, see :meth:`_iter_stream`; the index is not used, and
+        ``total`` is None.
+
+        With ``defer_geometry``, objects only get a placeholder (see
+        :meth:`geod.object.BaseObject.import_placeholder`) until their
+        geometry is asked for with :meth:`load_geometry`.
+
+        With ``workers`` (a thread pool of that many) or a
+        ``concurrent.futures`` ``executor``, geometry is read and decoded
+        ahead of the walk, so this thread only has to create the objects.
+        At most ``prefetch`` meshes, and roughly ``prefetch_bytes`` of them,
+        are decoded ahead at once. See :mod:`geod.prefetch`.
+
+        A ``ProcessPoolExecutor`` decodes in parallel, but is never made for
+        you: within a DCC its workers would be more copies of the DCC, unless
+        ``multiprocessing.set_executable`` first points them at ``mayapy``
+        or ``hython``.
+
+        """
+
+        stats = self.stats
+        timer = stats.timer
+        path_filter = PathFilter(include) if include else None
+
+        if stream and defer_geometry:
+            raise ValueError('cannot defer geometry while streaming')
+        if stream and (workers or executor):
+            raise ValueError('cannot prefetch geometry while streaming')
+        if stream:
+            self._require_directory('stream')
+            for x in self._iter_stream(path_filter):
+                yield x
+            return
+
+        # Load all of the objects, and establish relationships. Parents may be
+        # seen after their children (in the index), so link them afterwards.
+        path_to_meta = {}
+        with timer('read'):
+            for meta in self._iter_metas(use_index, path_filter, verify_index):
                 meta['_children'] = []
-                meta['_parent'] = path_to_meta.get(os.path.dirname(meta['_path']))
-                if meta['_parent']:
-                    meta['_parent']['_children'].append(meta)
+                path_to_meta[meta['_path']] = meta
+        link_start = time.time()
 
-        # Break up combo subnet/geometry/instance nodes (as geometryis not
-        # allowed to have children (by Houdini, and us)).
-        for meta in dict_values(path_to_meta):
+        # Globs can't always tell which ancestors are needed until we have
+        # seen their descendants. Ancestors which we only need for their
+        # transforms don't get their geometry.
+        if path_filter:
+            needed = set()
+            for path in path_to_meta:
+                if path_filter.selects(path.replace(os.sep, '/')):
+                    while path and path not in needed:
+                        needed.add(path)
+                        path = os.path.dirname(path)
+            for path, meta in list(path_to_meta.items()):
+                if path not in needed:
+                    del path_to_meta[path]
+                elif not path_filter.selects(path.replace(os.sep, '/')):
+                    meta.pop('geometry', None)
 
-            if meta.get('_children') and meta.get('geometry'):
+        for meta in dict_values(path_to_meta):
+            meta['_parent'] = path_to_meta.get(os.path.dirname(meta['_path']))
+            if meta['_parent']:
+                meta['_parent']['_children'].append(meta)
 
-                geo = copy.deepcopy(meta)
-                geo.pop('transform', None)
+        # Break up combo subnet/geometry/instance nodes.
+        for meta in dict_values(path_to_meta):
 
-                geo['name'] += 'Geo'
-                geo['_path'] = os.path.join(geo['_path'], geo['name'])
+            if meta.get('_children') and meta.get('geometry'):
+                geo = self._split_geometry(meta)
                 path_to_meta[geo['_path']] = geo
-                geo['_children'] = []
-                geo['_parent'] = meta
                 meta['_children'].append(geo)
 
-                meta.pop('geometry', None)
-
 
         # Get the root nodes.
-        root_paths = set(path_to_meta)
-        for meta in dict_itervalues(path_to_meta):
-            for child in meta['_children']:
-                try:
-                    root_paths.remove(child['_path'])
-                except KeyError:
-                    pass
+        root_paths = [path for path, meta in path_to_meta.items() if not meta['_parent']]
+        stats.add_time('link', time.time() - link_start)
 
         # Create all of the nodes in the right order.
-        to_visit = [path_to_meta[path] for path in sorted(root_paths)]
-        visited = set()
-        while to_visit:
-            meta = to_visit.pop(0)
-            if meta['_path'] in visited:
-                continue
-            visited.add(meta['_path'])
+        with timer('create'):
+            to_visit = collections.deque(path_to_meta[path] for path in sorted(root_paths))
+            visited = set()
+            while to_visit:
+                meta = to_visit.popleft()
+                if meta['_path'] in visited:
+                    continue
+                visited.add(meta['_path'])
 
-            obj = self.object_class.from_meta(meta, (meta.get('_parent') or {}).get('_object'))
+                obj = self.object_class.from_meta(meta, (meta.get('_parent') or {}).get('_object'))
 
-            meta['_object'] = obj
-            obj._meta = meta
-            self.add_object(obj)
+                meta['_object'] = obj
+                obj._meta = meta
+                self.add_object(obj)
 
-            to_visit.extend(meta['_children'])
+                to_visit.extend(meta['_children'])
 
         # Re-establish the heirarchy.
         self.finalize_graph()
 
-        # Restore transforms and load geometry.
-        for i, (path, obj) in enumerate(self.walk()):
+        # Restore transforms and load geometry. Objects which share geometry
+        # (e.g. deduplicated blobs) are told who loaded it first.
+        walked = list(self.walk())
+        with timer('decompose'):
+            self._add_transform_components(obj for _, obj in walked)
 
-            yield i, len(self.guid_to_object), path, obj
+        owns_executor = False
+        if (workers or executor) and not defer_geometry:
+            if executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                executor = ThreadPoolExecutor(workers)
+                owns_executor = True
+            with timer('prefetch'):
+                self._prefetcher = self._start_prefetch(walked, executor, prefetch, prefetch_bytes, workers)
 
-            transforms = obj._meta.get('transform')
-            if transforms:
-                print('Setting transform on', obj.guid)
-                obj.set_transforms(transforms)
+        try:
+            for i, (path, obj) in enumerate(walked):
+                yield i, len(self.guid_to_object), path, obj
+                self._restore_object(path, obj, self._geometry_sources, defer_geometry=defer_geometry)
+        finally:
+            if self._prefetcher is not None:
+                self._prefetcher.close()
+                self._prefetcher = None
+            if owns_executor:
+                executor.shutdown(wait=True)
+            if not self._deferred:
+                self.close()
+
+    def _start_prefetch(self, walked, executor, depth=None, max_bytes=None, workers=0):
+        """A :class:`geod.prefetch.Prefetcher` of the walked objects' geometry, in order."""
+
+        from concurrent.futures import ProcessPoolExecutor
+        from .prefetch import BATCH_SIZE, DEFAULT_MAX_BYTES, Prefetcher, shared_memory_available
+
+        # Threads read through our own archive, and processes open their own.
+        processes = isinstance(executor, ProcessPoolExecutor)
+        reader = self._open_archive() if self.is_archive else None
+        cache = self.geometry_cache
+        seen = set(self._geometry_sources)
+        sources = []
+        for _, obj in walked:
+            geometry = obj._meta.get('geometry') or {}
+            if not geometry.get('path'):
+                continue
+            geo_path = self._geometry_file(obj._meta, geometry)
+            if geo_path in seen:
+                continue
+            seen.add(geo_path)
+            format_ = geometry.get('format') or format_from_path(geo_path)
+            if reader is not None:
+                member = member_name(geo_path[len(self.path) + 1:])
+                sources.append((geo_path, (self.path if processes else reader, member), format_, reader.size(member)))
+            elif cache is None or geo_path not in cache:
+                sources.append((geo_path, geo_path, format_, None))
+
+        shared = processes and shared_memory_available()
+        # A few batches for every worker.
+        depth = depth or 4 * BATCH_SIZE * (workers or 4)
+        return Prefetcher(executor, sources, depth, max_bytes or DEFAULT_MAX_BYTES, shared)
+
+    def _geometry_file(self, meta, geometry):
+        return os.path.normpath(os.path.join(os.path.dirname(meta['_filepath']), geometry['path']))
+
+    def _import_geometry(self, obj, geometry, sources, blobs_only=False):
 
-            geometry = obj._meta.get('geometry')
-            if geometry:
-                path = geometry.get('path')
-                if path:
-                    geometry['path'] = os.path.join(os.path.dirname(obj._meta['_filepath']), path)
-                obj.import_geo(geometry)
-
-
-    def _deep_encode(self, x):
-        if isinstance(x, dict):
-            return dict((self._deep_encode(k), self._deep_encode(v)) for k, v in x.iteritems())
-        elif isinstance(x, list):
-            return [self._deep_encode(y) for y in x]
-        elif isinstance(x, unicode):
-            return x.encode('ascii')
+        stats = self.stats
+        geo_path = geometry.get('path')
+        if geo_path:
+            source = sources.get(geo_path)
+            if source is not None:
+                geometry['_source'] = source
+            else:
+                if not blobs_only or geo_path.startswith(os.path.join(self.path, BLOB_DIR) + os.sep):
+                    sources[geo_path] = obj
+                prefetcher = self._prefetcher
+                if prefetcher is not None and geo_path in prefetcher:
+                    # Decoded by the pool, though we may still have to wait.
+                    with stats.timer('wait_geometry'):
+                        geometry['_mesh'] = prefetcher.get(geo_path)
+                    stats.count('prefetched')
+                    if self.geometry_cache is not None and not self.is_archive:
+                        self.geometry_cache.add(geo_path, geometry['_mesh'])
+                elif self.is_archive:
+                    # Objects can't read from inside the archive themselves.
+                    reader = self._open_archive()
+                    member = member_name(geo_path[len(self.path) + 1:])
+                    with stats.timer('read_geometry'):
+                        geometry['_mesh'] = reader.mesh(member, geometry['format'])
+                    stats.count('bytes_read', reader.size(member))
+                else:
+                    hit = False
+                    if self.geometry_cache is not None:
+                        with stats.timer('read_geometry'):
+                            geometry['_mesh'], hit = self.geometry_cache.lookup(geo_path, geometry['format'])
+                        stats.count('cache_hits' if hit else 'cache_misses')
+                    if stats.enabled and not hit:
+                        stats.count('files_read')
+                        stats.count('bytes_read', os.path.getsize(geo_path))
+
+        with stats.timer('geometry'):
+            obj.import_geo(geometry)
+
+        # The cache (if any) holds on to the mesh, not us.
+        geometry.pop('_mesh', None)
+
+    def load_geometry(self, objects=None, include=None):
+        """Import geometry which was deferred by :meth:`iter_load`.
+
+        Either all of it, that of the given ``objects``, or that of the
+        objects selected by ``include`` (as in :meth:`iter_load`, e.g. the
+        paths from :meth:`query_box`). Returns how many objects were done.
+
+        """
+
+        if objects is not None:
+            guids = [obj.guid for obj in objects]
         else:
-            return x
+            path_filter = PathFilter(include) if include else None
+            guids = [
+                guid for guid, (path, _, _) in self._deferred.items()
+                if not path_filter or path_filter.selects(path.replace(os.sep, '/'))
+            ]
+
+        count = 0
+        for guid in guids:
+            deferred = self._deferred.pop(guid, None)
+            if deferred is None:
+                continue
+            path, obj, geometry = deferred
+            self._import_geometry(obj, geometry, self._geometry_sources)
+            count += 1
+        if not self._deferred:
+            self.close()
+        return count
+
+    @property
+    def deferred_objects(self):
+        """Objects whose geometry has not been loaded yet."""
+        return [obj for _, obj, _ in dict_values(self._deferred)]
+
+    def _iter_stream(self, path_filter=None):
+        """Load the scene directory by directory, in topological order.
+
+        Objects are created as soon as their parent is, and let go of (along
+        with their metas) once they are done, so memory is bounded by the
+        depth and breadth of the hierarchy rather than the number of objects.
+        They are not kept in :attr:`guid_to_object`.
 
+        With a glob filter, ancestors which could lead to a match are created
+        before we know if anything below them does.
 
+        """
 
+        self._require_finished()
+        stats = self.stats
+        timer = stats.timer
+        blob_sources = {}
+        i = 0
+
+        # Directories still to read, and the object their sidecars are the
+        # children of. Popping the last one makes this depth-first.
+        to_read = [('', None)]
+        while to_read:
+
+            rel_dir, parent = to_read.pop()
+
+            with timer('read'):
+                dir_path = os.path.join(self.path, rel_dir)
+                try:
+                    names = sorted(os.listdir(dir_path))
+                except OSError:
+                    continue
+                prefix = rel_dir.replace(os.sep, '/') + '/' if rel_dir else ''
+                metas = []
+                dir_names = set()
+                for name in names:
+                    if name.startswith('.'):
+                        continue
+                    path = os.path.join(dir_path, name)
+                    if os.path.isdir(path):
+                        if not path_filter or path_filter.wants(prefix + name):
+                            dir_names.add(name)
+                        continue
+                    codec = codec_for_path(name)
+                    if codec is None:
+                        continue
+                    if path_filter and not path_filter.wants(prefix + name[:-len(codec.extension)]):
+                        continue
+                    metas.append(self._read_meta(path, codec))
+
+            with timer('create'):
+                created = []
+                children = {}
+                for meta in metas:
+                    if path_filter and not path_filter.selects(meta['_path'].replace(os.sep, '/')):
+                        meta.pop('geometry', None)
+                    obj = self.object_class.from_meta(meta, parent)
+                    obj._meta = meta
+                    created.append((meta['_path'], obj))
+                    children[os.path.basename(meta['_path'])] = obj
+                    # Geometry would not be allowed to have this directory's
+                    # children, so they get a geometry child of their own.
+                    if meta.get('geometry') and os.path.basename(meta['_path']) in dir_names:
+                        geo = self._split_geometry(meta)
+                        geo_obj = self.object_class.from_meta(geo, obj)
+                        geo_obj._meta = geo
+                        created.append((geo['_path'], geo_obj))
+
+            with timer('decompose'):
+                self._add_transform_components(obj for _, obj in created)
+
+            for path, obj in created:
+                yield i, None, path, obj
+                i += 1
+                self._restore_object(path, obj, blob_sources, blobs_only=True)
+                obj._meta = None
+            del created, metas
+
+            # Directories without a sidecar hold roots, as in iter_load.
+            for name in sorted(dir_names, reverse=True):
+                to_read.append((os.path.join(rel_dir, name), children.get(name)))
+
+    def _split_geometry(self, meta):
+        """Move the geometry of an object with children onto a new child meta.
+
+        Geometry is not allowed to have children (by Houdini, and us), so
+        combo subnet/geometry/instance nodes are broken up.
+
+        """
+
+        # Nothing else touches the rest of the meta, and the geometry is
+        # handed over, so a shallow copy will do.
+        geo = dict((k, v) for k, v in meta.items() if k not in ('_children', '_parent', 'transform'))
+        geo['name'] += 'Geo'
+        geo['_path'] = os.path.join(geo['_path'], geo['name'])
+        geo['_children'] = []
+        geo['_parent'] = meta
+        meta.pop('geometry', None)
+        return geo
+
+    def _restore_object(self, path, obj, sources, blobs_only=False, defer_geometry=False):
+        """Restore an object's transforms and load its geometry.
+
+        Objects which share geometry (e.g. deduplicated blobs) are told who
+        loaded it first, via ``sources``; with ``blobs_only`` only blobs are
+        remembered there. With ``defer_geometry``, the object only gets a
+        placeholder, and the geometry is kept for :meth:`load_geometry`.
+
+        """
+
+        stats = self.stats
+        timer = stats.timer
+        start = time.time()
+        stats.count('objects')
+
+        transforms = obj._meta.get('transform')
+        if transforms:
+            with timer('transforms'):
+                obj.set_transforms(transforms)
 
+        geometry = obj._meta.get('geometry')
+        if geometry:
+            geo_path = geometry.get('path')
+            if geo_path:
+                # Older scenes did not record their format.
+                geometry.setdefault('format', format_from_path(geo_path))
+                geometry['path'] = self._geometry_file(obj._meta, geometry)
+            if defer_geometry:
+                with timer('placeholders'):
+                    obj.import_placeholder(geometry)
+                self._deferred[obj.guid] = (path, obj, geometry)
+            else:
+                self._import_geometry(obj, geometry, sources, blobs_only)
 
+        stats.object_done(path, obj, time.time() - start)
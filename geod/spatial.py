@@ -0,0 +1,314 @@
+"""Bounds and sizes of every object, and a BVH over them, for culling.
+
+:meth:`Scene.iter_dump` records the local ``bounds`` and ``points`` and
+``faces`` counts in each geometry meta (see :func:`mesh_summary`), and then
+writes a :class:`SpatialIndex` of every object with geometry alongside the
+index. That holds their world bounds, counts and geometry sizes in bytes,
+so tools can decide what to load without opening any geometry, e.g.::
+
+    scene.load(include=scene.query_box((-10, -10, -10), (10, 10, 10)))
+
+Bounds are ``[[xmin, ymin, zmin], [xmax, ymax, zmax]]``. The BVH nodes are
+stored depth-first, so the left child of a node is the next one along.
+
+"""
+
+import os
+
+import numpy as np
+
+from . import index
+from .metacodec import available as available_codecs, codecs, get_codec
+from .utils import replace
+
+
+NAME = '.bounds'
+VERSION = 1
+
+# Objects per BVH leaf.
+LEAF_SIZE = 4
+
+
+def mesh_summary(mesh):
+    """The bounds and counts of a mesh, for its geometry meta."""
+    summary = {
+        'points': int(mesh.point_count),
+        'faces': int(mesh.face_count),
+    }
+    bounds = mesh.bounds()
+    if bounds is not None:
+        summary['bounds'] = [[float(x) for x in bounds[0]], [float(x) for x in bounds[1]]]
+    return summary
+
+
+def world_bounds(local, matrices):
+    """Transform (N, 2, 3) local bounds by (N, 4, 4) matrices, as (N, 2, 3)."""
+
+    local = np.asarray(local, dtype=np.float64).reshape(-1, 2, 3)
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+
+    # All eight corners, as row vectors.
+    pick = np.array([[i & 1, (i >> 1) & 1, (i >> 2) & 1] for i in range(8)])
+    corners = local[:, pick, [0, 1, 2]]
+    world = np.matmul(corners, matrices[:, :3, :3]) + matrices[:, None, 3, :3]
+    return np.stack([world.min(axis=1), world.max(axis=1)], axis=1)
+
+
+def build_bvh(bounds):
+    """Build a BVH over (N, 2, 3) bounds.
+
+    Returns ``(order, nodes)``, where ``order`` is a permutation of the
+    objects so that every leaf holds a contiguous run of them, and ``nodes``
+    is a dict of arrays: ``min`` and ``max``, the ``first`` object and
+    ``count`` of leaves (zero for inner nodes), and the ``right`` child of
+    inner nodes.
+
+    """
+
+    bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 2, 3)
+    centers = bounds.mean(axis=1)
+    order = np.arange(len(bounds))
+
+    mins = []
+    maxs = []
+    firsts = []
+    counts = []
+    rights = []
+
+    # Node index to fill in the right child of, and the range of ``order``.
+    stack = [(None, 0, len(bounds))]
+    while stack:
+
+        parent, start, stop = stack.pop()
+        node = len(mins)
+        if parent is not None:
+            rights[parent] = node
+
+        members = order[start:stop]
+        mins.append(bounds[members, 0].min(axis=0) if len(members) else np.zeros(3))
+        maxs.append(bounds[members, 1].max(axis=0) if len(members) else np.zeros(3))
+        rights.append(-1)
+
+        if stop - start <= LEAF_SIZE:
+            firsts.append(start)
+            counts.append(stop - start)
+            continue
+        firsts.append(0)
+        counts.append(0)
+
+        # Split at the median along the widest spread of centers.
+        spread = centers[members]
+        axis = int(np.argmax(spread.max(axis=0) - spread.min(axis=0)))
+        middle = (stop - start) // 2
+        order[start:stop] = members[np.argpartition(spread[:, axis], middle)]
+
+        # The left child is pushed last, so it comes next.
+        stack.append((node, start + middle, stop))
+        stack.append((None, start, start + middle))
+
+    return order, {
+        'min': np.array(mins).reshape(-1, 3),
+        'max': np.array(maxs).reshape(-1, 3),
+        'first': np.array(firsts, dtype=np.intp),
+        'count': np.array(counts, dtype=np.intp),
+        'right': np.array(rights, dtype=np.intp),
+    }
+
+
+class SpatialIndex(object):
+
+    """World bounds, counts and sizes of the objects with geometry in a scene.
+
+    :param paths: Object paths, relative to the scene, with ``/`` separators.
+    :param bounds: Their (N, 2, 3) world bounds.
+    :param points: Their point counts.
+    :param faces: Their face counts.
+    :param nbytes: The sizes of their geometry files.
+
+    """
+
+    def __init__(self, paths, bounds, points, faces, nbytes, nodes=None):
+        self.paths = list(paths)
+        self.bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 2, 3)
+        self.sizes = {
+            'points': np.asarray(points, dtype=np.int64),
+            'faces': np.asarray(faces, dtype=np.int64),
+            'bytes': np.asarray(nbytes, dtype=np.int64),
+        }
+        if nodes is None:
+            order, nodes = build_bvh(self.bounds)
+            self._reorder(order)
+        self.nodes = dict((k, np.asarray(v)) for k, v in nodes.items())
+        self._ranked = {}
+        self._lists = None
+
+    def _reorder(self, order):
+        self.paths = [self.paths[i] for i in order]
+        self.bounds = self.bounds[order]
+        for key, values in self.sizes.items():
+            self.sizes[key] = values[order]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _query(self, rejects):
+        # Plain lists are much faster than NumPy for poking at single boxes.
+        if self._lists is None:
+            nodes = self.nodes
+            self._lists = (
+                nodes['min'].tolist(),
+                nodes['max'].tolist(),
+                nodes['first'].tolist(),
+                nodes['count'].tolist(),
+                nodes['right'].tolist(),
+                self.bounds.tolist(),
+            )
+        mins, maxs, firsts, counts, rights, bounds = self._lists
+
+        found = []
+        stack = [0] if self.paths else []
+        while stack:
+            node = stack.pop()
+            if rejects(mins[node], maxs[node]):
+                continue
+            if counts[node]:
+                for i in range(firsts[node], firsts[node] + counts[node]):
+                    if not rejects(*bounds[i]):
+                        found.append(self.paths[i])
+            else:
+                stack.append(rights[node])
+                stack.append(node + 1)
+        return found
+
+    def query_box(self, lo, hi):
+        """Paths of objects whose bounds intersect the given box."""
+
+        lo = [float(x) for x in lo]
+        hi = [float(x) for x in hi]
+
+        def rejects(node_lo, node_hi):
+            return (
+                node_lo[0] > hi[0] or node_hi[0] < lo[0] or
+                node_lo[1] > hi[1] or node_hi[1] < lo[1] or
+                node_lo[2] > hi[2] or node_hi[2] < lo[2]
+            )
+
+        return self._query(rejects)
+
+    def query_frustum(self, planes):
+        """Paths of objects whose bounds may intersect a convex volume.
+
+        ``planes`` are ``(a, b, c, d)``, with the inside where
+        ``a*x + b*y + c*z + d >= 0`` (e.g. the six planes of a frustum).
+        As usual, boxes near the corners may be kept when they are outside.
+
+        """
+
+        planes = [[float(x) for x in plane] for plane in planes]
+
+        def rejects(lo, hi):
+            for a, b, c, d in planes:
+                # The corner furthest along the plane's normal.
+                x = hi[0] if a >= 0 else lo[0]
+                y = hi[1] if b >= 0 else lo[1]
+                z = hi[2] if c >= 0 else lo[2]
+                if a * x + b * y + c * z + d < 0:
+                    return True
+            return False
+
+        return self._query(rejects)
+
+    def largest(self, count, key='bytes'):
+        """Paths of the ``count`` largest objects by ``bytes``, ``points`` or ``faces``."""
+        try:
+            values = self.sizes[key]
+        except KeyError:
+            raise ValueError('unknown size %r' % key)
+        ranked = self._ranked.get(key)
+        if ranked is None:
+            ranked = self._ranked[key] = np.argsort(-values, kind='stable')
+        return [self.paths[i] for i in ranked[:count]]
+
+    def as_dict(self):
+        return {
+            'version': VERSION,
+            'paths': self.paths,
+            'bounds': self.bounds.reshape(-1, 6).tolist(),
+            'points': self.sizes['points'].tolist(),
+            'faces': self.sizes['faces'].tolist(),
+            'bytes': self.sizes['bytes'].tolist(),
+            'nodes': {
+                'min': self.nodes['min'].tolist(),
+                'max': self.nodes['max'].tolist(),
+                'first': self.nodes['first'].tolist(),
+                'count': self.nodes['count'].tolist(),
+                'right': self.nodes['right'].tolist(),
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['paths'], data['bounds'], data['points'], data['faces'], data['bytes'], data['nodes'])
+
+
+def spatial_path(root, codec=None):
+    return os.path.join(root, NAME + (codec or codecs['json']).extension)
+
+
+def remove(root):
+    for codec in codecs.values():
+        try:
+            os.unlink(spatial_path(root, codec))
+        except OSError:
+            pass
+
+
+def write(root, spatial, codec=None):
+    """Write the spatial index; this must happen before the index is written."""
+    codec = codec or codecs['json']
+    path = spatial_path(root, codec)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as fh:
+        fh.write(codec.dumps(spatial.as_dict()))
+    replace(tmp_path, path)
+
+
+def read(root):
+    """Read the spatial index, or return None if it is missing or stale.
+
+    It is only as fresh as the index which was written after it.
+
+    """
+
+    for name in available_codecs():
+        codec = get_codec(name)
+        path = spatial_path(root, codec)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        index_stat = index.fresh_stat(root, codec)
+        if index_stat is None or stat.st_mtime > index_stat.st_mtime:
+            return
+        with open(path, 'rb') as fh:
+            return _decode(fh.read(), codec)
+
+
+def read_archive(archive):
+    """Read the spatial index from a :class:`geod.archive.Archive`, or return None.
+
+    Archives are packed once the index is written, so it is always fresh.
+
+    """
+    for name in available_codecs():
+        codec = get_codec(name)
+        member = NAME + codec.extension
+        if member in archive:
+            return _decode(archive.read(member), codec)
+
+
+def _decode(data, codec):
+    data = codec.loads(data)
+    if data.get('version') != VERSION:
+        return
+    return SpatialIndex.from_dict(data)
@@ -0,0 +1,121 @@
+"""Opt-in timing and counters for dumping and loading scenes.
+
+A :class:`Stats` gathers the wall time spent in each phase, counters (e.g.
+bytes and files read or written), and the slowest objects. Scenes use
+:data:`null_stats` when they are not asked for any, which does nothing.
+
+Phases may be timed on worker threads, so (like ``write``) they can add up
+to more than the wall time of the whole dump.
+
+"""
+
+import contextlib
+import heapq
+import threading
+import time
+
+
+class Stats(object):
+
+    """Timing and counters for one or more dumps or loads.
+
+    :param slowest: How many of the slowest objects to keep.
+    :param hooks: Callables called as ``hook(stats, path, obj)`` after each
+        object is done with.
+
+    """
+
+    enabled = True
+
+    def __init__(self, slowest=10, hooks=None):
+        self.phases = {}
+        self.counters = {}
+        self.slowest_count = slowest
+        self._slowest = []
+        self.hooks = list(hooks or ())
+        self._lock = threading.Lock()
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def timer(self, phase):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.time() - start)
+
+    def count(self, counter, value=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def object_done(self, path, obj, seconds):
+        """Record how long an object took, and call the hooks."""
+        entry = (seconds, path)
+        if len(self._slowest) < self.slowest_count:
+            heapq.heappush(self._slowest, entry)
+        elif self._slowest and entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+        for hook in self.hooks:
+            hook(self, path, obj)
+
+    @property
+    def slowest(self):
+        """``(seconds, path)`` of the slowest objects, slowest first."""
+        return sorted(self._slowest, reverse=True)
+
+    def as_dict(self):
+        return {
+            'phases': dict(self.phases),
+            'counters': dict(self.counters),
+            'slowest': [{'path': path, 'seconds': seconds} for seconds, path in self.slowest],
+        }
+
+    def format(self):
+        """A human readable summary, e.g. for logs."""
+        lines = ['phases:']
+        for phase, seconds in sorted(self.phases.items(), key=lambda x: -x[1]):
+            lines.append('    %-16s %8.3fs' % (phase, seconds))
+        lines.append('counters:')
+        for counter, value in sorted(self.counters.items()):
+            lines.append('    %-16s %d' % (counter, value))
+        if self._slowest:
+            lines.append('slowest:')
+            for seconds, path in self.slowest:
+                lines.append('    %8.3fs %s' % (seconds, path))
+        return '\n'.join(lines)
+
+
+class NullStats(object):
+
+    """Stats which ignore everything, for when they are not wanted."""
+
+    enabled = False
+    hooks = ()
+
+    def add_time(self, phase, seconds):
+        pass
+
+    def timer(self, phase):
+        return _null_timer
+
+    def count(self, counter, value=1):
+        pass
+
+    def object_done(self, path, obj, seconds):
+        pass
+
+
+class _NullTimer(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+
+_null_timer = _NullTimer()
+null_stats = NullStats()
@@ -0,0 +1,323 @@
+"""Batched transform math for whole hierarchies.
+
+Matrices are as stored in the ``transform`` meta: 16 values in row-major
+order, for row vectors (so translation is in the last row, and a child's
+world matrix is its local matrix times its parent's world matrix).
+Hierarchies are given as an array of parent indices, with -1 for roots.
+
+Decomposition follows Houdini's default ``srt`` transform order and ``xyz``
+rotation order, with shears (``xy``, ``xz``, ``yz``) applied between the
+scale and rotation, and rotations in degrees::
+
+    M = scale * shear * rotate_x * rotate_y * rotate_z * translate
+
+"""
+
+import numpy as np
+
+
+def as_matrices(values):
+    """An (N, 4, 4) array from a sequence of 16-value (or 4x4) matrices."""
+    return np.asarray(values, dtype=np.float64).reshape(-1, 4, 4)
+
+
+def as_lists(matrices):
+    """The inverse of :func:`as_matrices`, for storing in metas."""
+    return np.asarray(matrices).reshape(-1, 16).tolist()
+
+
+def local_from_world(world, parents):
+    """Local matrices from world matrices and parent indices.
+
+    Every parent is inverted once, however many children it has.
+
+    """
+
+    world = as_matrices(world)
+    parents = np.asarray(parents, dtype=np.intp)
+    local = world.copy()
+
+    has_parent = parents >= 0
+    if has_parent.any():
+        unique, inverse = np.unique(parents[has_parent], return_inverse=True)
+        inverted = np.linalg.inv(world[unique])
+        local[has_parent] = np.matmul(world[has_parent], inverted[inverse])
+
+    return local
+
+
+def depths(parents):
+    """The depth of each node (roots are 0), by pointer jumping.
+
+    Each pass doubles how far up the hierarchy every node has looked, so
+    this takes ``log2(max depth)`` passes.
+
+    """
+
+    parents = np.asarray(parents, dtype=np.intp)
+    depth = (parents >= 0).astype(np.intp)
+    ancestor = parents.copy()
+    while True:
+        active = np.flatnonzero(ancestor >= 0)
+        if not len(active):
+            return depth
+        jump = ancestor[active]
+        depth[active] = depth[active] + depth[jump]
+        ancestor[active] = ancestor[jump]
+
+
+def world_from_local(local, parents):
+    """World matrices from local matrices and parent indices.
+
+    This takes one batch of multiplications per level of the hierarchy.
+
+    """
+
+    world = as_matrices(local).copy()
+    parents = np.asarray(parents, dtype=np.intp)
+    if not len(parents):
+        return world
+
+    depth = depths(parents)
+    order = np.argsort(depth, kind='stable')
+    bounds = np.searchsorted(depth[order], np.arange(1, depth.max() + 2))
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        level = order[start:stop]
+        world[level] = np.matmul(world[level], world[parents[level]])
+
+    return world
+
+
+def decompose(matrices):
+    """Split matrices into translate, rotate, scale and shear components.
+
+    Returns a dict of (N, 3) arrays. Negative determinants are taken up by
+    negating all of the scales.
+
+    """
+
+    translate, rotation, scale, shear = _decompose(matrices)
+    return {
+        'translate': translate,
+        'rotate': np.degrees(_euler_xyz(rotation)),
+        'scale': scale,
+        'shear': shear,
+    }
+
+
+def _decompose(matrices):
+    # As decompose, but with the rotation as (N, 3, 3) matrices.
+
+    matrices = as_matrices(matrices)
+    translate = matrices[:, 3, :3].copy()
+    r0 = matrices[:, 0, :3]
+    r1 = matrices[:, 1, :3]
+    r2 = matrices[:, 2, :3]
+
+    def norm(x):
+        return np.sqrt((x * x).sum(axis=1))
+
+    def dot(a, b):
+        return (a * b).sum(axis=1)
+
+    def unit(x, length):
+        return x / np.where(length > 0, length, 1)[:, None]
+
+    # Gram-Schmidt, pulling out the shears as we go.
+    sx = norm(r0)
+    u0 = unit(r0, sx)
+    xy = dot(u0, r1)
+    r1 = r1 - xy[:, None] * u0
+    sy = norm(r1)
+    u1 = unit(r1, sy)
+    xz = dot(u0, r2)
+    yz = dot(u1, r2)
+    r2 = r2 - xz[:, None] * u0 - yz[:, None] * u1
+    sz = norm(r2)
+    u2 = unit(r2, sz)
+
+    safe_sy = np.where(sy > 0, sy, 1)
+    safe_sz = np.where(sz > 0, sz, 1)
+    shear = np.column_stack([xy / safe_sy, xz / safe_sz, yz / safe_sz])
+    scale = np.column_stack([sx, sy, sz])
+
+    rotation = np.stack([u0, u1, u2], axis=1)
+    flip = np.linalg.det(rotation) < 0
+    scale[flip] *= -1
+    rotation[flip] *= -1
+
+    return translate, rotation, scale, shear
+
+
+def _euler_xyz(rotation):
+
+    sin_y = np.clip(-rotation[:, 0, 2], -1, 1)
+    y = np.arcsin(sin_y)
+    cos_y = np.sqrt(1 - sin_y * sin_y)
+
+    x = np.arctan2(rotation[:, 1, 2], rotation[:, 2, 2])
+    z = np.arctan2(rotation[:, 0, 1], rotation[:, 0, 0])
+
+    # In gimbal lock only x + z (or x - z) is known, so put it all in x.
+    locked = cos_y < 1e-9
+    if locked.any():
+        x[locked] = np.arctan2(rotation[locked, 1, 0] * sin_y[locked], rotation[locked, 1, 1])
+        z[locked] = 0
+
+    return np.column_stack([x, y, z])
+
+
+def compose(translate, rotate, scale, shear=None):
+    """Build (N, 4, 4) matrices from components, as in :func:`decompose`."""
+
+    translate = np.asarray(translate, dtype=np.float64).reshape(-1, 3)
+    rx, ry, rz = np.radians(np.asarray(rotate, dtype=np.float64).reshape(-1, 3)).T
+    scale = np.asarray(scale, dtype=np.float64).reshape(-1, 3)
+    count = max(len(translate), len(rx), len(scale))
+
+    def rotation(axis, angle):
+        c = np.cos(angle)
+        s = np.sin(angle)
+        m = np.zeros((len(angle), 3, 3))
+        i, j = [k for k in range(3) if k != axis]
+        m[:, axis, axis] = 1
+        m[:, i, i] = c
+        m[:, j, j] = c
+        # Row vectors; the sign of y's is flipped by the axis ordering.
+        sign = -1 if axis == 1 else 1
+        m[:, i, j] = sign * s
+        m[:, j, i] = -sign * s
+        return m
+
+    m = np.matmul(np.matmul(rotation(0, rx), rotation(1, ry)), rotation(2, rz))
+    return _compose(translate, m, scale, shear, count)
+
+
+def _compose(translate, m, scale, shear=None, count=None):
+    # As compose, but with the rotation as (N, 3, 3) matrices.
+
+    if count is None:
+        count = len(m)
+
+    if shear is not None:
+        xy, xz, yz = np.asarray(shear, dtype=np.float64).reshape(-1, 3).T
+        h = np.zeros((len(xy), 3, 3))
+        h[:, 0, 0] = h[:, 1, 1] = h[:, 2, 2] = 1
+        h[:, 1, 0] = xy
+        h[:, 2, 0] = xz
+        h[:, 2, 1] = yz
+        m = np.matmul(h, m)
+
+    m = m * scale[:, :, None]
+
+    out = np.zeros((count, 4, 4))
+    out[:, :3, :3] = m
+    out[:, 3, :3] = translate
+    out[:, 3, 3] = 1
+    return out
+
+
+def interpolate(a, b, weight):
+    """Blend matrices by their components, as (N, 4, 4).
+
+    Translate, scale and shear are blended linearly, and rotation along the
+    shortest arc (i.e. by slerp), so that a spinning object does not shrink
+    on its way around as it would if the matrices were blended directly.
+
+    """
+
+    weight = np.asarray(weight, dtype=np.float64).reshape(-1)[:, None]
+    a = _decompose(a)
+    b = _decompose(b)
+
+    def lerp(x, y):
+        return x + (y - x) * weight
+
+    rotation = _matrices_from_quaternions(_slerp(
+        _quaternions_from_matrices(a[1]),
+        _quaternions_from_matrices(b[1]),
+        weight,
+    ))
+    return _compose(lerp(a[0], b[0]), rotation, lerp(a[2], b[2]), lerp(a[3], b[3]))
+
+
+def _quaternions_from_matrices(m):
+    # (N, 4) unit quaternions as (w, x, y, z), from (N, 3, 3) rotations. Each
+    # is found from the largest of its components for precision (Shepperd).
+
+    m00, m11, m22 = m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]
+    sums = np.column_stack([
+        m00 + m11 + m22,
+        m00 - m11 - m22,
+        m11 - m00 - m22,
+        m22 - m00 - m11,
+    ])
+    largest = sums.argmax(axis=1)
+    s = 2 * np.sqrt(np.maximum(1 + sums[np.arange(len(m)), largest], 1e-300))
+
+    wx = m[:, 2, 1] - m[:, 1, 2]
+    wy = m[:, 0, 2] - m[:, 2, 0]
+    wz = m[:, 1, 0] - m[:, 0, 1]
+    xy = m[:, 0, 1] + m[:, 1, 0]
+    xz = m[:, 0, 2] + m[:, 2, 0]
+    yz = m[:, 1, 2] + m[:, 2, 1]
+
+    quarter = s / 4
+    candidates = np.stack([
+        np.column_stack([quarter, wx / s, wy / s, wz / s]),
+        np.column_stack([wx / s, quarter, xy / s, xz / s]),
+        np.column_stack([wy / s, xy / s, quarter, yz / s]),
+        np.column_stack([wz / s, xz / s, yz / s, quarter]),
+    ])
+    return candidates[largest, np.arange(len(m))]
+
+
+def _matrices_from_quaternions(q):
+    w, x, y, z = q.T
+    m = np.empty((len(q), 3, 3))
+    m[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    m[:, 0, 1] = 2 * (x * y - z * w)
+    m[:, 0, 2] = 2 * (x * z + y * w)
+    m[:, 1, 0] = 2 * (x * y + z * w)
+    m[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    m[:, 1, 2] = 2 * (y * z - x * w)
+    m[:, 2, 0] = 2 * (x * z - y * w)
+    m[:, 2, 1] = 2 * (y * z + x * w)
+    m[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return m
+
+
+def _slerp(a, b, weight):
+
+    # q and -q are the same rotation; take the shorter way around.
+    dot = (a * b).sum(axis=1)
+    b = np.where(dot[:, None] < 0, -b, b)
+    dot = np.clip(np.abs(dot), 0, 1)
+
+    angle = np.arccos(dot)[:, None]
+    sin = np.sin(angle)
+    # Nearly the same rotation; a straight line is as good, and stable.
+    close = sin < 1e-6
+    safe_sin = np.where(close, 1, sin)
+    wa = np.where(close, 1 - weight, np.sin((1 - weight) * angle) / safe_sin)
+    wb = np.where(close, weight, np.sin(weight * angle) / safe_sin)
+
+    q = a * wa + b * wb
+    return q / np.sqrt((q * q).sum(axis=1))[:, None]
+
+
+def add_components(transforms):
+    """Decompose the ``local`` matrix of many transform metas at once.
+
+    Each (non-empty) meta gets a ``_components`` dict of lists, as from
+    :func:`decompose`.
+
+    """
+
+    todo = [x for x in transforms if x and x.get('local')]
+    if not todo:
+        return
+    components = decompose([x['local'] for x in todo])
+    components = dict((name, values.tolist()) for name, values in components.items())
+    for i, transform in enumerate(todo):
+        transform['_components'] = dict((name, values[i]) for name, values in components.items())
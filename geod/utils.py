@@ -9,3 +9,22 @@ def makedirs(path):
         if e.errno != errno.EEXIST:
             raise
 
+
+def replace(src, dst):
+    """Rename ``src`` to ``dst``, replacing whatever is there.
+
+    ``os.rename`` only does so on POSIX. Where there is no ``os.replace``
+    (Python 2 on Windows) the old file is removed first, so for a moment
+    there is no ``dst`` at all.
+
+    """
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+        return
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+        os.unlink(dst)
+        os.rename(src, dst)
@@ -0,0 +1,144 @@
+"""Checks of a scene on disk, without any DCC.
+
+:func:`iter_problems` walks the tree once, so it works on scenes of any
+size, and reports anything which would stop it from loading correctly.
+
+"""
+
+import os
+
+from .formats import format_from_path, read as read_mesh
+from .metacodec import codec_for_path, codecs
+
+
+def iter_problems(root, deep=False, seen=None):
+    """Iterate over ``(path, message)`` for everything wrong with a scene.
+
+    With ``deep``, every mesh is also read and its topology checked. Every
+    sidecar's path is passed to ``seen`` (if given), e.g. for progress.
+
+    """
+
+    root = os.path.abspath(root)
+    paths = set()
+    checked_geometry = set()
+
+    for problem in _journal_problems(root):
+        yield problem
+
+    for dir_path, dir_names, file_names in os.walk(root):
+
+        dir_names[:] = sorted(x for x in dir_names if not x.startswith('.'))
+        rel_dir = os.path.relpath(dir_path, root)
+        rel_dir = '' if rel_dir == '.' else rel_dir
+
+        if rel_dir and not any(os.path.exists(dir_path + codec.extension) for codec in codecs.values()):
+            yield rel_dir, 'directory has no sidecar, so its children are roots'
+
+        bases = set()
+        for file_name in sorted(file_names):
+
+            codec = codec_for_path(file_name)
+            if file_name.startswith('.') or codec is None:
+                continue
+            base = file_name[:-len(codec.extension)]
+            path = os.path.join(rel_dir, base)
+            if base in bases:
+                yield path, 'more than one sidecar'
+            bases.add(base)
+            paths.add(path)
+            if seen:
+                seen(path)
+
+            file_path = os.path.join(dir_path, file_name)
+            try:
+                with open(file_path, 'rb') as fh:
+                    meta = codec.loads(fh.read())
+            except Exception as e:
+                yield path, 'sidecar could not be read: %s' % e
+                continue
+
+            for problem in _meta_problems(meta, dir_path, deep, checked_geometry):
+                yield path, problem
+
+    for problem in _index_problems(root, paths):
+        yield problem
+
+
+def _journal_problems(root):
+    from . import journal
+    if journal.exists(root):
+        yield journal.NAME, 'dump did not finish; resume it to complete the scene'
+
+
+def _meta_problems(meta, dir_path, deep, checked_geometry):
+
+    if not isinstance(meta, dict):
+        yield 'sidecar is not a dict'
+        return
+    if not meta.get('name'):
+        yield 'no name'
+
+    local = (meta.get('transform') or {}).get('local')
+    if local is not None and len(local) != 16:
+        yield 'local transform has %d values, not 16' % len(local)
+
+    geo = meta.get('geometry') or {}
+    if not geo.get('path'):
+        return
+    geo_path = os.path.normpath(os.path.join(dir_path, geo['path']))
+    if not os.path.exists(geo_path):
+        yield 'geometry %r is missing' % geo['path']
+        return
+    try:
+        format_ = geo.get('format') or format_from_path(geo_path)
+    except ValueError as e:
+        yield str(e)
+        return
+
+    if not deep or geo_path in checked_geometry:
+        return
+    checked_geometry.add(geo_path)
+    try:
+        mesh = read_mesh(geo_path, format_)
+    except Exception as e:
+        yield 'geometry %r could not be read: %s' % (geo['path'], e)
+        return
+    for problem in _mesh_problems(mesh):
+        yield 'geometry %r %s' % (geo['path'], problem)
+
+
+def _mesh_problems(mesh):
+
+    if int(mesh.face_counts.sum()) != mesh.vertex_count:
+        yield 'has %d face-vertices but %d indices' % (mesh.face_counts.sum(), mesh.vertex_count)
+    for name, values, indices in (
+        ('point', mesh.positions, mesh.indices),
+        ('normal', mesh.normals, mesh.normal_indices),
+        ('uv', mesh.uvs, mesh.uv_indices),
+    ):
+        if values is None:
+            continue
+        if indices is None:
+            if len(values) != mesh.vertex_count:
+                yield 'has %d %ss for %d face-vertices' % (len(values), name, mesh.vertex_count)
+        elif len(indices) and (indices.min() < 0 or indices.max() >= len(values)):
+            yield 'has %s indices outside of its %d %ss' % (name, len(values), name)
+
+
+def _index_problems(root, paths):
+
+    from . import index
+
+    codec = index.find_codec(root)
+    if codec is None:
+        return
+    entries = index.read(root, codec=codec)
+    if entries is None:
+        yield index.NAME, 'index is stale'
+        return
+    indexed = set(os.path.normpath(entry['path']) for entry in entries)
+    for path in sorted(paths - indexed):
+        yield path, 'not in the index'
+    for path in sorted(indexed - paths):
+        yield path, 'in the index, but has no sidecar'
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pytest
+
+from geod.mock import MockObject, Synthetic
+from geod.scene import Scene
+
+
+def synthetic_scene(path, size=40, breadth=3, mesh_size=2, duplication=0.0, **kwargs):
+    """A scene at ``path`` of at least ``size`` mock objects, ready to dump."""
+    scene = Scene(path, object_class=MockObject, **kwargs)
+    scene.add_object(MockObject('root', Synthetic.for_count(size, breadth, mesh_size=mesh_size, duplication=duplication)))
+    scene.finalize_graph()
+    return scene
+
+
+def load(path, **kwargs):
+    """Load a scene of mock objects, and return ``{path: obj}`` of it."""
+    scene = Scene(path, object_class=MockObject)
+    scene.load(**kwargs)
+    return dict((p.replace(os.sep, '/'), obj) for p, obj in scene.walk())
+
+
+def loaded_mesh(loaded, path):
+    """The mesh loaded for the object at ``path``.
+
+    Objects with both children and geometry are split in two when loaded,
+    with the geometry on a new child.
+
+    """
+    obj = loaded[path]
+    split = loaded.get('%s/%sGeo' % (path, obj.name))
+    return (split or obj).mesh
+
+
+def assert_same_mesh(a, b):
+    assert (a is None) == (b is None)
+    if a is None:
+        return
+    a_arrays = dict(a.arrays())
+    b_arrays = dict(b.arrays())
+    assert sorted(a_arrays) == sorted(b_arrays)
+    for name in a_arrays:
+        np.testing.assert_allclose(a_arrays[name], b_arrays[name], atol=1e-6, err_msg=name)
+
+
+@pytest.fixture
+def root(tmpdir):
+    return str(tmpdir.join('scene'))
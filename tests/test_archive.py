@@ -0,0 +1,137 @@
+import gc
+import os
+
+import numpy as np
+import pytest
+
+from geod import archive
+from geod.mock import MockObject
+from geod.scene import Scene
+
+from conftest import assert_same_mesh, load, loaded_mesh, synthetic_scene
+
+
+def mapped(path):
+    """If this process has the file mapped."""
+    if not os.path.exists('/proc/self/maps'):
+        pytest.skip('needs /proc/self/maps')
+    gc.collect()
+    real_path = os.path.realpath(path)
+    with open('/proc/self/maps') as fh:
+        return any(line.split(None, 5)[-1].strip().startswith(real_path) for line in fh if len(line.split()) > 5)
+
+
+def files(root):
+    return dict(
+        (archive.member_name(os.path.relpath(os.path.join(parent, name), root)), os.path.join(parent, name))
+        for parent, _, names in os.walk(root)
+        for name in names
+    )
+
+
+def assert_matches(path, root):
+    packed = archive.Archive(path)
+    on_disk = files(root)
+    assert packed.names() == sorted(on_disk)
+    for name, file_path in on_disk.items():
+        with open(file_path, 'rb') as fh:
+            assert packed.read(name) == fh.read(), name
+
+
+def test_pack_and_load(tmpdir):
+    root = str(tmpdir.join('scene'))
+    path = str(tmpdir.join('scene.geoda'))
+    synthetic_scene(root).dump()
+    assert archive.pack(root, path) == (len(files(root)), 0)
+    assert_matches(path, root)
+    assert sorted(load(path)) == sorted(load(root))
+
+
+def test_append_and_repack(tmpdir):
+
+    root = str(tmpdir.join('scene'))
+    path = str(tmpdir.join('scene.geoda'))
+    synthetic_scene(root, mesh_size=4).dump()
+    archive.pack(root, path)
+    packed_size = os.path.getsize(path)
+
+    # Changing a mesh appends it, and leaves the old one behind.
+    synthetic_scene(root, mesh_size=4, duplication=1.0).dump(incremental=True)
+    written, kept = archive.pack(root, path, append=True)
+    assert written and kept
+    assert os.path.getsize(path) > packed_size
+    assert_matches(path, root)
+
+    appended_size = os.path.getsize(path)
+    archive.repack(path)
+    assert os.path.getsize(path) < appended_size
+    assert not os.path.exists(path + '.tmp')
+    assert_matches(path, root)
+
+    # Packing over an existing archive replaces it.
+    assert archive.pack(root, path) == (len(files(root)), 0)
+    assert_matches(path, root)
+
+
+@pytest.fixture
+def packed(tmpdir):
+    root = str(tmpdir.join('scene'))
+    path = str(tmpdir.join('scene.geoda'))
+    synthetic_scene(root, geometry_format='geod').dump()
+    archive.pack(root, path)
+    return root, path
+
+
+def test_archive_closes(packed):
+    _, path = packed
+    with archive.Archive(path) as opened:
+        assert len(opened) and mapped(path)
+    assert not mapped(path)
+    opened.close()
+
+
+def test_closing_leaves_native_meshes_alone(packed):
+    _, path = packed
+    opened = archive.Archive(path)
+    name = next(name for name in opened.names() if name.endswith('.mesh'))
+    mesh = opened.mesh(name)
+    expected = np.array(mesh.positions)
+    opened.close()
+    np.testing.assert_array_equal(mesh.positions, expected)
+    del mesh
+    assert not mapped(path)
+
+
+def test_pack_repack_and_unpack_close(tmpdir, packed):
+    root, path = packed
+    synthetic_scene(root, geometry_format='geod', duplication=1.0).dump(incremental=True)
+    archive.pack(root, path, append=True)
+    assert not mapped(path)
+    archive.repack(path)
+    assert not mapped(path)
+    archive.unpack(path, str(tmpdir.join('unpacked')))
+    assert not mapped(path)
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'workers': 2}])
+def test_scene_closes_after_load(packed, kwargs):
+    root, path = packed
+    scene = Scene(path, object_class=MockObject)
+    scene.load(**kwargs)
+    assert scene._archive is None
+    loaded = dict((p.replace(os.sep, '/'), obj) for p, obj in scene.walk())
+    expected = load(root)
+    for p in expected:
+        assert_same_mesh(loaded_mesh(loaded, p), loaded_mesh(expected, p))
+    # Nothing but the meshes (which are views of it) kept it mapped.
+    del scene, loaded, expected
+    assert not mapped(path)
+
+
+def test_scene_keeps_archive_for_deferred_geometry(packed):
+    _, path = packed
+    scene = Scene(path, object_class=MockObject)
+    scene.load(defer_geometry=True)
+    assert scene.deferred_objects and scene._archive is not None
+    scene.load_geometry()
+    assert not scene.deferred_objects and scene._archive is None
@@ -0,0 +1,92 @@
+from geod.cache import GeometryCache, default_cache, mesh_nbytes
+from geod.formats import write as write_mesh
+from geod.mock import MockObject, grid_mesh
+from geod.scene import Scene
+
+from conftest import assert_same_mesh, synthetic_scene
+
+
+def meshes(scene):
+    return dict((path, obj.mesh) for path, obj in scene.walk() if obj.mesh is not None)
+
+
+def write_grid(tmpdir, name, size=2, seed=0):
+    return write_mesh(grid_mesh(size, seed), str(tmpdir.join(name)), 'obj')
+
+
+def test_hits_and_misses(tmpdir):
+    path = write_grid(tmpdir, 'a')
+    cache = GeometryCache()
+    mesh, hit = cache.lookup(path)
+    assert not hit
+    assert_same_mesh(mesh, grid_mesh(2, 0))
+    again, hit = cache.lookup(path)
+    assert hit and again is mesh
+    assert path in cache
+    assert cache.as_dict()['hits'] == 1 and cache.as_dict()['misses'] == 1
+    assert cache.nbytes == mesh_nbytes(mesh)
+
+
+def test_changed_files_are_read_again(tmpdir):
+    path = write_grid(tmpdir, 'a')
+    cache = GeometryCache()
+    cache.get(path)
+    write_grid(tmpdir, 'a', size=3)
+    mesh, hit = cache.lookup(path)
+    assert not hit
+    assert mesh.face_count == 9
+    # The old mesh is gone, not just hidden.
+    assert len(cache) == 1
+    assert cache.nbytes == mesh_nbytes(mesh)
+
+
+def test_least_recently_used_are_evicted(tmpdir):
+    paths = [write_grid(tmpdir, name, seed=i) for i, name in enumerate('abc')]
+    nbytes = mesh_nbytes(grid_mesh(2))
+    cache = GeometryCache(max_bytes=2 * nbytes)
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])
+    cache.get(paths[2])
+    assert paths[0] in cache and paths[2] in cache
+    assert paths[1] not in cache
+    assert cache.evictions == 1
+    assert cache.nbytes == 2 * nbytes
+
+
+def test_too_big_to_hold(tmpdir):
+    path = write_grid(tmpdir, 'a')
+    cache = GeometryCache(max_bytes=1)
+    assert cache.get(path) is not None
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_clear(tmpdir):
+    cache = GeometryCache()
+    cache.get(write_grid(tmpdir, 'a'))
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_scene_loads_share_meshes(root):
+    synthetic_scene(root).dump()
+    cache = GeometryCache()
+
+    first = Scene(root, object_class=MockObject, geometry_cache=cache)
+    first.load()
+    misses = cache.misses
+    assert misses == 39 and cache.hits == 0
+
+    second = Scene(root, object_class=MockObject, geometry_cache=cache)
+    second.load()
+    assert cache.misses == misses and cache.hits == misses
+    first_meshes = meshes(first)
+    for path, mesh in meshes(second).items():
+        assert mesh is first_meshes[path]
+
+
+def test_default_cache(root):
+    synthetic_scene(root).dump()
+    scene = Scene(root, object_class=MockObject, geometry_cache=True)
+    assert scene.geometry_cache is default_cache()
+    assert Scene(root, geometry_cache=False).geometry_cache is None
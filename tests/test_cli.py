@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from geod.__main__ import main
+
+from conftest import synthetic_scene
+
+
+def run(capsys, *argv):
+    """Run the command line tool, returning ``(exit code, stdout)``."""
+    code = main(['--quiet'] + list(argv))
+    return code or 0, capsys.readouterr().out
+
+
+def info(capsys, root):
+    code, out = run(capsys, 'info', '--json', root)
+    assert code == 0
+    return json.loads(out)
+
+
+def test_starts_without_numpy():
+    code = 'import sys, geod.__main__; sys.exit("numpy" in sys.modules)'
+    assert subprocess.call([sys.executable, '-c', code]) == 0
+
+
+def test_ls(capsys, root):
+    synthetic_scene(root).dump()
+    _, out = run(capsys, 'ls', root)
+    paths = out.split()
+    assert len(paths) == 40 and 'root/n0/n1' in paths
+
+    _, out = run(capsys, 'ls', '-l', '--include', 'root/n1', root)
+    lines = [line.split() for line in out.splitlines()]
+    assert len(lines) == 14
+    assert [line[-1] for line in lines[:3]] == ['root', 'root/n1', 'root/n1/n0']
+    assert all(line[-1] == 'root' or line[-1].startswith('root/n1') for line in lines)
+    assert lines[0][:3] == ['-', '-', '-']
+    assert lines[1][:3] == ['obj', '9', '4']
+
+
+def test_info(capsys, root):
+    synthetic_scene(root).dump(frames=[0, 1])
+    data = info(capsys, root)
+    assert data['objects'] == 40
+    assert data['geometry'] == 39
+    assert data['formats'] == {'obj': 39}
+    assert data['index'] == 'fresh'
+    assert data['spatial_index'] is True
+    assert data['samples'] == {'objects': 40, 'frames': 2}
+
+
+def test_validate(capsys, root):
+    synthetic_scene(root).dump()
+    assert run(capsys, 'validate', '--deep', root) == (0, '')
+    os.unlink(os.path.join(root, 'root', 'n1.obj'))
+    code, out = run(capsys, 'validate', root)
+    assert code == 1
+    assert 'root/n1' in out
+
+
+def test_convert_and_reindex(capsys, root):
+    synthetic_scene(root).dump()
+    run(capsys, 'convert', root, 'geod')
+    assert info(capsys, root)['formats'] == {'geod': 39}
+
+    run(capsys, 'reindex', root, '--codec', 'json')
+    assert info(capsys, root)['index'] == 'fresh'
+    assert run(capsys, 'validate', '--deep', root)[0] == 0
+
+
+def test_diff(capsys, tmpdir):
+    old, new = str(tmpdir.join('old')), str(tmpdir.join('new'))
+    synthetic_scene(old).dump()
+    synthetic_scene(new).dump()
+    assert run(capsys, 'diff', old, new) == (0, '')
+
+    os.unlink(os.path.join(new, 'root', 'n2', 'n1.json'))
+    code, out = run(capsys, 'diff', old, new)
+    assert code == 1
+    assert out.splitlines() == ['D root/n2/n1']
+    code, out = run(capsys, 'diff', '--json', old, new)
+    assert json.loads(out)['removed'] == ['root/n2/n1']
+
+
+def test_pack_and_unpack(capsys, tmpdir):
+    root = str(tmpdir.join('scene'))
+    synthetic_scene(root).dump()
+    packed = str(tmpdir.join('scene.geoda'))
+    run(capsys, 'pack', root, packed)
+    assert info(capsys, packed)['objects'] == 40
+
+    run(capsys, 'repack', packed)
+    out = str(tmpdir.join('out'))
+    run(capsys, 'unpack', packed, out)
+    assert info(capsys, out) == info(capsys, root)
+
+
+def test_not_a_scene(capsys, tmpdir):
+    with pytest.raises(SystemExit) as raised:
+        main(['info', str(tmpdir.join('nope'))])
+    assert 'not a directory' in str(raised.value)
@@ -0,0 +1,45 @@
+import os
+
+from geod.scene import BLOB_DIR
+
+from conftest import load, loaded_mesh, synthetic_scene
+
+
+def blobs(root):
+    return [name for _, _, names in os.walk(os.path.join(root, BLOB_DIR)) for name in names]
+
+
+def test_shared_meshes_are_written_once(root):
+    scene = synthetic_scene(root, duplication=1.0)
+    scene.dump(dedup=True)
+    assert len(blobs(root)) == 1
+    loaded = load(root)
+    meshes = [loaded_mesh(loaded, path) for path in loaded if path != 'root' and not path.endswith('Geo')]
+    assert all(mesh is not None for mesh in meshes)
+    # Loaders are told who loaded the geometry first, and share it.
+    assert len(set(id(mesh) for mesh in meshes)) == 1
+
+
+def test_distinct_meshes_get_their_own_blobs(root):
+    scene = synthetic_scene(root, duplication=0.0)
+    scene.dump(dedup=True)
+    assert len(blobs(root)) == len(scene.guid_to_object) - 1
+
+
+def test_unused_blobs_are_removed(root):
+    synthetic_scene(root, duplication=0.0).dump(dedup=True, incremental=True)
+    synthetic_scene(root, duplication=1.0).dump(dedup=True, incremental=True)
+    assert len(blobs(root)) == 1
+
+
+def test_quantized_meshes_differing_by_offset_are_distinct(root):
+    # The synthetic grids only differ in their constant height, which fixed
+    # point positions store in the offset rather than the arrays.
+    scene = synthetic_scene(root, geometry_format='geod', quantize={'positions': 16})
+    scene.dump(dedup=True)
+    assert len(blobs(root)) == len(scene.guid_to_object) - 1
+    loaded = load(root)
+    for path, obj in scene.walk():
+        if obj.mesh_spec:
+            heights = loaded_mesh(loaded, path.replace(os.sep, '/')).positions[:, 2]
+            assert (heights == obj.mesh_spec[1]).all()
@@ -0,0 +1,85 @@
+import os
+import shutil
+
+import pytest
+
+from geod.metacodec import get_codec
+from geod.scene import Scene
+
+from conftest import synthetic_scene
+
+
+def edit_meta(path, func):
+    codec = get_codec('json')
+    with open(path, 'rb') as fh:
+        meta = codec.loads(fh.read())
+    func(meta)
+    with open(path, 'wb') as fh:
+        fh.write(codec.dumps(meta))
+
+
+def test_identical_scenes(tmpdir):
+    old, new = str(tmpdir.join('old')), str(tmpdir.join('new'))
+    synthetic_scene(old).dump()
+    synthetic_scene(new).dump()
+    assert not Scene(old).diff(new)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'workers': 4},
+    {'incremental': True},
+    {'dedup': True},
+])
+def test_dump_mode_is_not_a_change(tmpdir, kwargs):
+    old, new = str(tmpdir.join('old')), str(tmpdir.join('new'))
+    synthetic_scene(old).dump()
+    synthetic_scene(new).dump(**kwargs)
+    for a, b in ((old, new), (new, old)):
+        result = Scene(a).diff(b)
+        assert not result, result.as_dict()
+        # Fingerprints were recorded either way, so no geometry was read.
+        assert result.stats['geometry_files_read'] == 0
+
+
+def test_changes(tmpdir):
+
+    old, new = str(tmpdir.join('old')), str(tmpdir.join('new'))
+    synthetic_scene(old).dump()
+    shutil.copytree(old, new)
+    root = os.path.join(new, 'root')
+
+    # Move n0 under a new group, rename n1, and nudge n2/n0.
+    os.mkdir(os.path.join(root, 'grp'))
+    with open(os.path.join(root, 'grp.json'), 'wb') as fh:
+        fh.write(get_codec('json').dumps({'name': 'grp'}))
+    for name in ('n0', 'n0.json'):
+        os.rename(os.path.join(root, name), os.path.join(root, 'grp', name))
+    for name in ('n1', 'n1.json'):
+        os.rename(os.path.join(root, name), os.path.join(root, name.replace('n1', 'renamed')))
+
+    def nudge(meta):
+        meta['transform']['local'][13] += 1.0
+    edit_meta(os.path.join(root, 'n2', 'n0.json'), nudge)
+
+    result = Scene(old).diff(new, use_index=False)
+    assert result.added == ['root/grp']
+    assert result.removed == []
+    assert result.moved == [('root/n0', 'root/grp/n0')]
+    assert result.renamed == [('root/n1', 'root/renamed')]
+    assert result.transforms == ['root/n2/n0']
+    assert result.geometry == []
+    assert result.paths['root/n0/n1'] == 'root/grp/n0/n1'
+    assert result.reimport() == ['root/grp', 'root/n2/n0', 'root/renamed']
+    assert result.reimport(transforms=False) == ['root/grp', 'root/renamed']
+
+
+def test_tolerance(tmpdir):
+    old, new = str(tmpdir.join('old')), str(tmpdir.join('new'))
+    synthetic_scene(old).dump()
+    shutil.copytree(old, new)
+
+    def nudge(meta):
+        meta['transform']['local'][12] += 1e-9
+    edit_meta(os.path.join(new, 'root', 'n2.json'), nudge)
+    assert not Scene(old).diff(new, use_index=False)
+    assert Scene(old).diff(new, tolerance=0, use_index=False).transforms == ['root/n2']
@@ -0,0 +1,39 @@
+import pytest
+
+from geod.filters import PathFilter
+
+from conftest import load, loaded_mesh, synthetic_scene
+
+
+def test_prefix_selects_subtree():
+    f = PathFilter('set/props/table')
+    assert f.selects('set/props/table')
+    assert f.selects('set/props/table/leg')
+    assert not f.selects('set/props')
+    assert not f.selects('set/props/tables')
+    assert f.wants('set/props')
+    assert not f.wants('set/lights')
+
+
+def test_globs_match_one_component():
+    f = PathFilter(['set/*/table*'])
+    assert f.selects('set/props/table2/leg')
+    assert not f.selects('set/a/b/table')
+    assert f.wants('set/anything')
+
+
+@pytest.mark.parametrize('use_index', [True, False])
+def test_include_loads_subtree_and_ancestors(root, use_index):
+    synthetic_scene(root).dump()
+    loaded = load(root, include='root/n1', use_index=use_index)
+    assert 'root' in loaded and 'root/n1/n2' in loaded
+    assert not any(path.startswith('root/n0') for path in loaded)
+    assert loaded_mesh(loaded, 'root/n1/n2') is not None
+
+
+def test_unicode_pattern_is_one_pattern():
+    # On Python 2, a unicode pattern is not a str, but is not a list either.
+    f = PathFilter(u'set/props/table')
+    assert f.patterns == [('set', 'props', 'table')]
+    assert f.selects(u'set/props/table/leg')
+    assert not f.selects('set/lights')
@@ -0,0 +1,79 @@
+import sys
+
+import pytest
+
+from geod.mock import MockObject, chain, tree
+from geod.object import BaseObject
+from geod.scene import Scene
+
+
+class Node(BaseObject):
+
+    """An object in the ``graph`` of names, identified by its name."""
+
+    graph = {}
+
+    @property
+    def guid(self):
+        return self.name
+
+    def _iter_child_args(self):
+        for name in self.graph.get(self.name, ()):
+            yield (name, )
+
+
+def node_scene(root, graph, *roots):
+    Node.graph = graph
+    scene = Scene(root, object_class=Node)
+    for name in roots:
+        scene.add_object(Node(name))
+    scene.finalize_graph()
+    return scene
+
+
+def walked(scene):
+    return [path.replace('\\', '/') for path, _ in scene.walk()]
+
+
+def test_deeper_than_the_recursion_limit(root):
+    depth = sys.getrecursionlimit() * 2
+    scene = Scene(root, object_class=MockObject)
+    scene.add_object(MockObject('root', chain(depth)))
+    scene.finalize_graph()
+    assert len(scene.guid_to_object) == depth
+    paths = walked(scene)
+    assert len(paths) == depth
+    assert paths[-1].count('/') == depth - 1
+
+
+def test_walk_is_depth_first_in_child_order(root):
+    scene = Scene(root, object_class=MockObject)
+    scene.add_object(MockObject('root', tree(13, 3)))
+    scene.finalize_graph()
+    paths = walked(scene)
+    assert paths[:6] == ['root', 'root/n0', 'root/n0/n0', 'root/n0/n1', 'root/n0/n2', 'root/n1']
+    assert len(paths) == 13
+
+
+def test_shared_children_are_walked_once_per_path(root):
+    scene = node_scene(root, {'a': ['b', 'c'], 'b': ['shared'], 'c': ['shared']}, 'a')
+    assert walked(scene) == ['a', 'a/b', 'a/b/shared', 'a/c', 'a/c/shared']
+    assert len(scene.guid_to_object) == 4
+
+
+def test_roots_are_found_and_sorted(root):
+    scene = node_scene(root, {'b': ['c']}, 'c', 'b', 'a')
+    assert [obj.name for obj in scene.root_objects] == ['a', 'b']
+
+
+def test_cycle_below_a_root(root):
+    scene = node_scene(root, {'a': ['b'], 'b': ['c'], 'c': ['b']}, 'a')
+    with pytest.raises(ValueError) as info:
+        list(scene.walk())
+    assert 'a/b/c/b' in str(info.value).replace('\\', '/')
+
+
+def test_unreachable_cycle(root):
+    scene = node_scene(root, {'a': [], 'b': ['c'], 'c': ['b']}, 'a', 'b')
+    with pytest.raises(ValueError):
+        list(scene.walk())
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from geod import obj
+from geod.houdini.mesh import extract
+from geod.houdini.obj import dump, dump_per_element
+from geod.mock import StubGeometry
+
+
+def mixed_geometry(point_normals=False, vertex_normals=True, point_uvs=False, vertex_uvs=True, **kwargs):
+    """A triangle, a quad and a pentagon sharing points, with noisy attributes."""
+
+    rand = np.random.RandomState(0)
+    positions = rand.uniform(-1, 1, size=(8, 3))
+    face_counts = [3, 4, 5]
+    indices = [0, 1, 2, 1, 3, 4, 2, 2, 4, 5, 6, 7]
+
+    point_attribs = {}
+    vertex_attribs = {}
+    if point_normals:
+        point_attribs['N'] = rand.normal(size=(len(positions), 3))
+    elif vertex_normals:
+        # Some repeat, as they would on a flat face, and must still be
+        # written once per value.
+        normals = rand.normal(size=(len(indices), 3))
+        normals[4:7] = normals[3]
+        vertex_attribs['N'] = normals
+    if point_uvs:
+        point_attribs['uv'] = rand.uniform(size=(len(positions), 3))
+    elif vertex_uvs:
+        vertex_attribs['uv'] = rand.uniform(size=(len(indices), 3))
+
+    return StubGeometry(positions, face_counts, indices, point_attribs, vertex_attribs, **kwargs)
+
+
+def expanded(mesh):
+    """Every face-vertex's values, however the file shared them."""
+    arrays = {
+        'face_counts': mesh.face_counts,
+        'positions': mesh.positions[mesh.indices],
+    }
+    if mesh.normals is not None:
+        arrays['normals'] = mesh.normals[mesh.normal_indices]
+    if mesh.uvs is not None:
+        arrays['uvs'] = mesh.uvs[mesh.uv_indices]
+    return arrays
+
+
+def read_back(tmpdir, writer, geo):
+    path = str(tmpdir.join('%s.obj' % writer.__name__))
+    with open(path, 'w') as fh:
+        writer(geo, fh)
+    return obj.load(path)
+
+
+@pytest.mark.parametrize('bulk_topology', [True, False])
+@pytest.mark.parametrize('geometry', [
+    lambda **kw: StubGeometry.grid(3, 5, **kw),
+    lambda **kw: StubGeometry.grid(3, 5, point_normals=True, **kw),
+    lambda **kw: StubGeometry.grid(3, 5, vertex_normals=False, **kw),
+    lambda **kw: StubGeometry.grid(3, 5, vertex_uvs=False, **kw),
+    lambda **kw: StubGeometry.grid(3, 5, vertex_normals=False, vertex_uvs=False, **kw),
+    lambda **kw: mixed_geometry(**kw),
+    lambda **kw: mixed_geometry(point_normals=True, point_uvs=True, **kw),
+    lambda **kw: mixed_geometry(vertex_normals=False, point_uvs=True, **kw),
+    lambda **kw: mixed_geometry(vertex_uvs=False, **kw),
+    lambda **kw: mixed_geometry(vertex_normals=False, vertex_uvs=False, **kw),
+], ids=[
+    'grid', 'grid-point-normals', 'grid-no-normals', 'grid-no-uvs', 'grid-bare',
+    'mixed', 'mixed-point-attribs', 'mixed-point-uvs', 'mixed-no-uvs', 'mixed-bare',
+])
+def test_matches_per_element_writer(tmpdir, geometry, bulk_topology):
+
+    geo = geometry(bulk_topology=bulk_topology)
+    assert hasattr(geo, 'primVertexCounts') == bulk_topology
+
+    expected = expanded(read_back(tmpdir, dump_per_element, geo))
+    actual = expanded(read_back(tmpdir, dump, geo))
+
+    assert sorted(actual) == sorted(expected)
+    for name in expected:
+        np.testing.assert_allclose(actual[name], expected[name], atol=1.5e-6, err_msg=name)
+
+
+def test_values_are_written_once(tmpdir):
+    mesh = read_back(tmpdir, dump, StubGeometry.grid(4, 4))
+    # One normal for the whole flat grid, and one UV per point.
+    assert len(mesh.normals) == 1
+    assert len(mesh.uvs) == len(mesh.positions)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 7])
+def test_chunks_split_between_faces(tmpdir, chunk_size):
+    geo = mixed_geometry()
+    path = str(tmpdir.join('chunked.obj'))
+    with open(path, 'w') as fh:
+        dump(geo, fh, chunk_size=chunk_size)
+    expected = expanded(read_back(tmpdir, dump, geo))
+    actual = expanded(obj.load(path))
+    for name in expected:
+        np.testing.assert_array_equal(actual[name], expected[name], err_msg=name)
+
+
+@pytest.mark.parametrize('geometry', [
+    lambda: StubGeometry.grid(3, 5),
+    lambda: mixed_geometry(),
+    lambda: mixed_geometry(point_normals=True, point_uvs=True),
+    lambda: mixed_geometry(vertex_normals=False, vertex_uvs=False),
+], ids=['grid', 'mixed', 'mixed-point-attribs', 'mixed-bare'])
+def test_extracted_mesh_writes_like_exporter(tmpdir, geometry):
+    # The pooled path extracts a mesh and writes it with geod.obj.
+    geo = geometry()
+    path = str(tmpdir.join('extracted.obj'))
+    with open(path, 'wb') as fh:
+        obj.dump(extract(geo), fh)
+    expected = read_back(tmpdir, dump, geo)
+    actual = obj.load(path)
+    for name in ('positions', 'normals', 'uvs'):
+        if getattr(expected, name) is None:
+            assert getattr(actual, name) is None, name
+        else:
+            np.testing.assert_allclose(getattr(actual, name), getattr(expected, name), atol=1.5e-6, err_msg=name)
+    for name in ('face_counts', 'indices', 'normal_indices', 'uv_indices'):
+        if getattr(expected, name) is None:
+            assert getattr(actual, name) is None, name
+        else:
+            np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name), err_msg=name)
@@ -0,0 +1,158 @@
+import os
+
+import pytest
+
+from geod import index, journal
+from geod.formats import write as write_mesh
+from geod.mock import MockObject, Synthetic, grid_mesh
+from geod.scene import Scene
+
+from conftest import load, synthetic_scene
+
+
+def test_unchanged_scene_is_skipped(root):
+    synthetic_scene(root).dump(incremental=True)
+    scene = synthetic_scene(root)
+    summary = scene.dump(incremental=True)
+    assert summary['written'] == 0
+    assert summary['skipped'] == len(scene.guid_to_object)
+    assert summary['removed'] == 0
+
+
+def test_changed_object_is_rewritten(root):
+    synthetic_scene(root).dump(incremental=True)
+    scene = synthetic_scene(root)
+    dict(scene.walk())[os.path.join('root', 'n1')].mesh_spec = (2, 1000)
+    summary = scene.dump(incremental=True)
+    assert summary['written'] == 1
+    entry = dict((e['path'], e) for e in index.read(root))[os.path.join('root', 'n1')]
+    assert entry['meta']['geometry']['points'] == 9
+
+
+def test_transform_only_change_keeps_geometry(root):
+    synthetic_scene(root).dump(incremental=True)
+    mesh_path = os.path.join(root, 'root', 'n1.obj')
+    meta_path = os.path.join(root, 'root', 'n1.json')
+    # Files are written to the side and renamed into place, so anything
+    # rewritten is a new file, however coarse the filesystem's mtimes.
+    mesh_stat = os.stat(mesh_path)
+    meta_stat = os.stat(meta_path)
+
+    scene = synthetic_scene(root)
+    obj = dict(scene.walk())[os.path.join('root', 'n1')]
+    transforms = obj.get_transforms()
+    transforms['local'][12] += 1
+    obj.get_transforms = lambda: transforms
+    summary = scene.dump(incremental=True)
+
+    assert summary['written'] == 1
+    assert os.stat(mesh_path).st_ino == mesh_stat.st_ino
+    assert os.stat(mesh_path).st_mtime == mesh_stat.st_mtime
+    assert os.stat(meta_path).st_ino != meta_stat.st_ino
+    assert load(root)['root/n1'].transforms['local'][12] == transforms['local'][12]
+
+
+@pytest.mark.parametrize('first, second', [
+    ({}, {}),
+    ({}, {'workers': 2}),
+    ({'workers': 2}, {}),
+])
+def test_dump_mode_does_not_change_fingerprints(root, first, second):
+    # A plain dump and a pooled one fingerprint geometry the same way, so
+    # switching between them rewrites nothing.
+    synthetic_scene(root).dump(**first)
+    scene = synthetic_scene(root)
+    summary = scene.dump(incremental=True, **second)
+    assert summary['written'] == 0
+    assert summary['skipped'] == len(scene.guid_to_object)
+
+
+def test_removed_objects_are_cleaned_up(root):
+    synthetic_scene(root, size=40).dump(incremental=True)
+    smaller = synthetic_scene(root, size=13)
+    summary = smaller.dump(incremental=True)
+    assert summary['removed'] == 27
+    assert sorted(load(root)) == sorted(load(root, use_index=False))
+    assert not os.path.exists(os.path.join(root, 'root', 'n0', 'n0'))
+
+
+
+def changed_scene(root, every=5):
+    """A scene where every so many objects' meshes differ from the last dump."""
+    scene = synthetic_scene(root)
+    for i, (_, obj) in enumerate(scene.walk()):
+        if obj.mesh_spec and i % every == 1:
+            obj.mesh_spec = (2, 1000 + i)
+    return scene
+
+
+def walk_order(scene):
+    return [os.path.normpath(path) for path, _ in scene.walk()]
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'workers': 3, 'max_pending': 4}])
+def test_index_is_in_walk_order(root, kwargs):
+    synthetic_scene(root).dump(incremental=True)
+    scene = changed_scene(root)
+    summary = scene.dump(incremental=True, **kwargs)
+    assert summary['written'] and summary['skipped']
+    assert [e['path'] for e in index.read(root)] == walk_order(scene)
+
+
+def test_journal_is_in_walk_order(root):
+    synthetic_scene(root).dump(incremental=True)
+    scene = changed_scene(root)
+    dumping = scene.iter_dump(incremental=True, workers=3, max_pending=4)
+    for i, _, _, _ in dumping:
+        if i == 30:
+            break
+    dumping.close()
+    _, journaled, _ = journal.read(root)
+    paths = [e['path'] for e in journaled]
+    # Writes still in flight are not journaled, nor is anything after them.
+    assert 0 < len(paths) <= 30
+    assert paths == walk_order(scene)[:len(paths)]
+
+
+class ExportOnly(MockObject):
+
+    """An object which can only write its geometry to a file itself."""
+
+    def extract_geo(self):
+        raise NotImplementedError()
+
+    def export_geo(self, path, format='obj'):
+        if self.mesh_spec is not None:
+            return {'path': write_mesh(grid_mesh(*self.mesh_spec), path, format), 'format': format}
+
+
+def export_only_scene(root):
+    scene = Scene(root, object_class=ExportOnly)
+    scene.add_object(ExportOnly('root', Synthetic.for_count(13, 3, mesh_size=2)))
+    scene.finalize_graph()
+    return scene
+
+
+def test_exported_geometry_is_kept_when_unchanged(root):
+    export_only_scene(root).dump(incremental=True)
+    mesh_path = os.path.join(root, 'root', 'n1.obj')
+    mesh_stat = os.stat(mesh_path)
+    scene = export_only_scene(root)
+    summary = scene.dump(incremental=True)
+    assert summary['skipped'] == len(scene.guid_to_object)
+    assert os.stat(mesh_path).st_ino == mesh_stat.st_ino
+
+
+def test_plain_dump_does_not_read_back_exported_geometry(root):
+    export_only_scene(root).dump()
+    metas = [entry['meta'] for entry in index.read(root)]
+    assert any(meta.get('geometry') for meta in metas)
+    assert not any('fingerprint' in (meta.get('geometry') or {}) for meta in metas)
+
+    # The next incremental dump hashes what is there instead of rewriting
+    # it; only the sidecars change, to record the fingerprints.
+    mesh_path = os.path.join(root, 'root', 'n1.obj')
+    mesh_stat = os.stat(mesh_path)
+    export_only_scene(root).dump(incremental=True)
+    assert os.stat(mesh_path).st_ino == mesh_stat.st_ino
+    assert all('fingerprint' in meta['geometry'] for meta in (entry['meta'] for entry in index.read(root)) if meta.get('geometry'))
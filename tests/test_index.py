@@ -0,0 +1,80 @@
+import os
+
+from geod import archive, index
+from geod.metacodec import get_codec
+
+from conftest import load, synthetic_scene
+
+
+def edit_meta(path, func):
+    codec = get_codec('json')
+    with open(path, 'rb') as fh:
+        meta = codec.loads(fh.read())
+    func(meta)
+    with open(path, 'wb') as fh:
+        fh.write(codec.dumps(meta))
+
+
+def test_fresh_after_dump(root):
+    synthetic_scene(root).dump()
+    assert index.read(root) is not None
+
+
+def test_changes_below_the_root_are_seen(root):
+
+    synthetic_scene(root).dump()
+    assert load(root)['root/n0'].transforms['local'][12] == 2.0
+
+    def move(meta):
+        meta['transform']['local'][12] = 5.0
+    edit_meta(os.path.join(root, 'root', 'n0.json'), move)
+    with open(os.path.join(root, 'root', 'n0', 'extra.json'), 'wb') as fh:
+        fh.write(get_codec('json').dumps({'name': 'extra'}))
+
+    assert index.read(root) is None
+    loaded = load(root)
+    assert 'root/n0/extra' in loaded
+    assert loaded['root/n0'].transforms['local'][12] == 5.0
+
+
+def test_added_object_is_seen(root):
+    synthetic_scene(root).dump()
+    with open(os.path.join(root, 'root', 'n1', 'n2', 'extra.json'), 'wb') as fh:
+        fh.write(get_codec('json').dumps({'name': 'extra'}))
+    assert index.read(root) is None
+    assert 'root/n1/n2/extra' in load(root)
+
+
+def test_removed_object_is_seen(root):
+    synthetic_scene(root).dump()
+    os.unlink(os.path.join(root, 'root', 'n1', 'n2', 'n0.json'))
+    assert index.read(root) is None
+    assert 'root/n1/n2/n0' not in load(root)
+
+
+def test_root_only_check(root):
+    synthetic_scene(root).dump()
+    edit_meta(os.path.join(root, 'root', 'n0.json'), lambda meta: None)
+    assert index.read(root, verify=False) is not None
+
+
+def test_fresh_after_unpack(tmpdir):
+    root = str(tmpdir.join('scene'))
+    synthetic_scene(root).dump()
+    path = str(tmpdir.join('scene.geoda'))
+    archive.pack(root, path)
+    out = str(tmpdir.join('out'))
+    archive.unpack(path, out)
+    assert index.read(out) is not None
+
+
+def test_unverified_load_trusts_the_index(root):
+    synthetic_scene(root).dump()
+
+    def move(meta):
+        meta['transform']['local'][12] = 5.0
+    edit_meta(os.path.join(root, 'root', 'n0.json'), move)
+
+    # Only the root is checked, so the edit below it is missed.
+    assert load(root, verify_index=False)['root/n0'].transforms['local'][12] == 2.0
+    assert load(root)['root/n0'].transforms['local'][12] == 5.0
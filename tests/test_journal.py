@@ -0,0 +1,53 @@
+from geod import journal
+
+
+HEADER = {'options': {'dedup': False}, 'previous': []}
+
+
+def write(root, count):
+    writer = journal.Writer(root, HEADER)
+    for i in range(count):
+        writer.add({'path': 'n%d' % i})
+    writer.close()
+
+
+def test_round_trip(tmpdir):
+    root = str(tmpdir)
+    assert not journal.exists(root)
+    write(root, 3)
+    assert journal.exists(root)
+    header, entries, size = journal.read(root)
+    assert header == dict(HEADER, version=journal.VERSION)
+    assert [e['path'] for e in entries] == ['n0', 'n1', 'n2']
+    assert size == tmpdir.join(journal.NAME).size()
+
+
+def test_partial_last_record(tmpdir):
+    root = str(tmpdir)
+    write(root, 2)
+    path = tmpdir.join(journal.NAME)
+    whole = path.size()
+    with open(str(path), 'ab') as fh:
+        fh.write(b'{"path": "n2", "si')
+
+    header, entries, size = journal.read(root)
+    assert len(entries) == 2
+    assert size == whole
+
+    # Continuing trims it off first.
+    writer = journal.Writer(root, size=size)
+    writer.add({'path': 'n2'})
+    writer.close()
+    assert [e['path'] for e in journal.read(root)[1]] == ['n0', 'n1', 'n2']
+
+
+def test_unusable(tmpdir):
+    root = str(tmpdir)
+    assert journal.read(root) is None
+    tmpdir.join(journal.NAME).write_binary(b'{"version": 0}\n')
+    assert journal.read(root) is None
+    tmpdir.join(journal.NAME).write_binary(b'not json\n')
+    assert journal.read(root) is None
+    journal.remove(root)
+    journal.remove(root)
+    assert not journal.exists(root)
@@ -0,0 +1,48 @@
+import numpy as np
+
+from geod.maya.mesh import from_fn
+from geod.mesh import Mesh
+from geod.mock import StubMFnMesh, grid_mesh
+
+from conftest import assert_same_mesh
+
+
+def mixed_mesh():
+    """A quad and two triangles, with their own UV ids."""
+    return Mesh.from_lists(
+        positions=[[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 0]],
+        face_counts=[4, 3, 3],
+        indices=[0, 1, 2, 3, 1, 4, 2, 2, 4, 3],
+        normals=[[0, 0, 1]],
+        normal_indices=[0] * 10,
+        uvs=[[0, 0], [1, 0], [1, 1], [0, 1], [0.5, 0.5]],
+        uv_indices=[0, 1, 2, 3, 4, 3, 2, 1, 0, 4],
+    )
+
+
+def test_round_trip():
+    for mesh in (grid_mesh(4), mixed_mesh()):
+        assert_same_mesh(from_fn(StubMFnMesh(mesh)), mesh)
+
+
+def test_fully_mapped():
+    mesh = mixed_mesh()
+    assert_same_mesh(from_fn(StubMFnMesh(mesh, mapped=[True, True, True])), mesh)
+
+
+def test_partially_mapped_drops_uvs():
+    mesh = mixed_mesh()
+    for mapped in ([False, True, True], [True, False, True], [True, True, False], [False] * 3):
+        extracted = from_fn(StubMFnMesh(mesh, mapped=mapped))
+        assert extracted.uvs is None
+        assert extracted.uv_indices is None
+        np.testing.assert_array_equal(extracted.indices, mesh.indices)
+        np.testing.assert_array_equal(extracted.normal_indices, mesh.normal_indices)
+
+
+def test_no_uvs():
+    mesh = mixed_mesh()
+    mesh.uvs = mesh.uv_indices = None
+    extracted = from_fn(StubMFnMesh(mesh))
+    assert extracted.uvs is None
+    assert_same_mesh(extracted, mesh)
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from geod import metacodec
+from geod.metacodec import available, codec_for_path, get_codec
+
+from conftest import load, synthetic_scene
+
+
+# Native strings either way, which on Python 2 are UTF-8.
+NAME = u'n\xe9'.encode('utf8') if metacodec.PY2 else u'n\xe9'
+
+META = {
+    'name': NAME,
+    'transform': {'local': [1.0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 1.5, -2, 3e10, 1]},
+    'geometry': {'path': 'n0.obj', 'format': 'obj', 'bounds': [[0, 0, 0], [1, 1, 1]]},
+    'nested': {'empty': {}, 'list': [[], [None, True, False]]},
+}
+
+
+@pytest.fixture(params=available())
+def codec(request):
+    return get_codec(request.param)
+
+
+def assert_native(value):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            assert type(key) is str
+            assert_native(item)
+    elif isinstance(value, list):
+        for item in value:
+            assert_native(item)
+    elif not isinstance(value, (int, float, bool, type(None))):
+        assert type(value) is str
+
+
+@pytest.mark.parametrize('pretty', [False, True])
+def test_round_trip(codec, pretty):
+    data = codec.dumps(META, pretty=pretty)
+    assert isinstance(data, bytes)
+    decoded = codec.loads(data)
+    assert decoded == META
+    assert_native(decoded)
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        get_codec('yaml')
+
+
+def test_missing_package(monkeypatch):
+    monkeypatch.setattr(metacodec, 'msgpack', None)
+    assert available() == ['json']
+    with pytest.raises(ValueError):
+        get_codec('msgpack')
+
+
+def test_codec_for_path():
+    assert codec_for_path('a/b.json').name == 'json'
+    if 'msgpack' in available():
+        assert codec_for_path('a/b.msgpack').name == 'msgpack'
+    assert codec_for_path('a/b.obj') is None
+
+
+def test_scene_round_trip(root, codec):
+    scene = synthetic_scene(root, meta_codec=codec.name)
+    scene.dump()
+    assert os.path.exists(os.path.join(root, 'root', 'n0' + codec.extension))
+    assert metacodec.load(os.path.join(root, 'root', 'n0' + codec.extension))['name'] == 'n0'
+    assert sorted(load(root)) == sorted(load(root, use_index=False))
@@ -0,0 +1,162 @@
+import numpy as np
+import pytest
+
+from geod import quantize
+from geod.mesh import Mesh
+
+
+def make_mesh(positions=None, normals=None, uvs=None):
+    if positions is None:
+        count = len(normals if normals is not None else uvs)
+        positions = np.zeros((count, 3), dtype=np.float32)
+    positions = np.asarray(positions, dtype=np.float32)
+    count = len(positions)
+    return Mesh(
+        positions,
+        np.array([count] if count else [], dtype=np.int32),
+        np.arange(count, dtype=np.int32),
+        normals=None if normals is None else np.asarray(normals, dtype=np.float32),
+        uvs=None if uvs is None else np.asarray(uvs, dtype=np.float32),
+    )
+
+
+def assert_within_bounds(mesh, **options):
+    encoded = quantize.encode(mesh, **options)
+    decoded = encoded.decode()
+    actual = quantize.errors(mesh, decoded)
+    assert actual
+    for name, error in actual.items():
+        if name in encoded.quantization:
+            assert error <= encoded.quantization[name]['max_error'], name
+    return encoded, decoded
+
+
+def random_normals(count, seed=0):
+    normals = np.random.RandomState(seed).normal(size=(count, 3))
+    return normals / np.sqrt((normals * normals).sum(axis=1))[:, None]
+
+
+@pytest.mark.parametrize('bits', [4, 8, 12, 16])
+def test_octahedral_normals(bits):
+    encoded, decoded = assert_within_bounds(make_mesh(normals=random_normals(5000)), normals=bits)
+    assert encoded.normals.dtype == (np.uint8 if bits <= 8 else np.uint16)
+    lengths = np.sqrt((decoded.normals.astype(np.float64) ** 2).sum(axis=1))
+    np.testing.assert_allclose(lengths, 1, atol=1e-6)
+
+
+def test_octahedral_normals_need_not_be_unit():
+    normals = random_normals(1000) * np.random.RandomState(1).uniform(1e-3, 1e3, size=(1000, 1))
+    assert_within_bounds(make_mesh(normals=normals), normals=16)
+
+
+def angles(a, b):
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    return np.arccos(np.clip((a * b).sum(axis=1), -1, 1))
+
+
+@pytest.mark.parametrize('bits', [2, 8, 16])
+def test_axis_aligned_normals(bits):
+    # Zero is between two steps, so these are not exact; both hemispheres
+    # and the folded edges must still be within the bound.
+    axes = np.concatenate([np.eye(3), -np.eye(3)])
+    edges = np.array([[1, 1, 0], [-1, 1, 0], [1, -1, 0], [-1, -1, 0]]) / np.sqrt(2)
+    assert_within_bounds(make_mesh(normals=np.concatenate([axes, edges])), normals=bits)
+
+
+def test_zero_length_normals_come_back_as_z():
+    normals = np.array([[0, 0, 0], [0, 1, 0], [0, 0, 0]])
+    encoded, decoded = assert_within_bounds(make_mesh(normals=normals), normals=16)
+    assert (angles(decoded.normals[[0, 2]], [[0, 0, 1]] * 2) <= encoded.quantization['normals']['max_error']).all()
+
+
+def test_only_zero_length_normals():
+    normals = np.zeros((4, 3))
+    encoded = quantize.encode(make_mesh(normals=normals), normals=16)
+    assert quantize.errors(make_mesh(normals=normals), encoded.decode())['normals'] == 0.0
+
+
+@pytest.mark.parametrize('offset, scale', [
+    (0, 1),      # The usual unit square.
+    (-3, 10),    # Tiled and mirrored textures.
+    (100, 1),    # UDIMs far from the origin.
+])
+def test_half_uvs(offset, scale):
+    uvs = np.random.RandomState(2).uniform(size=(5000, 2)) * scale + offset
+    encoded, decoded = assert_within_bounds(make_mesh(uvs=uvs), uvs='half')
+    assert encoded.uvs.dtype == np.float16
+
+
+def test_subnormal_half_uvs():
+    # Below 2**-14 half-floats lose precision; the bound must still hold.
+    uvs = np.array([[0, 2.0 ** -15], [2.0 ** -20, 2.0 ** -24], [3e-8, 0], [1e-5, 6e-5]])
+    assert_within_bounds(make_mesh(uvs=uvs), uvs='half')
+
+
+def test_half_uvs_out_of_range():
+    with pytest.raises(ValueError):
+        quantize.encode(make_mesh(uvs=[[0, 1e5]]), uvs='half')
+
+
+@pytest.mark.parametrize('bits', [1, 8, 16])
+@pytest.mark.parametrize('offset, scale', [(0, 1), (-3, 10), (100, 1)])
+def test_fixed_uvs(bits, offset, scale):
+    uvs = np.random.RandomState(3).uniform(size=(5000, 2)) * scale + offset
+    assert_within_bounds(make_mesh(uvs=uvs), uvs='fixed', uv_bits=bits)
+
+
+def test_subnormal_fixed_uvs():
+    uvs = np.array([[0, 2.0 ** -140], [1e-45, 2.0 ** -130], [1e-40, 0]])
+    assert_within_bounds(make_mesh(uvs=uvs), uvs='fixed', uv_bits=8)
+
+
+@pytest.mark.parametrize('bits', [8, 12, 16])
+def test_fixed_positions(bits):
+    positions = np.random.RandomState(4).uniform(-1000, 5000, size=(5000, 3))
+    assert_within_bounds(make_mesh(positions), positions=bits)
+
+
+def test_flat_positions():
+    # A plane has no extent along one axis, which must not divide by zero.
+    positions = np.random.RandomState(5).uniform(size=(100, 3))
+    positions[:, 1] = 12.5
+    encoded, decoded = assert_within_bounds(make_mesh(positions), positions=16)
+    assert (decoded.positions[:, 1] == 12.5).all()
+
+
+def test_everything_at_once():
+    rand = np.random.RandomState(6)
+    mesh = make_mesh(rand.uniform(-10, 10, size=(300, 3)), random_normals(300), rand.uniform(size=(300, 2)))
+    encoded, decoded = assert_within_bounds(mesh, normals=10, uvs='fixed', uv_bits=12, positions=14)
+    assert sorted(encoded.quantization) == ['normals', 'positions', 'uvs']
+    np.testing.assert_array_equal(decoded.indices, mesh.indices)
+    np.testing.assert_array_equal(decoded.face_counts, mesh.face_counts)
+
+
+def test_empty_arrays():
+    empty = np.zeros((0, 3))
+    mesh = make_mesh(empty, normals=empty, uvs=np.zeros((0, 2)))
+    for uvs in ('half', 'fixed'):
+        encoded = quantize.encode(mesh, normals=16, uvs=uvs, positions=16)
+        decoded = encoded.decode()
+        assert decoded.positions.shape == (0, 3)
+        assert decoded.normals.shape == (0, 3)
+        assert decoded.uvs.shape == (0, 2)
+        assert quantize.errors(mesh, decoded) == {'normals': 0.0, 'uvs': 0.0, 'positions': 0.0}
+
+
+def test_missing_attributes_are_left_alone():
+    mesh = make_mesh(np.ones((3, 3)))
+    encoded = quantize.encode(mesh)
+    assert encoded.quantization == {}
+    assert encoded.normals is None and encoded.uvs is None
+
+
+def test_bad_options():
+    mesh = make_mesh(np.ones((3, 3)), normals=np.ones((3, 3)), uvs=np.ones((3, 2)))
+    with pytest.raises(ValueError):
+        quantize.encode(mesh, uvs='nope')
+    with pytest.raises(ValueError):
+        quantize.encode(mesh, normals=17)
+    with pytest.raises(ValueError):
+        quantize.decode(dict(mesh.arrays()), {'uvs': {'encoding': 'nope'}})
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from geod import index, journal
+
+from conftest import load, synthetic_scene
+
+
+def interrupt(root, after, **kwargs):
+    scene = synthetic_scene(root, **kwargs.pop('scene_kwargs', {}))
+    dumping = scene.iter_dump(**kwargs)
+    for i, _, _, _ in dumping:
+        if i == after:
+            break
+    dumping.close()
+    return scene
+
+
+def entries(root):
+    return sorted((e['path'], e['fingerprint'], e['size']) for e in index.read(root))
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'workers': 2, 'dedup': True}])
+def test_resume_matches_a_clean_dump(tmpdir, kwargs):
+
+    clean = str(tmpdir.join('clean'))
+    synthetic_scene(clean).dump(**kwargs)
+
+    root = str(tmpdir.join('scene'))
+    scene = interrupt(root, 20, **kwargs)
+    assert scene.resumable
+
+    scene = synthetic_scene(root)
+    summary = scene.dump(resume=True, **kwargs)
+    # Writes still in flight when we stopped were not journaled.
+    if kwargs.get('workers'):
+        assert 0 < summary['resumed'] <= 20
+    else:
+        assert summary['resumed'] == 20
+    assert summary['resumed'] + summary['written'] == len(scene.guid_to_object)
+    assert not scene.resumable
+    assert entries(root) == entries(clean)
+
+
+def test_unfinished_dump_is_not_loaded(root):
+    interrupt(root, 10)
+    with pytest.raises(ValueError):
+        load(root)
+    with pytest.raises(ValueError):
+        load(root, use_index=False)
+
+
+def test_torn_journal_line_is_ignored(root):
+    interrupt(root, 10)
+    path = journal.journal_path(root)
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    with open(path, 'wb') as fh:
+        fh.write(data[:-10])
+    summary = synthetic_scene(root).dump(resume=True)
+    assert summary['resumed'] == 9
+    assert len(load(root)) >= 40
+
+
+def test_resume_with_other_options_fails(root):
+    interrupt(root, 10)
+    with pytest.raises(ValueError):
+        synthetic_scene(root, geometry_format='geod').dump(resume=True)
+
+
+def test_dump_without_resume_starts_over(root):
+    interrupt(root, 10)
+    summary = synthetic_scene(root).dump()
+    assert summary['resumed'] == 0
+    assert not journal.exists(root)
+
+
+def test_resumed_incremental_dump_cleans_up(root):
+    synthetic_scene(root, size=40).dump()
+    interrupt(root, 5, incremental=True, scene_kwargs={'size': 13})
+    summary = synthetic_scene(root, size=13).dump(resume=True)
+    assert summary['removed'] == 27
+    assert len(index.read(root)) == 13
+
+
+def test_resume_archive(tmpdir):
+    path = str(tmpdir.join('scene.geoda'))
+    scene = interrupt(path, 20)
+    assert scene.resumable and not os.path.exists(path)
+    summary = synthetic_scene(path).dump(resume=True)
+    assert summary['resumed'] == 20
+    assert len(load(path)) >= 40
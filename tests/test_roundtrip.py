@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from geod import index
+from geod.mock import grid_mesh
+
+from conftest import assert_same_mesh, load, loaded_mesh, synthetic_scene
+
+
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'geometry_format': 'geod'},
+    {'meta_codec': 'json', 'geometry_format': 'obj'},
+])
+def test_dump_and_load(root, kwargs):
+
+    scene = synthetic_scene(root, **kwargs)
+    summary = scene.dump()
+    assert summary['written'] == len(scene.guid_to_object)
+
+    expected = dict((path.replace(os.sep, '/'), obj) for path, obj in scene.walk())
+    loaded = load(root)
+    assert set(expected) <= set(loaded)
+
+    for path, obj in expected.items():
+        assert loaded[path].transforms['local'] == obj.get_transforms()['local']
+        expected_mesh = grid_mesh(*obj.mesh_spec) if obj.mesh_spec else None
+        assert_same_mesh(loaded_mesh(loaded, path), expected_mesh)
+
+
+def test_index_and_walk_agree(root):
+    synthetic_scene(root).dump()
+    assert index.read(root) is not None
+    with_index = load(root)
+    walked = load(root, use_index=False)
+    assert sorted(with_index) == sorted(walked)
+    for path in with_index:
+        assert with_index[path].transforms == walked[path].transforms
+
+
+def test_stream_loads_everything(root):
+    from geod.mock import MockObject
+    from geod.scene import Scene
+    scene = synthetic_scene(root)
+    scene.dump()
+    streamed = [path.replace(os.sep, '/') for _, _, path, _ in Scene(root, object_class=MockObject).iter_load(stream=True)]
+    assert sorted(streamed) == sorted(load(root))
+
+
+def test_deferred_geometry(root):
+    from geod.mock import MockObject
+    from geod.scene import Scene
+    synthetic_scene(root).dump()
+    scene = Scene(root, object_class=MockObject)
+    scene.load(defer_geometry=True)
+    objects = [obj for _, obj in scene.walk() if obj.mesh_spec is None and obj.placeholder]
+    assert objects and all(obj.mesh is None for obj in objects)
+    scene.load_geometry()
+    assert all(obj.mesh is not None for obj in objects)
+
+
+def test_prefetch_with_workers_uses_threads(root, monkeypatch):
+    import concurrent.futures
+    class NoProcesses(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            raise AssertionError('workers should not start processes')
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', NoProcesses)
+
+    synthetic_scene(root).dump()
+    serial = load(root)
+    prefetched = load(root, workers=2)
+    assert sorted(prefetched) == sorted(serial)
+    for path in serial:
+        assert_same_mesh(loaded_mesh(prefetched, path), loaded_mesh(serial, path))
+
+
+def test_prefetch_with_process_pool(root):
+    from concurrent.futures import ProcessPoolExecutor
+    synthetic_scene(root).dump()
+    serial = load(root)
+    with ProcessPoolExecutor(2) as executor:
+        prefetched = load(root, executor=executor)
+    assert sorted(prefetched) == sorted(serial)
+    for path in serial:
+        assert_same_mesh(loaded_mesh(prefetched, path), loaded_mesh(serial, path))
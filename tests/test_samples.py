@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from geod import samples
+from geod.samples import Packer, Samples
+from geod.scene import Scene
+from geod.transforms import compose, decompose
+
+from conftest import synthetic_scene
+
+
+def packed(frames):
+    """Samples from the matrices of every object on each of ``frames``."""
+    times = np.arange(len(frames), dtype=np.float64)
+    packer = Packer(len(frames[0]))
+    for i, matrices in enumerate(frames):
+        packer.add(i, np.asarray(matrices, dtype=np.float64).reshape(-1, 16))
+    return Samples(['n%d' % i for i in range(len(frames[0]))], times, *packer.pack())
+
+
+def test_rotation_is_interpolated_around_the_arc():
+    # A quarter turn about z, while moving along x.
+    start = compose([0, 0, 0], [0, 0, 0], [2, 2, 2])
+    end = compose([10, 0, 0], [0, 0, 90], [2, 2, 2])
+    result = packed([start, end]).transforms_at(0.5)[0]
+
+    components = decompose(result)
+    np.testing.assert_allclose(components['rotate'], [[0, 0, 45]], atol=1e-9)
+    np.testing.assert_allclose(components['scale'], [[2, 2, 2]], atol=1e-9)
+    np.testing.assert_allclose(components['translate'], [[5, 0, 0]], atol=1e-9)
+    # Blending the matrices directly would have shrunk it to sqrt(2).
+    np.testing.assert_allclose(np.linalg.det(result[:3, :3]), 8)
+
+
+def test_rotation_takes_the_shorter_way():
+    start = compose([0, 0, 0], [0, 0, 170], [1, 1, 1])
+    end = compose([0, 0, 0], [0, 0, -170], [1, 1, 1])
+    rotate = decompose(packed([start, end]).transforms_at(0.5))['rotate'][0]
+    assert abs(abs(rotate[2]) - 180) < 1e-6
+
+
+def test_exact_on_frames_and_clamped_outside():
+    frames = [
+        compose([0, 0, 0], [10, 20, 30], [1, 2, 3]),
+        compose([1, 2, 3], [40, 50, 60], [3, 2, 1]),
+    ]
+    s = packed(frames)
+    np.testing.assert_array_equal(s.transforms_at(0)[0], frames[0][0])
+    np.testing.assert_array_equal(s.transforms_at(1)[0], frames[1][0])
+    np.testing.assert_array_equal(s.transforms_at(-5)[0], frames[0][0])
+    np.testing.assert_array_equal(s.transforms_at(5)[0], frames[1][0])
+
+
+def test_many_times():
+    s = packed([compose([0, 0, 0], [0, 0, 0], [1, 1, 1]), compose([4, 0, 0], [0, 0, 0], [1, 1, 1])])
+    result = s.transforms_at([0, 0.25, 1])
+    assert result.shape == (3, 1, 4, 4)
+    np.testing.assert_allclose(result[:, 0, 3, 0], [0, 1, 4])
+
+
+def test_dumped_samples(root):
+    synthetic_scene(root).dump(frames=[0, 1, 2, 3], visibility=True)
+    s = Scene(root).samples()
+    assert len(s) == 40
+
+    # Those ending in 0 move up a unit per frame, and the rest are still.
+    times, _ = s.keys('root/n0')
+    np.testing.assert_array_equal(times, [0, 1, 2, 3])
+    times, _ = s.keys('root/n2')
+    np.testing.assert_array_equal(times, [0])
+
+    matrices = s.transforms_at(1.5)
+    assert matrices[s.index('root/n0')][3, 1] == 1.5
+    assert matrices[s.index('root/n2')][3, 1] == 0
+
+    # Those ending in 1 are hidden on odd frames, holding between them.
+    n1 = s.index('root/n1')
+    assert [s.visibility_at(t)[n1] for t in (0, 1, 1.5, 2)] == [True, False, False, True]
+
+
+def test_without_visibility(root):
+    synthetic_scene(root).dump(frames=[0, 1])
+    s = Scene(root).samples()
+    assert not s.has_visibility
+    with pytest.raises(ValueError):
+        s.visibility_at(0)
+
+
+def test_no_samples(root):
+    synthetic_scene(root).dump()
+    assert Scene(root).samples() is None
+    assert samples.Samples.read(root) is None
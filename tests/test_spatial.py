@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from geod import index, spatial
+from geod.mock import grid_mesh
+from geod.scene import Scene
+from geod.spatial import SpatialIndex, mesh_summary, world_bounds
+from geod.transforms import compose
+
+from conftest import load, synthetic_scene
+
+
+def random_index(count, seed=0):
+    rand = np.random.RandomState(seed)
+    lo = rand.uniform(-100, 100, size=(count, 3))
+    hi = lo + rand.uniform(0, 10, size=(count, 3))
+    paths = ['n%d' % i for i in range(count)]
+    return SpatialIndex(paths, np.stack([lo, hi], axis=1), rand.randint(1, 100, count), rand.randint(1, 100, count), rand.randint(1, 1000, count))
+
+
+def brute_box(spatial_index, lo, hi):
+    bounds = spatial_index.bounds
+    hit = ((bounds[:, 0] <= hi) & (bounds[:, 1] >= lo)).all(axis=1)
+    return sorted(p for p, h in zip(spatial_index.paths, hit) if h)
+
+
+def test_mesh_summary():
+    summary = mesh_summary(grid_mesh(2, 5))
+    assert summary == {'points': 9, 'faces': 4, 'bounds': [[0, 0, 5], [1, 1, 5]]}
+
+
+def test_world_bounds():
+    local = [[[-1, -2, -3], [1, 2, 3]]]
+    matrices = compose([10, 0, 0], [0, 0, 90], [1, 1, 1])
+    # A quarter turn about z swaps the x and y extents.
+    np.testing.assert_allclose(world_bounds(local, matrices), [[[8, -1, -3], [12, 1, 3]]], atol=1e-12)
+
+
+@pytest.mark.parametrize('count', [0, 1, 3, 1000])
+def test_query_box(count):
+    spatial_index = random_index(count)
+    rand = np.random.RandomState(1)
+    for _ in range(50):
+        lo = rand.uniform(-120, 100, size=3)
+        hi = lo + rand.uniform(0, 60, size=3)
+        assert sorted(spatial_index.query_box(lo, hi)) == brute_box(spatial_index, lo, hi)
+
+
+def test_query_frustum():
+    spatial_index = random_index(1000)
+    lo, hi = np.array([-20, -30, -40]), np.array([50, 60, 70])
+    # The six planes of the box, facing in.
+    planes = [
+        (1, 0, 0, -lo[0]), (-1, 0, 0, hi[0]),
+        (0, 1, 0, -lo[1]), (0, -1, 0, hi[1]),
+        (0, 0, 1, -lo[2]), (0, 0, -1, hi[2]),
+    ]
+    assert sorted(spatial_index.query_frustum(planes)) == brute_box(spatial_index, lo, hi)
+
+
+def test_largest():
+    spatial_index = random_index(100)
+    for key in ('bytes', 'points', 'faces'):
+        values = dict(zip(spatial_index.paths, spatial_index.sizes[key]))
+        largest = spatial_index.largest(5, key)
+        assert [values[p] for p in largest] == sorted(values.values(), reverse=True)[:5]
+    with pytest.raises(ValueError):
+        spatial_index.largest(5, 'nope')
+
+
+def test_dict_round_trip():
+    spatial_index = random_index(100)
+    copy = SpatialIndex.from_dict(spatial_index.as_dict())
+    assert copy.paths == spatial_index.paths
+    assert copy.query_box((0, 0, 0), (50, 50, 50)) == spatial_index.query_box((0, 0, 0), (50, 50, 50))
+
+
+def test_dumped_scene(root):
+    synthetic_scene(root).dump()
+    scene = Scene(root)
+    spatial_index = scene.spatial_index()
+    # Every object has a mesh but the root.
+    assert len(spatial_index) == 39
+
+    # Each grid is a unit square at z=seed, and every object is offset along
+    # x by the length of its name, so root/n0 is at 4 + 2.
+    n0 = spatial_index.paths.index('root/n0')
+    np.testing.assert_allclose(spatial_index.bounds[n0], [[6, 0, 1], [7, 1, 1]])
+
+    paths = scene.query_box((6.5, 0.5, 1), (6.5, 0.5, 1))
+    assert 'root/n0' in paths
+    loaded = load(root, include=paths)
+    assert 'root/n0' in loaded and 'root/n1' not in loaded
+
+
+def test_stale_without_index(root):
+    synthetic_scene(root).dump()
+    index.remove(root)
+    assert spatial.read(root) is None
+    with pytest.raises(ValueError):
+        Scene(root).query_box((0, 0, 0), (1, 1, 1))
@@ -0,0 +1,63 @@
+import os
+
+from geod.mock import MockObject
+from geod.scene import Scene
+from geod.stats import Stats, null_stats
+
+from conftest import synthetic_scene
+
+
+def scene_files(root):
+    """``{extension: [sizes]}`` of every object's file, ignoring ours."""
+    files = {}
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = [x for x in dir_names if not x.startswith('.')]
+        for name in file_names:
+            if not name.startswith('.'):
+                files.setdefault(os.path.splitext(name)[1], []).append(os.path.getsize(os.path.join(dir_path, name)))
+    return files
+
+
+def test_dump_counters(root):
+    scene = synthetic_scene(root, stats=True)
+    scene.dump()
+    counters = scene.stats.counters
+    files = scene_files(root)
+    assert counters['objects'] == len(files['.json']) == 40
+    assert counters['files_written'] == len(files['.json']) + len(files['.obj'])
+    assert counters['bytes_written'] == sum(files['.json']) + sum(files['.obj'])
+    for phase in ('graph', 'meta', 'transforms', 'geometry', 'write_meta', 'write_geometry', 'index'):
+        assert phase in scene.stats.phases, phase
+
+
+def test_load_counters(root):
+    synthetic_scene(root).dump()
+    scene = Scene(root, object_class=MockObject, stats=True)
+    scene.load()
+    # The index, and then each mesh.
+    assert scene.stats.counters['files_read'] == 1 + len(scene_files(root)['.obj'])
+    for phase in ('read', 'link', 'create', 'geometry'):
+        assert phase in scene.stats.phases, phase
+
+
+def test_hooks_and_slowest(root):
+    seen = []
+    stats = Stats(slowest=3, hooks=[lambda stats, path, obj: seen.append(path)])
+    scene = synthetic_scene(root, stats=stats)
+    scene.dump()
+    assert sorted(seen) == sorted(path for path, _ in scene.walk())
+    slowest = stats.slowest
+    assert len(slowest) == 3
+    assert [x[0] for x in slowest] == sorted([x[0] for x in slowest], reverse=True)
+    assert [x['path'] for x in stats.as_dict()['slowest']] == [x[1] for x in slowest]
+    text = stats.format()
+    assert 'write_meta' in text and 'files_written' in text
+
+
+def test_off_by_default(root):
+    scene = synthetic_scene(root)
+    assert scene.stats is null_stats
+    assert not scene.stats.enabled
+    scene.dump()
+    with scene.stats.timer('anything'):
+        scene.stats.count('anything')
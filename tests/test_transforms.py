@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from geod import transforms
+from geod.transforms import compose, decompose
+
+
+def random_components(count, seed=0, shear=True):
+    rand = np.random.RandomState(seed)
+    return {
+        'translate': rand.uniform(-100, 100, size=(count, 3)),
+        # Away from gimbal lock, where the angles are not unique.
+        'rotate': rand.uniform(-180, 180, size=(count, 3)) * [1, 0.45, 1],
+        'scale': rand.uniform(0.1, 10, size=(count, 3)),
+        'shear': rand.uniform(-1, 1, size=(count, 3)) if shear else np.zeros((count, 3)),
+    }
+
+
+def random_hierarchy(count, seed=0):
+    """Parent indices of a random forest, with parents after their children."""
+    rand = np.random.RandomState(seed)
+    parents = np.array([rand.randint(i + 1, count) if i < count - 1 and rand.uniform() < 0.9 else -1 for i in range(count)])
+    local = compose(**random_components(count, seed, shear=False))
+    return parents, local
+
+
+def slow_world(local, parents, i):
+    world = local[i]
+    while parents[i] >= 0:
+        i = parents[i]
+        world = world.dot(local[i])
+    return world
+
+
+def test_compose_matches_the_meta_convention():
+    # Row vectors: translation is in the last row, and x turns toward y.
+    m = compose([1, 2, 3], [0, 0, 90], [1, 1, 1])[0]
+    np.testing.assert_allclose(m[3, :3], [1, 2, 3])
+    np.testing.assert_allclose(np.array([1, 0, 0, 1]).dot(m), [1, 3, 3, 1], atol=1e-12)
+
+
+@pytest.mark.parametrize('shear', [False, True])
+def test_decompose_round_trip(shear):
+    components = random_components(1000, shear=shear)
+    decomposed = decompose(compose(**components))
+    for name, values in components.items():
+        np.testing.assert_allclose(decomposed[name], values, atol=1e-7, err_msg=name)
+
+
+def test_negative_scale():
+    m = compose([0, 0, 0], [10, 20, 30], [1, -2, 3])
+    decomposed = decompose(m)
+    assert (decomposed['scale'] < 0).all()
+    np.testing.assert_allclose(compose(**decomposed), m, atol=1e-12)
+
+
+def test_gimbal_lock():
+    m = compose([0, 0, 0], [30, 90, 40], [1, 1, 1])
+    np.testing.assert_allclose(compose(**decompose(m)), m, atol=1e-9)
+
+
+def test_world_and_local():
+    parents, local = random_hierarchy(500)
+    world = transforms.world_from_local(local, parents)
+    for i in range(0, 500, 7):
+        np.testing.assert_allclose(world[i], slow_world(local, parents, i), rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(transforms.local_from_world(world, parents), local, atol=1e-6)
+
+
+def test_depths():
+    # A chain (in reverse), and a root with two children.
+    parents = np.array([1, 2, 3, -1, -1, 4, 4])
+    np.testing.assert_array_equal(transforms.depths(parents), [3, 2, 1, 0, 0, 1, 1])
+
+
+def test_empty():
+    assert transforms.world_from_local(np.zeros((0, 16)), []).shape == (0, 4, 4)
+
+
+def test_add_components():
+    metas = [{'local': compose([1, 2, 3], [0, 0, 45], [2, 2, 2]).ravel().tolist()}, {}, None]
+    transforms.add_components(metas)
+    components = metas[0]['_components']
+    np.testing.assert_allclose(components['translate'], [1, 2, 3])
+    np.testing.assert_allclose(components['rotate'], [0, 0, 45])
+    np.testing.assert_allclose(components['scale'], [2, 2, 2])
+    assert metas[1] == {}
@@ -0,0 +1,54 @@
+import errno
+import os
+
+import pytest
+
+from geod import utils
+
+
+def write(path, data):
+    with open(path, 'w') as fh:
+        fh.write(data)
+
+
+def read(path):
+    with open(path) as fh:
+        return fh.read()
+
+
+@pytest.fixture(params=['os.replace', 'fallback'])
+def windows_py2(request, monkeypatch):
+    """Rename as on Windows under Python 2, which won't clobber files."""
+    if request.param == 'fallback':
+        rename = os.rename
+        def strict_rename(src, dst):
+            if os.path.exists(src) and os.path.exists(dst):
+                raise OSError(errno.EEXIST, 'File exists', dst)
+            rename(src, dst)
+        monkeypatch.delattr(os, 'replace', raising=False)
+        monkeypatch.setattr(os, 'rename', strict_rename)
+
+
+def test_replace_new_file(tmpdir, windows_py2):
+    src, dst = str(tmpdir.join('a.tmp')), str(tmpdir.join('a'))
+    write(src, 'new')
+    utils.replace(src, dst)
+    assert read(dst) == 'new'
+    assert not os.path.exists(src)
+
+
+def test_replace_existing_file(tmpdir, windows_py2):
+    src, dst = str(tmpdir.join('a.tmp')), str(tmpdir.join('a'))
+    write(src, 'new')
+    write(dst, 'old')
+    utils.replace(src, dst)
+    assert read(dst) == 'new'
+    assert not os.path.exists(src)
+
+
+def test_replace_missing_source(tmpdir, windows_py2):
+    dst = str(tmpdir.join('a'))
+    write(dst, 'old')
+    with pytest.raises(OSError):
+        utils.replace(str(tmpdir.join('missing')), dst)
+    assert read(dst) == 'old'